@@ -6,6 +6,7 @@ const API_ENDPOINTS = {
 
     ADD_PRODUCT: "/products/",
     ADD_SOLD_PRODUCT: "/sold",
+    SELL_BY_CODE: "/sales/by-code",
     GET_PRODUCTS: "/products/",
     GET_SOLD_PRODUCTS: "/sold",
     UPDATE_PRODUCT: "/products",
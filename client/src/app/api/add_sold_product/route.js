@@ -1,38 +1,38 @@
 import axios from "axios";
-// import { cookies } from "next/headers";
+import { cookies } from "next/headers";
 import { API_BASE_URL, API_ENDPOINTS } from "@/apiConfig";
 
 export const POST = async (req) => {
   try {
-    // const cookieStore = await cookies();
-    // const token = cookieStore.get("access_token")?.value;
+    const cookieStore = await cookies();
+    const token = cookieStore.get("access_token")?.value;
 
-    // if (!token) {
-    //   return new Response(
-    //     JSON.stringify({ error: "Unauthorized: Missing credentials" }),
-    //     { status: 401, headers: { "Content-Type": "application/json" } }
-    //   );
-    // }
+    if (!token) {
+      return new Response(
+        JSON.stringify({ error: "Unauthorized: Missing credentials" }),
+        { status: 401, headers: { "Content-Type": "application/json" } }
+      );
+    }
 
     const body = await req.json();
-    const { product_name, sell_price, quantity } = body;
+    const { code, quantity, timestamp } = body;
 
-    if (!product_name || !sell_price || !quantity) {
+    if (!code || !quantity) {
       return new Response(JSON.stringify({ error: "There are missed data" }), {
         status: 400,
       });
     }
 
-    // Prepare URL-encoded request body
+    // The scanned SKU/barcode is resolved server-side, so the till never needs the catalog
     const requestBody = {
-      product_name,
-      sell_price,
+      code,
       quantity,
+      timestamp: timestamp || new Date().toISOString().slice(0, 10),
     };
 
     // Make the POST request to the token API
     const response = await axios.post(
-      `${API_BASE_URL}${API_ENDPOINTS.ADD_VEHICLE}`,
+      `${API_BASE_URL}${API_ENDPOINTS.SELL_BY_CODE}`,
       requestBody,
       {
         headers: {
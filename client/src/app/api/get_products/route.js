@@ -14,9 +14,13 @@ export async function GET(req) {
       );
     }
 
+    // Forward pagination and filter params (cursor, limit, category, name_prefix, date_from, date_to, sort)
+    const { searchParams } = new URL(req.url);
+
     const response = await axios.get(
       `${API_BASE_URL}${API_ENDPOINTS.GET_PRODUCTS}`,
       {
+        params: Object.fromEntries(searchParams),
         headers: {
           Authorization: `Bearer ${token}`,
           "Content-Type": "application/json",
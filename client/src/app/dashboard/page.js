@@ -1,12 +1,14 @@
 "use client";
 import { useState } from "react";
-import useSWR from "swr";
-import ProductTable from "@/components/table";
+import useSWRInfinite from "swr/infinite";
+import ProductTable, { CATEGORIES } from "@/components/table";
 import { toast, Toaster } from "react-hot-toast";
 import { Icon } from "@iconify/react";
 
 const fetcher = (url) => fetch(url).then((res) => res.json());
 
+const PAGE_SIZE = 50;
+
 export default function Page() {
   const [form, setForm] = useState({
     name: "",
@@ -17,7 +19,21 @@ export default function Page() {
     category: "",
   });
 
-  const { data: products = [], mutate } = useSWR("/api/get_products", fetcher);
+  const [filters, setFilters] = useState({ search: "", category: "" });
+
+  // Products are paged and filtered by the server; each page carries the cursor for the next one
+  const getKey = (pageIndex, previousPage) => {
+    if (previousPage && !previousPage.next_cursor) return null;
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (filters.search) params.set("name_prefix", filters.search);
+    if (filters.category) params.set("category", filters.category);
+    if (previousPage) params.set("cursor", previousPage.next_cursor);
+    return `/api/get_products?${params}`;
+  };
+
+  const { data: pages = [], mutate, size, setSize } = useSWRInfinite(getKey, fetcher);
+  const products = pages.flatMap((page) => page.items ?? []);
+  const hasMore = Boolean(pages[pages.length - 1]?.next_cursor);
 
   const handleChange = (e) => {
     setForm((prev) => ({ ...prev, [e.target.name]: e.target.value }));
@@ -124,21 +140,11 @@ export default function Page() {
           className="border-1 border-gray-700 rounded px-4 py-2"
         >
           <option value="">Select Category</option>
-          <option value="Electronics" className="text-black">
-            Electronics
-          </option>
-          <option value="Clothing" className="text-black">
-            Clothing
-          </option>
-          <option value="Food" className="text-black">
-            Food
-          </option>
-          <option value="Books" className="text-black">
-            Books
-          </option>
-          <option value="Other" className="text-black">
-            Other
-          </option>
+          {CATEGORIES.map((cat) => (
+            <option key={cat} value={cat} className="text-black">
+              {cat}
+            </option>
+          ))}
         </select>
         <input
           type="date"
@@ -169,7 +175,13 @@ export default function Page() {
         </button>
       </form>
       <h2 className="text-xl font-bold mb-4 text-white">Product List</h2>
-      <ProductTable products={products} />
+      <ProductTable
+        products={products}
+        filters={filters}
+        onFiltersChange={setFilters}
+        hasMore={hasMore}
+        onLoadMore={() => setSize(size + 1)}
+      />
     </div>
   );
 }
@@ -1,32 +1,21 @@
 "use client";
-import { useState, useMemo } from "react";
+import { useState } from "react";
 import UpdateProductModal from "./UpdateProductModal";
 
-export default function ProductTable({ products, setProducts }) {
-  const [search, setSearch] = useState("");
-  const [categoryFilter, setCategoryFilter] = useState("");
+export const CATEGORIES = ["Electronics", "Clothing", "Food", "Books", "Other"];
+
+// Filtering and paging happen on the server; this table only renders the pages loaded so far
+export default function ProductTable({
+  products,
+  setProducts,
+  filters,
+  onFiltersChange,
+  hasMore,
+  onLoadMore,
+}) {
   const [modalOpen, setModalOpen] = useState(false);
   const [editingProduct, setEditingProduct] = useState(null);
 
-  // Get unique categories from products
-  const categories = useMemo(() => {
-    const set = new Set(products.map((p) => p.category).filter(Boolean));
-    return Array.from(set);
-  }, [products]);
-
-  // Filtered products
-  const filteredProducts = useMemo(() => {
-    return products.filter((p) => {
-      const matchesSearch =
-        p.name.toLowerCase().includes(search.toLowerCase()) ||
-        p.category?.toLowerCase().includes(search.toLowerCase());
-      const matchesCategory = categoryFilter
-        ? p.category === categoryFilter
-        : true;
-      return matchesSearch && matchesCategory;
-    });
-  }, [products, search, categoryFilter]);
-
   const openModal = (product) => {
     setEditingProduct(product);
     setModalOpen(true);
@@ -45,18 +34,22 @@ export default function ProductTable({ products, setProducts }) {
         <div className="flex flex-col md:flex-row  mb-4 gap-4">
           <input
             type="text"
-            placeholder="Search by name or category..."
-            value={search}
-            onChange={(e) => setSearch(e.target.value)}
+            placeholder="Search by name..."
+            value={filters.search}
+            onChange={(e) =>
+              onFiltersChange({ ...filters, search: e.target.value })
+            }
             className="border-1 border-gray-700 rounded px-4 py-2 w-full md:w-1/3"
           />
           <select
-            value={categoryFilter}
-            onChange={(e) => setCategoryFilter(e.target.value)}
+            value={filters.category}
+            onChange={(e) =>
+              onFiltersChange({ ...filters, category: e.target.value })
+            }
             className="border-1 border-gray-700 rounded px-4 py-2 w-full md:w-1/4"
           >
             <option value="">All Categories</option>
-            {categories.map((cat) => (
+            {CATEGORIES.map((cat) => (
               <option key={cat} value={cat} className="text-[#0C1825]">
                 {cat}
               </option>
@@ -64,10 +57,7 @@ export default function ProductTable({ products, setProducts }) {
           </select>
           <button
             type="button"
-            onClick={() => {
-              setSearch("");
-              setCategoryFilter("");
-            }}
+            onClick={() => onFiltersChange({ search: "", category: "" })}
             className="rounded px-4 py-1 border-1 border-gray-700 text-white font-semibold hover:bg-[#efad21] w-full md:w-auto"
           >
             Clear
@@ -86,7 +76,7 @@ export default function ProductTable({ products, setProducts }) {
               </tr>
             </thead>
             <tbody>
-              {filteredProducts.length === 0 ? (
+              {products.length === 0 ? (
                 <tr>
                   <td
                     colSpan={6}
@@ -96,7 +86,7 @@ export default function ProductTable({ products, setProducts }) {
                   </td>
                 </tr>
               ) : (
-                filteredProducts.map((p, index) => (
+                products.map((p, index) => (
                   <tr
                     key={index}
                     className="border-t text-white"
@@ -114,6 +104,15 @@ export default function ProductTable({ products, setProducts }) {
             </tbody>
           </table>
         </div>
+        {hasMore && (
+          <button
+            type="button"
+            onClick={onLoadMore}
+            className="mt-4 rounded px-4 py-1 border-1 border-gray-700 text-white font-semibold hover:bg-[#efad21]"
+          >
+            Load more
+          </button>
+        )}
       </div>
       {/* Modal */}
       <UpdateProductModal
@@ -0,0 +1,30 @@
+"""add_product_sku
+
+Revision ID: 0b6e4d2a9c73
+Revises: f2a7c9d31b58
+Create Date: 2026-10-18 13:24:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e4d2a9c73'
+down_revision: Union[str, None] = 'f2a7c9d31b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('sku', sa.String(), nullable=True))
+    op.create_index('ux_products_store_id_sku', 'products', ['store_id', 'sku'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_products_store_id_sku', table_name='products')
+    op.drop_column('products', 'sku')
@@ -0,0 +1,48 @@
+"""add_product_sync_versions
+
+Revision ID: 5d0c8e3f71a4
+Revises: 0b6e4d2a9c73
+Create Date: 2026-10-18 14:05:52.318806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0c8e3f71a4'
+down_revision: Union[str, None] = '0b6e4d2a9c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows start at version 0, so they are part of every client's first (since=0) download
+    op.add_column('products', sa.Column('change_version', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_products_store_id_change_version_id', 'products', ['store_id', 'change_version', 'id'])
+    op.create_table(
+        'store_sync_versions',
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('compacted_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'product_tombstones',
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), primary_key=True),
+        sa.Column('change_version', sa.Integer(), primary_key=True),
+        sa.Column('product_id', sa.Integer(), primary_key=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_product_tombstones_deleted_at', 'product_tombstones', ['deleted_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_tombstones_deleted_at', table_name='product_tombstones')
+    op.drop_table('product_tombstones')
+    op.drop_table('store_sync_versions')
+    op.drop_index('ix_products_store_id_change_version_id', table_name='products')
+    op.drop_column('products', 'change_version')
@@ -0,0 +1,77 @@
+"""add_sales_store_id
+
+Revision ID: 8a3f61c0d2e5
+Revises: 5d0c8e3f71a4
+Create Date: 2026-10-18 15:12:08.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3f61c0d2e5'
+down_revision: Union[str, None] = '5d0c8e3f71a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK = 10000 # Sales rows per UPDATE; each chunk commits on its own on Postgres
+
+
+def _backfill(bind):
+    # Walks id ranges, so every UPDATE touches (and locks) at most BACKFILL_CHUNK rows
+    low, high = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM sales")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BACKFILL_CHUNK):
+        bind.execute(sa.text(
+            "UPDATE sales SET store_id = (SELECT products.store_id FROM products WHERE products.id = sales.product_id) "
+            "WHERE sales.id >= :start AND sales.id < :stop AND sales.store_id IS NULL"
+        ), {"start": start, "stop": start + BACKFILL_CHUNK})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Nullable first: adding it is a catalog-only change, no table rewrite
+    op.add_column('sales', sa.Column('store_id', sa.Integer(), nullable=True))
+
+    if bind.dialect.name != 'postgresql':
+        # SQLite (local development): small tables, a batch rebuild is fine
+        _backfill(bind)
+        with op.batch_alter_table('sales') as batch_op:
+            batch_op.alter_column('store_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key('fk_sales_store_id_stores', 'stores', ['store_id'], ['id'])
+        op.create_index('ix_sales_store_id_timestamp_id', 'sales', ['store_id', 'timestamp', 'id'])
+        op.create_index('ix_sales_store_id_product_id', 'sales', ['store_id', 'product_id'])
+        return
+
+    with op.get_context().autocommit_block():
+        _backfill(bind)
+        # Sales written between the chunks and deploying the new code (stragglers only)
+        bind.execute(sa.text(
+            "UPDATE sales SET store_id = products.store_id FROM products "
+            "WHERE products.id = sales.product_id AND sales.store_id IS NULL"
+        ))
+        # CONCURRENTLY builds without blocking writes; it cannot run inside a transaction
+        op.create_index('ix_sales_store_id_timestamp_id', 'sales', ['store_id', 'timestamp', 'id'], postgresql_concurrently=True)
+        op.create_index('ix_sales_store_id_product_id', 'sales', ['store_id', 'product_id'], postgresql_concurrently=True)
+        # NOT VALID + VALIDATE: the validating scan holds only a SHARE UPDATE EXCLUSIVE lock, so writes continue.
+        # SET NOT NULL then reuses the validated check instead of scanning under an exclusive lock (Postgres 12+).
+        op.execute("ALTER TABLE sales ADD CONSTRAINT fk_sales_store_id_stores FOREIGN KEY (store_id) REFERENCES stores (id) NOT VALID")
+        op.execute("ALTER TABLE sales VALIDATE CONSTRAINT fk_sales_store_id_stores")
+        op.execute("ALTER TABLE sales ADD CONSTRAINT ck_sales_store_id_not_null CHECK (store_id IS NOT NULL) NOT VALID")
+        op.execute("ALTER TABLE sales VALIDATE CONSTRAINT ck_sales_store_id_not_null")
+        op.execute("ALTER TABLE sales ALTER COLUMN store_id SET NOT NULL")
+        op.execute("ALTER TABLE sales DROP CONSTRAINT ck_sales_store_id_not_null")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sales_store_id_product_id', table_name='sales')
+    op.drop_index('ix_sales_store_id_timestamp_id', table_name='sales')
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.drop_constraint('fk_sales_store_id_stores', type_='foreignkey')
+        batch_op.drop_column('store_id')
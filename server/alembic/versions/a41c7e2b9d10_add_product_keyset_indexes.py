@@ -0,0 +1,40 @@
+"""add_product_keyset_indexes
+
+Revision ID: a41c7e2b9d10
+Revises: 96319567af8c
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e2b9d10'
+down_revision: Union[str, None] = '96319567af8c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (store_id, <sort key>, id) indexes serve keyset pages of GET /products without scanning skipped rows
+    op.create_index('ix_products_store_id_id', 'products', ['store_id', 'id'])
+    op.create_index('ix_products_store_id_category_id', 'products', ['store_id', 'category', 'id'])
+    op.create_index('ix_products_store_id_name_id', 'products', ['store_id', 'name', 'id'])
+    op.create_index('ix_products_store_id_date_id', 'products', ['store_id', 'date', 'id'])
+    # Case-insensitive name prefix filter (lower(name) LIKE 'abc%') needs pattern ops on Postgres
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE INDEX ix_products_store_id_lower_name ON products (store_id, lower(name) text_pattern_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_products_store_id_lower_name')
+    op.drop_index('ix_products_store_id_date_id', table_name='products')
+    op.drop_index('ix_products_store_id_name_id', table_name='products')
+    op.drop_index('ix_products_store_id_category_id', table_name='products')
+    op.drop_index('ix_products_store_id_id', table_name='products')
@@ -0,0 +1,36 @@
+"""add_product_demand
+
+Revision ID: b4e9d17c5a26
+Revises: 8a3f61c0d2e5
+Create Date: 2026-10-18 17:41:26.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e9d17c5a26'
+down_revision: Union[str, None] = '8a3f61c0d2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Starts empty: the sale write paths fill it from here on, and `python -m core.demand` backfills the
+    # current window from the daily rollups
+    op.create_table(
+        'product_demand',
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), primary_key=True),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), primary_key=True),
+        sa.Column('window_end', sa.Date(), nullable=False),
+        sa.Column('daily_units', sa.JSON(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_demand')
@@ -0,0 +1,49 @@
+"""add_store_metrics
+
+Revision ID: c7d52f0e8a31
+Revises: a41c7e2b9d10
+Create Date: 2026-10-18 11:02:17.540391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d52f0e8a31'
+down_revision: Union[str, None] = 'a41c7e2b9d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'store_metrics',
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), primary_key=True),
+        sa.Column('product_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('items_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sales_value', sa.Float(), nullable=False, server_default='0'),
+    )
+    # Backfill from the base tables; afterwards the write paths keep it current incrementally
+    op.execute("""
+        INSERT INTO store_metrics (store_id, product_count, items_sold, sales_value)
+        SELECT s.id, COALESCE(p.product_count, 0), COALESCE(x.items_sold, 0), COALESCE(x.sales_value, 0)
+        FROM stores s
+        LEFT JOIN (
+            SELECT store_id, COUNT(*) AS product_count FROM products GROUP BY store_id
+        ) p ON p.store_id = s.id
+        LEFT JOIN (
+            SELECT products.store_id, SUM(sales.quantity) AS items_sold,
+                   SUM(sales.quantity * products.max_sell_price) AS sales_value
+            FROM sales JOIN products ON sales.product_id = products.id
+            GROUP BY products.store_id
+        ) x ON x.store_id = s.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('store_metrics')
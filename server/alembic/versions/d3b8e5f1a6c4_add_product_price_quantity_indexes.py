@@ -0,0 +1,31 @@
+"""add_product_price_quantity_indexes
+
+Revision ID: d3b8e5f1a6c4
+Revises: b4e9d17c5a26
+Create Date: 2026-10-18 19:05:12.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b8e5f1a6c4'
+down_revision: Union[str, None] = 'b4e9d17c5a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pages of GET /products?sort=purchase_price / ?sort=quantity (either direction)
+    op.create_index('ix_products_store_id_purchase_price_id', 'products', ['store_id', 'purchase_price', 'id'])
+    op.create_index('ix_products_store_id_quantity_id', 'products', ['store_id', 'quantity', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_store_id_quantity_id', table_name='products')
+    op.drop_index('ix_products_store_id_purchase_price_id', table_name='products')
@@ -0,0 +1,61 @@
+"""add_sales_daily_rollups
+
+Revision ID: e18b6a9c4f27
+Revises: c7d52f0e8a31
+Create Date: 2026-10-18 12:40:53.207716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e18b6a9c4f27'
+down_revision: Union[str, None] = 'c7d52f0e8a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'sales_daily_totals',
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('units', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Float(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'sales_daily_product_rollups',
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), primary_key=True),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Float(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_sales_daily_product_rollups_product_id', 'sales_daily_product_rollups', ['product_id'])
+
+    # Backfill from existing sales; the sale write paths maintain both tables from here on
+    op.execute("""
+        INSERT INTO sales_daily_totals (store_id, day, units, revenue)
+        SELECT products.store_id, sales.timestamp, SUM(sales.quantity), SUM(sales.quantity * products.max_sell_price)
+        FROM sales JOIN products ON sales.product_id = products.id
+        GROUP BY products.store_id, sales.timestamp
+    """)
+    op.execute("""
+        INSERT INTO sales_daily_product_rollups (store_id, day, product_id, category, units, revenue)
+        SELECT products.store_id, sales.timestamp, sales.product_id, products.category,
+               SUM(sales.quantity), SUM(sales.quantity * products.max_sell_price)
+        FROM sales JOIN products ON sales.product_id = products.id
+        GROUP BY products.store_id, sales.timestamp, sales.product_id, products.category
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sales_daily_product_rollups_product_id', table_name='sales_daily_product_rollups')
+    op.drop_table('sales_daily_product_rollups')
+    op.drop_table('sales_daily_totals')
@@ -0,0 +1,59 @@
+"""add_sqlite_product_fts
+
+Revision ID: e7c1a4b29d53
+Revises: d3b8e5f1a6c4
+Create Date: 2026-10-18 19:48:37.215960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c1a4b29d53'
+down_revision: Union[str, None] = 'd3b8e5f1a6c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _trigram_available(bind) -> bool:
+    version = tuple(int(part) for part in bind.exec_driver_sql("SELECT sqlite_version()").scalar().split("."))
+    return version >= (3, 34) and bool(bind.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite only: FTS5 trigram table behind GET /products/search, the counterpart of ix_products_store_id_name_trgm.
+    # IF NOT EXISTS because earlier builds created it on the first search.
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite' or not _trigram_available(bind):
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, content='products', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); END"
+    )
+    op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')") # Index the existing rows
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS products_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_ai")
+    op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,38 @@
+"""add_product_search_index
+
+Revision ID: f2a7c9d31b58
+Revises: e18b6a9c4f27
+Create Date: 2026-10-18 13:05:12.481903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c9d31b58'
+down_revision: Union[str, None] = 'e18b6a9c4f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return # SQLite gets an FTS5 table instead (add_sqlite_product_fts)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.create_index(
+        'ix_products_store_id_name_trgm', 'products',
+        [sa.text('store_id'), sa.text('lower(name) gin_trgm_ops')],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('ix_products_store_id_name_trgm', table_name='products')
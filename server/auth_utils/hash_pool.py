@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashPool:
+    """Runs bcrypt hash/verify off the event loop in a bounded worker pool.
+
+    A process pool spreads the CPU cost across cores; if it cannot be started (or breaks, e.g. on
+    platforms without fork/shared memory) we fall back to a thread pool. Admission is by expected wait:
+    work that would sit in the queue longer than max_wait_seconds (hashes ahead / workers x the measured
+    hash time) is rejected with 503 instead of queueing indefinitely behind a login burst. max_pending
+    caps the queue regardless, and bounds it before the first hash has been timed.
+    """
+
+    SERVICE_TIME_WEIGHT = 0.2 # Weight of the newest unqueued hash in the hash time estimate
+
+    def __init__(self, mode: str, workers: int, max_wait_seconds: float, max_pending: int):
+        self.mode = mode
+        self.workers = workers
+        self.max_wait_seconds = max_wait_seconds
+        self.max_pending = max_pending
+        self._service_seconds = None # Moving average of hashes that started without queueing
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=1024) # Recent durations in seconds, for percentiles
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        try:
+                            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                        except (OSError, NotImplementedError, ImportError) as e:
+                            logger.warning(f"Process pool unavailable for password hashing ({e}); using threads.")
+                            self.mode = "thread"
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    def _fall_back_to_threads(self, error: Exception):
+        with self._lock:
+            if self.mode == "process":
+                logger.error(f"Password hashing process pool failed ({error}); switching to thread pool.")
+                broken = self._executor
+                self.mode = "thread"
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+                if broken is not None:
+                    broken.shutdown(wait=False, cancel_futures=True)
+
+    def _expected_wait(self) -> float:
+        # Seconds a new hash would queue before a worker picks it up; called with the lock held
+        ahead = self._pending - self.workers + 1
+        if ahead <= 0 or self._service_seconds is None:
+            return 0.0
+        return ahead / self.workers * self._service_seconds
+
+    async def run(self, fn, *args):
+        with self._lock:
+            expected_wait = self._expected_wait()
+            saturated = self._pending >= self.max_pending or expected_wait > self.max_wait_seconds
+            if saturated:
+                self.rejected += 1
+            else:
+                queued = self._pending >= self.workers
+                self._pending += 1
+        if saturated:
+            logger.warning(
+                "Password hashing pool saturated (%s pending, expected wait %.1f s); rejecting request.", self._pending, expected_wait
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry shortly.",
+                headers={"Retry-After": str(max(1, math.ceil(expected_wait - self.max_wait_seconds)))},
+            )
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            try:
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            except (BrokenProcessPool, OSError) as e:
+                if self.mode != "process":
+                    raise
+                self._fall_back_to_threads(e)
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                if not queued: # Started at once, so elapsed is the hash time alone
+                    self._service_seconds = elapsed if self._service_seconds is None else (
+                        self.SERVICE_TIME_WEIGHT * elapsed + (1 - self.SERVICE_TIME_WEIGHT) * self._service_seconds
+                    )
+                self.total_seconds += elapsed
+                self._latencies.append(elapsed)
+
+    async def warm_up(self, fn):
+        # Starts the workers before the first login needs them; fn runs once per worker (e.g. to load bcrypt)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(loop.run_in_executor(self._get_executor(), fn) for _ in range(self.workers)))
+        except (BrokenProcessPool, OSError) as e:
+            if self.mode != "process":
+                raise
+            self._fall_back_to_threads(e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._latencies)
+            pending = self._pending
+            completed = self.completed
+            total_seconds = self.total_seconds
+            service_seconds = self._service_seconds
+            expected_wait = self._expected_wait()
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 2)
+
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "max_wait_seconds": self.max_wait_seconds,
+            "hash_ms_estimate": round(service_seconds * 1000, 2) if service_seconds is not None else None,
+            "expected_wait_ms": round(expected_wait * 1000, 2),
+            "in_flight": min(pending, self.workers),
+            "queue_depth": max(0, pending - self.workers),
+            "completed": completed,
+            "rejected": self.rejected,
+            "latency_ms_avg": round(total_seconds / completed * 1000, 2) if completed else 0.0,
+            "latency_ms_p50": percentile(0.50),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_p99": percentile(0.99),
+        }
+
+
+hash_pool = PasswordHashPool(
+    mode=config.PASSWORD_HASH_POOL,
+    workers=config.PASSWORD_HASH_WORKERS,
+    max_wait_seconds=config.PASSWORD_HASH_MAX_WAIT_SECONDS,
+    max_pending=config.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from core import config
+
+
+@dataclass(frozen=True)
+class Principal:
+    # Detached snapshot of the users row, safe to share across requests (no lazy-loaded relationships)
+    id: int
+    email: Optional[str]
+    phone_number: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    store_name: Optional[str]
+    role: str
+    store_id: int
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            phone_number=user.phone_number,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            store_name=user.store_name,
+            role=user.role,
+            store_id=user.store_id,
+        )
+
+
+class PrincipalCache:
+    """Bounded LRU of authenticated principals keyed by (user_id, token iat), with a TTL per entry.
+
+    The cache is per-process: invalidate_user() only clears this worker, so the TTL bounds how long
+    other workers may keep serving a stale principal after an update or delete.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple[int, int], tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int, issued_at: int) -> Optional[Principal]:
+        key = (user_id, issued_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, issued_at: int, principal: Principal) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (principal.id, issued_at)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        # A user can hold several live tokens (one per login), so drop every iat for that id
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_entries=config.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -1,18 +1,37 @@
 \
-from passlib.context import CryptContext
-from jose import jwt
 from datetime import datetime, timedelta
+from functools import lru_cache
 from core import config # Changed to absolute import
+from auth_utils.hash_pool import hash_pool
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib (with its bcrypt backend) and python-jose are imported on first use rather than at import time:
+# they are a large part of a cold start, and most requests only decode a token (see dependencies/auth_deps.py)
+
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def load_backends():
+    # Imports python-jose and loads the bcrypt backend up front (app warm-up, and each hashing worker)
+    import jose.jwt
+    pwd_context().handler("bcrypt").get_backend()
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+# Async variants for route handlers: bcrypt is CPU-bound, so run it in the hashing pool, not on the event loop
+async def verify_password_async(plain_password, hashed_password):
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await hash_pool.run(get_password_hash, password)
 
 def create_access_token(data: dict):
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "iat": datetime.utcnow()})
@@ -0,0 +1,118 @@
+"""Concurrent-request throughput: sync Session inside async def (old routers) vs AsyncSession (current routers).
+
+Runs in-process against a throwaway SQLite file. Each request issues one query that takes ~SLOW_QUERY_MS
+(emulated with a sleep_ms() SQL function) so the cost of blocking the event loop is visible.
+
+    cd server && python benchmarks/async_db_throughput.py --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000.0)
+    return ms
+
+
+def build_app(db_path: str, pool_size: int) -> FastAPI:
+    sync_engine = create_engine(f"sqlite:///{db_path}", pool_size=pool_size, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", pool_size=pool_size)
+
+    @event.listens_for(sync_engine, "connect")
+    def _register_sync(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _register_async(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+    SyncSessionLocal = sessionmaker(bind=sync_engine)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    def get_db():
+        db = SyncSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    # Shape of the routers before the port: async def handler calling the blocking Session
+    @app.get("/sync")
+    async def sync_handler(ms: int, db: Session = Depends(get_db)):
+        return {"v": db.execute(text("SELECT sleep_ms(:ms)"), {"ms": ms}).scalar()}
+
+    # Shape after the port: the query is awaited and the event loop keeps serving other requests
+    @app.get("/async")
+    async def async_handler(ms: int, db: AsyncSession = Depends(get_async_db)):
+        return {"v": (await db.execute(text("SELECT sleep_ms(:ms)"), {"ms": ms})).scalar()}
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, requests: int, concurrency: int, ms: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, params={"ms": ms})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await client.get(path, params={"ms": 0}) # Warm the pool
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-query-ms", type=int, default=20)
+    parser.add_argument("--pool-size", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        sqlite3.connect(db_path).close()
+        app = build_app(db_path, args.pool_size)
+        for path in ("/sync", "/async"):
+            result = asyncio.run(drive(app, path, args.requests, args.concurrency, args.slow_query_ms))
+            print(
+                f"{result['path']:>7}: {result['throughput_rps']:>8} req/s  "
+                f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  ({result['requests']} requests in {result['elapsed_s']} s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
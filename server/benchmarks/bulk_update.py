@@ -0,0 +1,129 @@
+"""Bulk update benchmark: one PATCH /products/{id} per product against a single PATCH /products/bulk.
+
+Seeds a store with --products products in a temporary SQLite file, then re-prices all of them three ways,
+in-process (httpx ASGITransport):
+
+  per-row   one PATCH /products/{id} each (SELECT, UPDATE, commit and refresh per product)
+  items     PATCH /products/bulk with one {"id", "max_sell_price"} item per product
+  filter    PATCH /products/bulk with filter {"category"} and patch {"purchase_price_factor": 1.05}
+
+After each round it checks that every product's stored net_profit matches its new prices.
+Exits 1 if any check fails.
+
+    cd server && python benchmarks/bulk_update.py --products 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def seed(url: str, products: int, tag: str) -> tuple:
+    from sqlalchemy import create_engine, insert
+
+    import models
+
+    engine = create_engine(url)
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        store_id = conn.execute(insert(models.Store).values(name=f"bulk-{tag}").returning(models.Store.id)).scalar_one()
+        user_id = conn.execute(insert(models.User).values(
+            email=f"bulk-{tag}@example.com", hashed_password="x", role="admin", store_id=store_id
+        ).returning(models.User.id)).scalar_one()
+        conn.execute(insert(models.Product), [
+            dict(name=f"bulk-{tag}-{i}", category=f"bulk-{tag}", purchase_price=10.0, quantity=10, max_sell_price=20.0,
+                 date=date(2025, 1, 1), net_profit=100.0, store_id=store_id)
+            for i in range(products)
+        ])
+    engine.dispose()
+    return store_id, user_id
+
+
+async def run(args) -> int:
+    import httpx
+
+    from auth_utils import security
+
+    tag = uuid.uuid4().hex[:8]
+    store_id, user_id = seed(args.database_url, args.products, tag)
+    token = security.create_access_token({"sub": f"bulk-{tag}@example.com", "role": "admin", "id": user_id})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    import main
+
+    failures = 0
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def products() -> list:
+            items, params = [], {"limit": 500, "category": f"bulk-{tag}"}
+            while True:
+                response = await client.get("/products/", headers=headers, params=params)
+                response.raise_for_status()
+                page = response.json()
+                items.extend(page["items"])
+                if not page["next_cursor"]:
+                    return items
+                params["cursor"] = page["next_cursor"]
+
+        async def consistent() -> bool:
+            return all(
+                abs(p["net_profit"] - (p["max_sell_price"] - p["purchase_price"]) * p["quantity"]) < 1e-6
+                for p in await products()
+            )
+
+        ids = [p["id"] for p in await products()]
+
+        async def per_row() -> list:
+            # One request after another, as a client loops over the products today
+            return [
+                await client.patch(f"/products/{product_id}", headers=headers, json={"max_sell_price": 21.0})
+                for product_id in ids
+            ]
+
+        rounds = {
+            "per-row": per_row,
+            "items": lambda: client.patch("/products/bulk", headers=headers, json={
+                "items": [{"id": product_id, "max_sell_price": 22.0} for product_id in ids]
+            }),
+            "filter": lambda: client.patch("/products/bulk", headers=headers, json={
+                "filter": {"category": f"bulk-{tag}"}, "patch": {"purchase_price_factor": 1.05}
+            }),
+        }
+        baseline = None
+        print(f"{'round':<10}{'total ms':>10}{'speedup':>10}  net_profit")
+        for name, send in rounds.items():
+            started = time.perf_counter()
+            responses = await send()
+            elapsed = time.perf_counter() - started
+            for response in responses if isinstance(responses, list) else [responses]:
+                response.raise_for_status()
+            ok = await consistent()
+            failures += 0 if ok else 1
+            baseline = baseline or elapsed
+            print(f"{name:<10}{elapsed * 1000:>10.1f}{baseline / elapsed:>9.1f}x  {'ok' if ok else 'MISMATCH'}")
+
+    print(f"{failures} round(s) left net_profit stale" if failures else f"{len(ids)} products re-priced in every round")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000, help="At most 1000, the bulk items limit")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.database_url = f"sqlite:///{os.path.join(tmp, 'bulk.db')}"
+        os.environ.update(DATABASE_URL=args.database_url, LOG_LEVEL="WARNING")
+        os.environ.pop("ASYNC_DATABASE_URL", None) # Derived from DATABASE_URL
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Concurrent checkout load test: throughput of POST /sales/checkout and a no-oversell invariant check.
+
+Many tills check out random carts against a few low-stock products at once. Afterwards, for every product,
+initial stock must equal remaining stock plus units sold, and remaining stock must never be negative.
+
+Runs the app in-process. By default it uses a throwaway SQLite file; pass --database-url with an async URL
+(e.g. postgresql+asyncpg://...) to run against a scratch Postgres database. Tables are created if missing.
+
+    cd server && python benchmarks/checkout_concurrency.py --carts 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+async def run(args) -> int:
+    import httpx
+    from sqlalchemy import func, select
+
+    import database
+    import main
+    import models
+
+    async with database.async_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        tag = uuid.uuid4().hex[:8]
+        email = f"bench-{tag}@example.com"
+        response = await client.post("/auth/register_admin", json={
+            "email": email, "password": "benchmark-pw", "first_name": "Bench", "last_name": "Admin",
+            "store_name": f"bench-store-{tag}",
+        })
+        response.raise_for_status()
+        store_id = response.json()["store_id"]
+        token = (await client.post("/auth/login_admin", json={"email": email, "password": "benchmark-pw"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        initial = {}
+        for i in range(args.products):
+            response = await client.post("/products/", headers=headers, json={
+                "name": f"bench-{i}", "category": "Bench", "purchase_price": 1.0, "quantity": args.stock,
+                "max_sell_price": 2.0, "date": date.today().isoformat(), "store_id": store_id,
+            })
+            response.raise_for_status()
+            initial[response.json()["id"]] = args.stock
+
+        rng = random.Random(args.seed)
+        product_ids = list(initial)
+        carts = [
+            {
+                "items": [
+                    {"product_id": rng.choice(product_ids), "quantity": rng.randint(1, 3)}
+                    for _ in range(rng.randint(1, args.max_lines))
+                ],
+                "timestamp": date.today().isoformat(),
+                "allow_partial": rng.random() < 0.5,
+            }
+            for _ in range(args.carts)
+        ]
+
+        statuses = Counter()
+        latencies = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(cart):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/sales/checkout", headers=headers, json=cart)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(cart) for cart in carts))
+        elapsed = time.perf_counter() - started
+
+    async with database.AsyncSessionLocal() as db:
+        remaining = dict((await db.execute(
+            select(models.Product.id, models.Product.quantity).where(models.Product.id.in_(product_ids))
+        )).all())
+        sold = dict((await db.execute(
+            select(models.Sale.product_id, func.sum(models.Sale.quantity))
+            .where(models.Sale.product_id.in_(product_ids))
+            .group_by(models.Sale.product_id)
+        )).all())
+
+    latencies.sort()
+    print(f"carts: {args.carts}  concurrency: {args.concurrency}  elapsed: {elapsed:.2f} s  "
+          f"throughput: {args.carts / elapsed:.1f} carts/s")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"status codes: {dict(sorted(statuses.items()))}")
+
+    violations = []
+    for product_id, stock in initial.items():
+        left, units = remaining[product_id], sold.get(product_id, 0) or 0
+        if left < 0 or left + units != stock:
+            violations.append((product_id, stock, left, units))
+    if violations:
+        for product_id, stock, left, units in violations:
+            print(f"OVERSOLD product {product_id}: initial {stock}, remaining {left}, sold {units}")
+        return 1
+    print(f"stock invariant held for {len(initial)} products ({sum(sold.values())} units sold)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Async SQLAlchemy URL; defaults to a temporary SQLite file")
+    parser.add_argument("--products", type=int, default=10)
+    parser.add_argument("--stock", type=int, default=25)
+    parser.add_argument("--carts", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--max-lines", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ASYNC_DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Cold-start benchmark: import time and time to the first successful response of a fresh process.
+
+Every run starts a new interpreter (a cold serverless instance), imports main and sends one authenticated
+GET /products/ through httpx ASGITransport against a throwaway SQLite file. Three setups:
+
+  eager     APP_LAZY_ROUTERS=false: every router is imported and mounted with the app
+  lazy      the default: only routers/products.py is imported, by the first request under /products
+  warm      APP_WARMUP=true: the lifespan warm-up runs first (all routers, auth libraries, pooled connections),
+            as on a long-lived server; its time counts towards the first response
+
+Reported per setup (median over --runs): interpreter start (including the benchmark's own httpx import),
+the import of main, the lifespan warm-up, the first request, and process start to the first 200 response.
+The second request shows the steady state.
+
+    cd server && python benchmarks/cold_start.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = {
+    "eager": {"APP_LAZY_ROUTERS": "false", "APP_WARMUP": "false"},
+    "lazy": {"APP_LAZY_ROUTERS": "true", "APP_WARMUP": "false"},
+    "warm": {"APP_LAZY_ROUTERS": "true", "APP_WARMUP": "true"},
+}
+
+
+def child() -> int:
+    # Runs in the fresh interpreter; prints one JSON line of timings (ms)
+    spawned_at = float(os.environ["COLD_START_SPAWNED_AT"])
+    import asyncio
+    import httpx # The client is not part of the app's cold start
+
+    sys.path.insert(0, SERVER_DIR)
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    async def first_requests():
+        headers = {"Authorization": f"Bearer {os.environ['COLD_START_TOKEN']}"}
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.app.router.lifespan_context(main.app): # What uvicorn runs before serving
+            warmed = time.perf_counter()
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.get("/products/", headers=headers)
+                response.raise_for_status()
+                first = time.perf_counter()
+                (await client.get("/products/", headers=headers)).raise_for_status()
+                return warmed, first, time.perf_counter()
+
+    warmed, first, second = asyncio.run(first_requests())
+    print(json.dumps({
+        "startup": (time.time() - spawned_at) * 1000 - (second - started) * 1000,
+        "import": (imported - started) * 1000,
+        "warm_up": (warmed - imported) * 1000,
+        "first": (first - warmed) * 1000,
+        "total": (time.time() - spawned_at) * 1000 - (second - first) * 1000,
+        "second": (second - first) * 1000,
+    }))
+    return 0
+
+
+def seed(database_url: str) -> str:
+    # Schema, one store and one admin; returns a token for that admin
+    from sqlalchemy import create_engine, insert
+
+    import models
+    from auth_utils import security
+
+    engine = create_engine(database_url)
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Store), [{"id": 1, "name": "cold-start"}])
+        conn.execute(insert(models.User), [
+            {"id": 1, "email": "cold-start@example.com", "hashed_password": "x", "role": "admin", "store_id": 1},
+        ])
+        conn.execute(insert(models.Product), [
+            {"name": f"product-{i}", "category": "Food", "purchase_price": 1.0, "quantity": 5, "max_sell_price": 2.0,
+             "date": date(2025, 1, 1), "net_profit": 5.0, "store_id": 1}
+            for i in range(50)
+        ])
+    engine.dispose()
+    return security.create_access_token({"sub": "cold-start@example.com", "role": "admin", "id": 1})
+
+
+def run(args) -> int:
+    token = seed(os.environ["DATABASE_URL"])
+    columns = ("startup", "import", "warm_up", "first", "total", "second")
+    print(f"{'mode':<7}" + "".join(f"{name + ' ms':>12}" for name in columns))
+    for mode, settings in MODES.items():
+        samples = []
+        for _ in range(args.runs):
+            env = dict(os.environ, **settings, COLD_START_TOKEN=token, COLD_START_SPAWNED_AT=repr(time.time()))
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"], env=env, check=True,
+                stdout=subprocess.PIPE, text=True,
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"{mode:<7}" + "".join(f"{statistics.median(s[name] for s in samples):>12.1f}" for name in columns))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per setup")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        sys.exit(child())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cold_start.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        os.environ["LOG_LEVEL"] = "WARNING" # Keeps the children's stdout to the timing line
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Demand forecast benchmark: core/demand.forecast over a whole store against a per-product Python loop.
+
+Generates daily unit histories (products x DEMAND_WINDOW_DAYS, Poisson around a random rate with a random
+trend) and stock levels, then times the vectorized forecast and a straightforward loop that smooths one
+product at a time, checks both give the same demand and days-until-stockout, and prints the timings.
+A third of the products sell only on some days, so both the Holt and the Croston paths are compared. It
+also checks that sparse histories (a single sale, scattered sales, a weekly sale) forecast close to their
+observed velocity. Exits 1 if either check fails. No database involved.
+
+    cd server && python benchmarks/demand_forecast.py --products 20000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def forecast_loop(history: list, stock: list, cover_days: int, alpha: float, beta: float, phi: float, adi: float) -> tuple:
+    # The same methods, one product at a time, in plain Python
+    demand, days_until_stockout = [], []
+    for units, on_hand in zip(history, stock):
+        level, trend = units[0], 0.0
+        size = interval = 0.0
+        since, seen = 1, False
+        for t, value in enumerate(units):
+            if t:
+                previous = level
+                level = alpha * value + (1 - alpha) * (level + phi * trend)
+                trend = beta * (level - previous) + (1 - beta) * phi * trend
+            if value > 0:
+                if seen:
+                    size += alpha * (value - size)
+                    interval += alpha * (since - interval)
+                else:
+                    size, interval, seen = value, t + 1.0, True
+                since = 1
+            else:
+                since += 1
+        intermittent = sum(1 for value in units if value > 0) * adi < len(units)
+        croston = size / interval * (1 - alpha / 2) if interval else 0.0
+        total, stockout, rate, damping = 0.0, math.inf, 0.0, 0.0
+        for h in range(1, cover_days + 1):
+            damping += phi ** h
+            rate = croston if intermittent else max(level + trend * damping, 0.0)
+            total += rate
+            if stockout == math.inf and total >= on_hand:
+                stockout = h
+        if stockout == math.inf and rate > 0:
+            stockout = cover_days + math.ceil((on_hand - total) / rate)
+        demand.append(total)
+        days_until_stockout.append(0 if on_hand <= 0 else stockout)
+    return demand, days_until_stockout
+
+
+def check_sparse(np, demand, window: int, alpha: float, beta: float, phi: float) -> bool:
+    # A product with a single sale, or a few scattered ones, must forecast close to its observed velocity
+    history = np.zeros((3, window))
+    history[0, -1] = 3 # One 3-unit sale yesterday
+    history[1, [5, 30, 50]] = [4, 2, 5]
+    history[2, ::7] = 6 # Weekly
+    result = demand.forecast(history, np.full(3, 100.0), 21, alpha, beta, phi)
+    daily = result["demand"] / 21
+    ok = bool(np.all(np.abs(daily - result["velocity"]) <= np.maximum(result["velocity"] * 0.5, 0.05)))
+    print("sparse histories: velocity " + ", ".join(f"{v:.3f}" for v in result["velocity"])
+          + " / forecast per day " + ", ".join(f"{d:.3f}" for d in daily) + ("" if ok else "  FAIL"))
+    return ok
+
+
+def run(args) -> int:
+    import numpy as np
+
+    from core import config, demand
+
+    rng = np.random.default_rng(args.seed)
+    window = config.DEMAND_WINDOW_DAYS
+    rates = rng.gamma(1.5, 3.0, size=(args.products, 1))
+    trends = rng.normal(0, 0.05, size=(args.products, 1))
+    history = rng.poisson(np.maximum(rates + trends * np.arange(window), 0)).astype(float)
+    history[: args.products // 3] *= rng.random((args.products // 3, window)) < 0.15 # A third sell now and then
+    stock = rng.integers(0, 400, size=args.products).astype(float)
+    alpha, beta, phi = config.DEMAND_SMOOTHING_ALPHA, config.DEMAND_TREND_BETA, config.DEMAND_TREND_DAMPING
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        result = demand.forecast(history, stock, args.cover_days, alpha, beta, phi)
+    vectorized = (time.perf_counter() - started) / args.repeat
+
+    rows, levels = history.tolist(), stock.tolist()
+    started = time.perf_counter()
+    expected_demand, expected_stockout = forecast_loop(rows, levels, args.cover_days, alpha, beta, phi, demand.INTERMITTENT_ADI)
+    loop = time.perf_counter() - started
+
+    same = (
+        np.allclose(result["demand"], expected_demand)
+        and np.array_equal(result["days_until_stockout"], np.array(expected_stockout, dtype=float))
+    )
+    print(f"{args.products} products x {window} days, cover {args.cover_days} days")
+    print(f"{'vectorized':<12}{vectorized * 1000:>10.2f} ms")
+    print(f"{'loop':<12}{loop * 1000:>10.2f} ms   ({loop / vectorized:.0f}x)")
+    print("results match" if same else "RESULTS DIFFER")
+    sparse_ok = check_sparse(np, demand, window, alpha, beta, phi)
+    return 0 if same and sparse_ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--cover-days", type=int, default=21, help="Lead time + horizon (default: 7 + 14)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs of the vectorized forecast")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, SERVER_DIR)
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Streaming export benchmark: GET /products/export over a multi-million-row store.
+
+Seeds a throwaway SQLite database with --rows products (bulk sqlite3 inserts, outside the API), then
+consumes the export stream in-process. It reports rows/s, MB/s and peak RSS growth, which should stay
+flat as --rows grows.
+
+    cd server && python benchmarks/export_stream.py --rows 2000000 --format csv
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def seed_products(db_path: str, store_id: int, rows: int):
+    conn = sqlite3.connect(db_path)
+    batch = 50_000
+    for offset in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO products (name, category, purchase_price, quantity, max_sell_price, date, net_profit, store_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"product-{i}", ("Food", "Books", "Other")[i % 3], 1.0 + i % 50, i % 100, 5.0 + i % 50,
+                 f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", 4.0 * (i % 100), store_id)
+                for i in range(offset, min(offset + batch, rows))
+            ),
+        )
+        conn.commit()
+    conn.close()
+
+
+async def consume_stream(app, path: str, query: str, token: str) -> tuple[int, int, int]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    state = {"status": None, "bytes": 0, "lines": 0}
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            state["bytes"] += len(body)
+            state["lines"] += body.count(b"\n")
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return state["status"], state["bytes"], state["lines"]
+
+
+async def run(args, db_path: str):
+    import httpx
+
+    import database
+    import main
+    import models
+
+    async with database.async_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        response = await client.post("/auth/register_admin", json={
+            "email": "export-bench@example.com", "password": "benchmark-pw", "first_name": "Bench",
+            "last_name": "Admin", "store_name": "export-bench",
+        })
+        response.raise_for_status()
+        store_id = response.json()["store_id"]
+        token = (await client.post("/auth/login_admin", json={
+            "email": "export-bench@example.com", "password": "benchmark-pw",
+        })).json()["access_token"]
+
+        started = time.perf_counter()
+        seed_products(db_path, store_id, args.rows)
+        print(f"seeded {args.rows} products in {time.perf_counter() - started:.1f} s")
+
+        # Drive the ASGI app directly: httpx's ASGITransport buffers the whole body, which would hide streaming
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        status_code, total_bytes, lines = await consume_stream(
+            main.app, "/products/export", f"format={args.format}", token
+        )
+        elapsed = time.perf_counter() - started
+        if status_code != 200:
+            raise RuntimeError(f"export returned HTTP {status_code}")
+
+    exported = lines - (1 if args.format == "csv" else 0)
+    print(f"exported {exported} rows, {total_bytes / 1e6:.1f} MB in {elapsed:.2f} s "
+          f"({exported / elapsed:,.0f} rows/s, {total_bytes / 1e6 / elapsed:.1f} MB/s)")
+    print(f"peak RSS {peak_rss_mb():.0f} MB (+{peak_rss_mb() - rss_before:.0f} MB during the export)")
+    return 0 if exported == args.rows else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "export.db")
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(asyncio.run(run(args, db_path)))
+
+
+if __name__ == "__main__":
+    main()
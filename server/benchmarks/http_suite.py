@@ -0,0 +1,248 @@
+"""HTTP benchmark suite for the API's hot paths, so changes can be compared run to run.
+
+Runs the FastAPI app in-process (httpx ASGITransport) against a throwaway SQLite file, or against a scratch
+database given with --database-url (e.g. postgresql+asyncpg://localhost/bench; tables are created if
+missing). Each scenario drives a real endpoint:
+
+  admin_login       POST /auth/login_admin
+  employee_login    POST /auth/login_employee
+  product_list      GET  /products/?limit=50
+  product_detail    GET  /products/{id}
+  sale_create       POST /sales/
+  dashboard         GET  /dashboard/metrics
+
+For every scenario it reports p50/p95/p99 latency, throughput, SQL statements per request (counted with a
+before_cursor_execute hook on the app's engine) and any non-2xx responses. Results are written as JSON;
+pass --compare with an earlier file to print the change per scenario.
+
+The login scenarios go through the password hashing pool (auth_utils/hash_pool.py), which answers 503 once a
+hash would queue longer than PASSWORD_HASH_MAX_WAIT_SECONDS. The queue wait is about concurrency / workers x
+the bcrypt time (roughly 0.4 s per hash on one vCPU), so --concurrency 20 on one core waits about 8 s and stays
+under the 10 s default; raise PASSWORD_HASH_MAX_WAIT_SECONDS or PASSWORD_HASH_WORKERS for heavier runs, or
+count the 503s as the overload behaviour being measured.
+
+    cd server && python benchmarks/http_suite.py --requests 300 --concurrency 20 --output bench.json
+    cd server && python benchmarks/http_suite.py --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timezone
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = ("admin_login", "employee_login", "product_list", "product_detail", "sale_create", "dashboard")
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class StatementCounter:
+    # Counts SQL statements sent by the app's async engine while a scenario runs
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def seed(client, database, models, args) -> dict:
+    from sqlalchemy import update
+
+    tag = uuid.uuid4().hex[:8]
+    admin_email, password = f"bench-{tag}@example.com", "benchmark-pw"
+    response = await client.post("/auth/register_admin", json={
+        "email": admin_email, "password": password, "first_name": "Bench", "last_name": "Admin",
+        "store_name": f"bench-store-{tag}",
+    })
+    response.raise_for_status()
+    store_id = response.json()["store_id"]
+    admin_token = (await client.post("/auth/login_admin", json={"email": admin_email, "password": password})).json()["access_token"]
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = await client.post("/auth/add_employee", headers=admin_headers, json={
+        "first_name": "Bench", "last_name": "Employee", "password": password,
+    })
+    response.raise_for_status()
+    # add_employee does not take an email, but /auth/login_employee looks employees up by it
+    employee_email = f"bench-employee-{tag}@example.com"
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(update(models.User).where(models.User.id == response.json()["id"]).values(email=employee_email))
+        await db.commit()
+    employee_token = (await client.post("/auth/login_employee", data={
+        "username": employee_email, "password": password,
+    })).json()["access_token"]
+
+    product_ids = []
+    for i in range(args.products):
+        response = await client.post("/products/", headers=admin_headers, json={
+            "name": f"bench-{i}", "category": ("Food", "Books", "Other")[i % 3], "purchase_price": 1.0 + i % 20,
+            "quantity": 1_000_000, "max_sell_price": 5.0 + i % 20, "date": date.today().isoformat(), "store_id": store_id,
+        })
+        response.raise_for_status()
+        product_ids.append(response.json()["id"])
+
+    return {
+        "admin_email": admin_email, "employee_email": employee_email, "password": password,
+        "admin_headers": admin_headers, "employee_headers": {"Authorization": f"Bearer {employee_token}"},
+        "product_ids": product_ids,
+    }
+
+
+def build_requests(scenario: str, ctx: dict, rng: random.Random):
+    # Returns a factory so every request in a scenario gets fresh random parameters
+    if scenario == "admin_login":
+        return lambda: ("POST", "/auth/login_admin", {"json": {"email": ctx["admin_email"], "password": ctx["password"]}})
+    if scenario == "employee_login":
+        return lambda: ("POST", "/auth/login_employee", {"data": {"username": ctx["employee_email"], "password": ctx["password"]}})
+    if scenario == "product_list":
+        return lambda: ("GET", "/products/", {"params": {"limit": 50}, "headers": ctx["admin_headers"]})
+    if scenario == "product_detail":
+        return lambda: ("GET", f"/products/{rng.choice(ctx['product_ids'])}", {"headers": ctx["admin_headers"]})
+    if scenario == "sale_create":
+        return lambda: ("POST", "/sales/", {"headers": ctx["employee_headers"], "json": {
+            "product_id": rng.choice(ctx["product_ids"]), "quantity": rng.randint(1, 3), "timestamp": date.today().isoformat(),
+        }})
+    if scenario == "dashboard":
+        return lambda: ("GET", "/dashboard/metrics", {"headers": ctx["admin_headers"]})
+    raise ValueError(f"Unknown scenario {scenario!r}")
+
+
+async def run_scenario(client, counter: StatementCounter, make_request, args) -> dict:
+    for _ in range(args.warmup):
+        method, url, kwargs = make_request()
+        await client.request(method, url, **kwargs)
+
+    statuses = Counter()
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        method, url, kwargs = make_request()
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    statements_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    statements = counter.count - statements_before
+
+    latencies.sort()
+    return {
+        "requests": args.requests,
+        "errors": sum(n for code, n in statuses.items() if code >= 300),
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "latency_ms_p50": round(percentile(latencies, 0.50) * 1000, 2),
+        "latency_ms_p95": round(percentile(latencies, 0.95) * 1000, 2),
+        "latency_ms_p99": round(percentile(latencies, 0.99) * 1000, 2),
+        "sql_statements_per_request": round(statements / args.requests, 2),
+    }
+
+
+def print_results(results: dict, previous: dict = None):
+    print(f"{'scenario':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'sql/req':>9}{'errors':>8}")
+    for name, r in results["scenarios"].items():
+        line = (f"{name:<16}{r['latency_ms_p50']:>9.2f}{r['latency_ms_p95']:>9.2f}{r['latency_ms_p99']:>9.2f}"
+                f"{r['throughput_rps']:>9.1f}{r['sql_statements_per_request']:>9.2f}{r['errors']:>8}")
+        before = (previous or {}).get("scenarios", {}).get(name)
+        if before:
+            p50_change = (r["latency_ms_p50"] / before["latency_ms_p50"] - 1) * 100 if before["latency_ms_p50"] else 0.0
+            rps_change = (r["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+            line += (f"   vs {previous['meta']['git_revision']}: p50 {p50_change:+.0f}%  req/s {rps_change:+.0f}%  "
+                     f"sql/req {r['sql_statements_per_request'] - before['sql_statements_per_request']:+.2f}")
+        print(line)
+
+
+async def run(args) -> int:
+    import httpx
+
+    import database
+    import main
+    import models
+
+    async with database.async_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    counter = StatementCounter(database.async_engine)
+    rng = random.Random(args.seed)
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "database": database.async_engine.dialect.name,
+            "requests": args.requests, "concurrency": args.concurrency, "warmup": args.warmup,
+            "products": args.products, "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+
+    # An unhandled exception becomes a 500 in the results rather than aborting the run
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        ctx = await seed(client, database, models, args)
+        for scenario in args.scenarios:
+            results["scenarios"][scenario] = await run_scenario(client, counter, build_requests(scenario, ctx, rng), args)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_results(results, previous)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+    return 1 if any(r["errors"] for r in results["scenarios"].values()) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Async SQLAlchemy URL; defaults to a temporary SQLite file")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="An earlier --output file to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ASYNC_DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
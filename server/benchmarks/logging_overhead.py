@@ -0,0 +1,127 @@
+"""Logging overhead benchmark: what each request pays for its log lines on the event loop.
+
+Compares four setups against the same app, in-process (httpx ASGITransport) on a throwaway SQLite file:
+
+  off       root logger at WARNING, the INFO lines are skipped (baseline)
+  sync      the old logging.basicConfig(level=INFO) setup: format and write on the calling thread
+  queue     core/structured_logging.py: JSON lines, formatted and written by the writer thread
+  sampled   queue, plus LOG_SAMPLE_RATES keeping 1 in 10 INFO lines from the routers
+
+Log output goes to a file in the temp directory (a write per record, like a pipe to a log collector).
+It reports the cost of a bare logger.info call and the mean/p95 latency of GET /sales/{id}, which logs
+two INFO lines per request, plus the per-request overhead over "off".
+
+    cd server && python benchmarks/logging_overhead.py --requests 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = ("off", "sync", "queue", "sampled")
+
+
+def use_mode(mode: str, sink_path: str):
+    from core import config
+    from core.structured_logging import configure_logging, shutdown_logging
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    sink = open(sink_path, "a")
+    if mode in ("off", "sync"):
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.WARNING if mode == "off" else logging.INFO)
+    else:
+        config.LOG_SAMPLE_RATES = "routers=0.1" if mode == "sampled" else ""
+        configure_logging(level="INFO", stream=sink)
+
+
+def time_calls(calls: int) -> float:
+    # Microseconds per logger.info call with two arguments, as seen by the caller
+    logger = logging.getLogger("routers.sales")
+    started = time.perf_counter()
+    for i in range(calls):
+        logger.info("User %s attempting to fetch sale %s from store %s", i, i * 7, 3)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def run(args) -> int:
+    import httpx
+
+    import database
+    import main
+    import models
+
+    logging.getLogger("httpx").setLevel(logging.WARNING) # The client's own request lines are not the app's
+
+    async with database.async_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    sink_path = os.path.join(os.path.dirname(database.ASYNC_DATABASE_URL.split("///", 1)[1]), "app.log")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        tag = uuid.uuid4().hex[:8]
+        email = f"log-bench-{tag}@example.com"
+        response = await client.post("/auth/register_admin", json={
+            "email": email, "password": "benchmark-pw", "first_name": "Bench", "last_name": "Admin",
+            "store_name": f"log-bench-{tag}",
+        })
+        response.raise_for_status()
+        store_id = response.json()["store_id"]
+        token = (await client.post("/auth/login_admin", json={"email": email, "password": "benchmark-pw"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        product = (await client.post("/products/", headers=headers, json={
+            "name": "log-bench", "category": "Food", "purchase_price": 1.0, "quantity": 10, "max_sell_price": 2.0,
+            "date": "2025-01-01", "store_id": store_id,
+        })).json()
+        sale = (await client.post("/sales/", headers=headers, json={
+            "product_id": product["id"], "quantity": 1, "timestamp": "2025-01-02",
+        })).json()
+        path = f"/sales/{sale['id']}"
+
+        print(f"{'mode':<9}{'call us':>9}{'mean ms':>9}{'p95 ms':>9}{'overhead us/req':>17}")
+        baseline = None
+        for mode in MODES:
+            use_mode(mode, sink_path)
+            call_us = time_calls(args.calls)
+            for _ in range(50): # Warm-up
+                await client.get(path, headers=headers)
+            timings = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                timings.append(time.perf_counter() - started)
+                response.raise_for_status()
+            mean = statistics.fmean(timings)
+            p95 = sorted(timings)[int(len(timings) * 0.95)]
+            baseline = mean if baseline is None else baseline
+            print(f"{mode:<9}{call_us:>9.2f}{mean * 1000:>9.3f}{p95 * 1000:>9.3f}{(mean - baseline) * 1e6:>17.1f}")
+    use_mode("off", sink_path)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=20000, help="Bare logger.info calls timed per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp, 'logging.db')}"
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
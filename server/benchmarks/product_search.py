@@ -0,0 +1,100 @@
+"""Product search benchmark: GET /products/search latency over a large store.
+
+Seeds --rows products with two-word names (plus a serial) into one store, then times a mix of prefix,
+substring, misspelled and short queries through the app. Runs on a throwaway SQLite file by default
+(FTS5 trigram table); pass --database-url with an async Postgres URL to measure the pg_trgm index
+(apply the migrations first so ix_products_store_id_name_trgm exists).
+
+    cd server && python benchmarks/product_search.py --rows 300000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+WORDS = ["chocolate", "milk", "coffee", "banana", "notebook", "pencil", "apple", "bread", "cheese", "juice",
+         "tea", "rice", "pasta", "soap", "towel"]
+QUERIES = ["chocolate", "milk 12", "pencil", "choc", "chocolte milk", "coffe", "notebok 42", "ap"]
+
+
+async def run(args) -> int:
+    import httpx
+    from sqlalchemy import insert
+
+    import database
+    import main
+    import models
+
+    async with database.async_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        tag = uuid.uuid4().hex[:8]
+        email = f"search-bench-{tag}@example.com"
+        response = await client.post("/auth/register_admin", json={
+            "email": email, "password": "benchmark-pw", "first_name": "Bench", "last_name": "Admin",
+            "store_name": f"search-bench-{tag}",
+        })
+        response.raise_for_status()
+        store_id = response.json()["store_id"]
+        token = (await client.post("/auth/login_admin", json={"email": email, "password": "benchmark-pw"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        started = time.perf_counter()
+        rng = random.Random(args.seed)
+        batch = 10_000
+        async with database.async_engine.begin() as conn:
+            for offset in range(0, args.rows, batch):
+                await conn.execute(insert(models.Product), [
+                    {"name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", "category": ("Food", "Books", "Other")[i % 3],
+                     "purchase_price": 1.0, "quantity": 5, "max_sell_price": 2.0, "date": date(2025, 1, 1),
+                     "net_profit": 5.0, "store_id": store_id}
+                    for i in range(offset, min(offset + batch, args.rows))
+                ])
+        print(f"seeded {args.rows} products in {time.perf_counter() - started:.1f} s")
+
+        # The first request may build the SQLite FTS table; keep it out of the timings
+        started = time.perf_counter()
+        (await client.get("/products/search", params={"q": "warmup"}, headers=headers)).raise_for_status()
+        print(f"first search (index setup) {time.perf_counter() - started:.2f} s")
+
+        print(f"{'query':<16}{'p50 ms':>9}{'max ms':>9}{'hits':>6}  top facet")
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = await client.get("/products/search", params={"q": query}, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+            body = response.json()
+            top = body["facets"][0] if body["facets"] else None
+            print(f"{query:<16}{statistics.median(timings):>9.1f}{max(timings):>9.1f}{len(body['items']):>6}  "
+                  f"{top['category'] + ' ' + str(top['count']) if top else '-'}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Async SQLAlchemy URL; defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ASYNC_DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'search.db')}"
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Product serialization micro-benchmark: the old response path vs the pydantic-core fast path.
+
+Builds --rows unsaved models.Product instances and times three ways of turning a page of them into JSON:
+
+  legacy    field-by-field ProductOut(...) per row, then FastAPI's response_model pass (validate the
+            objects again, dump to Python dicts, json.dumps) - what the product endpoints used to do
+  fast      one ProductPage.model_validate(..., from_attributes=True) and model_dump_json()
+  orjson    the fast path's dicts through orjson, for reference only (skipped when orjson is missing)
+
+    cd server && python benchmarks/product_serialization.py --rows 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def build_products(rows: int) -> list:
+    import models
+    return [
+        models.Product(
+            id=i, name=f"product-{i}", category=("Food", "Books", "Other")[i % 3], purchase_price=1.0 + i % 50,
+            quantity=i % 100, max_sell_price=5.0 + i % 50, date=date(2025, i % 12 + 1, i % 28 + 1),
+            net_profit=4.0 * (i % 100), store_id=1,
+        )
+        for i in range(rows)
+    ]
+
+
+def legacy(products: list) -> bytes:
+    import schemas
+    items = [
+        schemas.ProductOut(
+            id=p.id, name=p.name, category=p.category, purchase_price=p.purchase_price, quantity=p.quantity,
+            max_sell_price=p.max_sell_price, date=p.date, store_id=p.store_id, net_profit=p.net_profit,
+        )
+        for p in products
+    ]
+    # FastAPI's serialize_response: re-validate against response_model, dump to dicts, then encode
+    page = schemas.ProductPage.model_validate({"items": items, "next_cursor": None}, from_attributes=True)
+    return json.dumps(page.model_dump(mode="json")).encode()
+
+
+def fast(products: list) -> bytes:
+    import schemas
+    return schemas.ProductPage.model_validate({"items": products, "next_cursor": None}, from_attributes=True).model_dump_json().encode()
+
+
+def orjson_reference(products: list) -> bytes:
+    import orjson
+    import schemas
+    page = schemas.ProductPage.model_validate({"items": products, "next_cursor": None}, from_attributes=True)
+    return orjson.dumps(page.model_dump(mode="python"))
+
+
+def time_it(fn, products: list, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(products)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    # Nothing touches the database, but importing models builds the engines
+    os.environ.setdefault("ASYNC_DATABASE_URL", "sqlite+aiosqlite://")
+    sys.path.insert(0, SERVER_DIR)
+    products = build_products(args.rows)
+    if json.loads(legacy(products[:50])) != json.loads(fast(products[:50])):
+        raise SystemExit("legacy and fast paths produce different JSON")
+
+    candidates = [("legacy", legacy), ("fast", fast)]
+    try:
+        import orjson # noqa: F401
+        candidates.append(("orjson", orjson_reference))
+    except ImportError:
+        print("orjson not installed; skipping the orjson reference")
+
+    baseline = None
+    for name, fn in candidates:
+        elapsed, size = time_it(fn, products, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<8} {elapsed * 1000:8.1f} ms  {args.rows / elapsed:12,.0f} rows/s  "
+              f"{size / 1e6:6.2f} MB  x{baseline / elapsed:.1f} vs legacy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Query plan check: tenant-scoped queries must be served by their (store_id, ...) composite indexes.
+
+Builds the schema on a throwaway SQLite file (or the database given by --database-url, a sync SQLAlchemy
+URL; apply the migrations first, or pass --seed), seeds a few stores, then EXPLAINs the store-filtered
+statements the routers issue and checks that each plan uses the expected index without a separate sort
+step. Exits 1 if any plan does not; CI runs it on SQLite and on Postgres (.github/workflows/query-plans.yml).
+On Postgres, sequential scans are disabled for the check, so a small database answers "can this index
+serve the query" reliably. Everything runs in one transaction that is rolled back, --seed included.
+
+    cd server && python benchmarks/query_plans.py
+    cd server && python benchmarks/query_plans.py --database-url postgresql+psycopg2://localhost/plans --seed
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def checks(models, store_id: int):
+    # (name, statement, acceptable indexes, ordered): mirrors the queries in routers/ and core/
+    from sqlalchemy import select, func
+
+    Product, Sale, Rollup = models.Product, models.Sale, models.SalesDailyProductRollup
+    return [
+        ("GET /sales/",
+         select(Sale).where(Sale.store_id == store_id).limit(100),
+         ("ix_sales_store_id_timestamp_id", "ix_sales_store_id_product_id"), False),
+        ("GET /sales/export",
+         select(Sale.id, Sale.product_id, Sale.quantity, Sale.timestamp)
+         .where(Sale.store_id == store_id, Sale.timestamp >= date(2025, 3, 1), Sale.timestamp <= date(2025, 6, 30))
+         .order_by(Sale.timestamp, Sale.id),
+         ("ix_sales_store_id_timestamp_id",), True),
+        ("units sold on a price change",
+         select(func.sum(Sale.quantity)).where(Sale.store_id == store_id, Sale.product_id == 7),
+         ("ix_sales_store_id_product_id",), False),
+        ("GET /products/?category=",
+         select(Product).where(Product.store_id == store_id, Product.category == "Books").order_by(Product.id).limit(101),
+         ("ix_products_store_id_category_id",), True),
+        ("GET /products/?sort=date",
+         select(Product).where(Product.store_id == store_id).order_by(Product.date, Product.id).limit(101),
+         ("ix_products_store_id_date_id",), True),
+        ("GET /products/?sort=name",
+         select(Product).where(Product.store_id == store_id).order_by(Product.name, Product.id).limit(101),
+         ("ix_products_store_id_name_id",), True),
+        ("GET /products/?sort=-purchase_price",
+         select(Product).where(Product.store_id == store_id)
+         .order_by(Product.purchase_price.desc(), Product.id.desc()).limit(101),
+         ("ix_products_store_id_purchase_price_id",), True),
+        ("GET /products/?sort=quantity",
+         select(Product).where(Product.store_id == store_id).order_by(Product.quantity, Product.id).limit(101),
+         ("ix_products_store_id_quantity_id",), True),
+        ("GET /products/export",
+         select(Product.id, Product.name).where(Product.store_id == store_id).order_by(Product.id),
+         ("ix_products_store_id_id",), True),
+        ("GET /products/changes",
+         select(Product).where(Product.store_id == store_id, Product.change_version > 3)
+         .order_by(Product.change_version, Product.id).limit(501),
+         ("ix_products_store_id_change_version_id",), True),
+        ("GET /analytics/profit",
+         select(Rollup.product_id, func.sum(Rollup.units), func.sum(Rollup.revenue), func.sum(Rollup.units * Product.purchase_price))
+         .join(Product, Product.id == Rollup.product_id)
+         .where(Rollup.store_id == store_id, Rollup.day >= date(2025, 3, 1), Rollup.day <= date(2025, 6, 30))
+         .group_by(Rollup.product_id),
+         ("sqlite_autoindex_sales_daily_product_rollups_1", "sales_daily_product_rollups_pkey"), False),
+        ("GET /products/by-code/{code}",
+         select(Product).where(Product.store_id == store_id, Product.sku == "SKU-42"),
+         ("ux_products_store_id_sku",), False),
+    ]
+
+
+def seed(conn, models, stores: int, rows: int):
+    from sqlalchemy import insert
+
+    conn.execute(insert(models.Store), [{"id": s, "name": f"plan-check-{s}"} for s in range(1, stores + 1)])
+    conn.execute(insert(models.User), [
+        {"id": s, "email": f"plan-check-{s}@example.com", "hashed_password": "x", "role": "admin", "store_id": s}
+        for s in range(1, stores + 1)
+    ])
+    products = []
+    for s in range(1, stores + 1):
+        products += [
+            {"name": f"product-{i}", "category": ("Food", "Books", "Other")[i % 3], "purchase_price": 1.0 + i % 40,
+             "quantity": i % 25,
+             "max_sell_price": 2.0, "date": date(2025, i % 12 + 1, i % 28 + 1), "net_profit": 5.0, "sku": f"SKU-{i}",
+             "change_version": i % 50, "store_id": s}
+            for i in range(rows)
+        ]
+    conn.execute(insert(models.Product), products)
+    conn.execute(insert(models.Sale), [
+        {"product_id": p % len(products) + 1, "user_id": p % stores + 1, "store_id": p % stores + 1, "quantity": 1,
+         "timestamp": date(2025, p % 12 + 1, p % 28 + 1)}
+        for p in range(rows * stores)
+    ])
+
+
+def explain(conn, statement) -> str:
+    from sqlalchemy import text
+
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    return "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + sql)))
+
+
+def run(args) -> int:
+    from sqlalchemy import create_engine, text
+
+    import models
+
+    engine = create_engine(args.database_url)
+    sorts = ("USE TEMP B-TREE", "Sort") # SQLite / Postgres sort step
+    with engine.begin() as conn:
+        if args.seed:
+            models.Base.metadata.create_all(conn)
+            seed(conn, models, args.stores, args.rows)
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE products"))
+            conn.execute(text("ANALYZE sales"))
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+        failures = 0
+        for name, statement, indexes, ordered in checks(models, store_id=1):
+            plan = explain(conn, statement)
+            problems = []
+            if not any(index in plan for index in indexes):
+                problems.append(f"expected {' or '.join(indexes)}")
+            if ordered and any(step in plan for step in sorts):
+                problems.append("sorts instead of walking the index in order")
+            print(f"{'FAIL' if problems else 'ok':<6}{name:<38}{'; '.join(problems) or indexes[0]}")
+            if problems:
+                failures += 1
+                print("      " + plan.replace("\n", "\n      "))
+        conn.rollback() # Leaves a real database untouched
+    print(f"{failures} plan check(s) failed" if failures else "All tenant-scoped queries use their indexes")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Sync SQLAlchemy URL of a migrated database; defaults to a temporary SQLite file")
+    parser.add_argument("--stores", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=2000, help="Products (and sales) per store")
+    parser.add_argument("--seed", action="store_true",
+                        help="Create the tables and seed an empty --database-url too (rolled back afterwards)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.seed = args.seed or args.database_url is None
+        args.database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        os.environ["ASYNC_DATABASE_URL"] = os.environ.get("ASYNC_DATABASE_URL") or "sqlite+aiosqlite://"
+        sys.path.insert(0, SERVER_DIR)
+        sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
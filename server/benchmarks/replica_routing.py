@@ -0,0 +1,140 @@
+"""Replica routing check: read-only endpoints use the replica, a user's own writes stay readable, a dead
+replica is skipped.
+
+Needs two independent databases, without replication between them, so the check can tell them apart: two
+temporary SQLite files by default, or two local instances given as sync SQLAlchemy URLs (--primary-url,
+--replica-url; e.g. two Postgres servers on ports 5432 and 5433). The schema is created in both if missing.
+A marker product that exists only on the replica shows where each GET /products/ was served:
+
+  1. reads go to the replica
+  2. right after the user's POST /products/, their reads come from the primary (REPLICA_STICKY_SECONDS)
+  3. once the window has passed, reads go back to the replica
+  4. with a second, unreachable replica configured, every read still succeeds and /diagnostics/pool
+     reports that replica as unhealthy
+
+Exits 1 if any step fails.
+
+    cd server && python benchmarks/replica_routing.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+STICKY_SECONDS = 1.0
+
+
+def seed(primary_url: str, replica_url: str, tag: str) -> tuple:
+    # The same store and admin (same ids) in both databases, plus a product that exists only on the replica
+    from sqlalchemy import create_engine, insert, select
+
+    import models
+
+    engines = [create_engine(primary_url), create_engine(replica_url)]
+    for engine in engines:
+        models.Base.metadata.create_all(engine)
+    with engines[0].begin() as conn:
+        store_id = conn.execute(insert(models.Store).values(name=f"replica-check-{tag}").returning(models.Store.id)).scalar_one()
+        user_id = conn.execute(insert(models.User).values(
+            email=f"replica-check-{tag}@example.com", hashed_password="x", role="admin", store_id=store_id
+        ).returning(models.User.id)).scalar_one()
+    with engines[1].begin() as conn:
+        conn.execute(insert(models.Store).values(id=store_id, name=f"replica-check-{tag}"))
+        conn.execute(insert(models.User).values(
+            id=user_id, email=f"replica-check-{tag}@example.com", hashed_password="x", role="admin", store_id=store_id
+        ))
+        conn.execute(insert(models.Product).values(
+            name=f"replica-only-{tag}", category="Other", purchase_price=1.0, quantity=1, max_sell_price=2.0,
+            date=date(2025, 1, 1), net_profit=1.0, store_id=store_id,
+        ))
+    for engine in engines:
+        engine.dispose()
+    return store_id, user_id
+
+
+async def run(args) -> int:
+    import httpx
+
+    from auth_utils import security
+
+    tag = uuid.uuid4().hex[:8]
+    store_id, user_id = seed(args.primary_url, args.replica_url, tag)
+    token = security.create_access_token({"sub": f"replica-check-{tag}@example.com", "role": "admin", "id": user_id})
+    headers = {"Authorization": f"Bearer {token}"}
+    marker = f"replica-only-{tag}"
+
+    import main
+
+    failures = 0
+
+    def report(ok: bool, name: str, detail: str = ""):
+        nonlocal failures
+        failures += 0 if ok else 1
+        print(f"{'ok' if ok else 'FAIL':<6}{name}{': ' + detail if detail else ''}")
+
+    async def served_by(client) -> str:
+        response = await client.get("/products/", headers=headers, params={"limit": 500})
+        response.raise_for_status()
+        return "replica" if any(item["name"] == marker for item in response.json()["items"]) else "primary"
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        report(await served_by(client) == "replica", "reads go to the replica")
+
+        response = await client.post("/products/", headers=headers, json={
+            "name": f"written-{tag}", "category": "Other", "purchase_price": 1.0, "quantity": 1, "max_sell_price": 2.0,
+            "date": "2025-01-01", "store_id": store_id,
+        })
+        response.raise_for_status()
+        where = await served_by(client)
+        report(where == "primary", "reads after a write come from the primary", f"served by the {where}")
+
+        await asyncio.sleep(STICKY_SECONDS + 0.2)
+        where = await served_by(client)
+        report(where == "replica", f"reads return to the replica after {STICKY_SECONDS:g} s", f"served by the {where}")
+
+        statuses = []
+        for _ in range(4): # Round-robin reaches the unreachable replica at least once
+            response = await client.get("/products/", headers=headers)
+            statuses.append(response.status_code)
+        report(all(code == 200 for code in statuses), "reads succeed with an unreachable replica", str(statuses))
+        replicas = (await client.get("/diagnostics/pool", headers=headers)).json()["replicas"]
+        health = [replica["healthy"] for replica in replicas]
+        report(health == [True, False], "the unreachable replica is marked unhealthy", str(health))
+
+    print(f"{failures} check(s) failed" if failures else "Replica routing behaves as configured")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--primary-url", help="Sync SQLAlchemy URL of the primary; defaults to a temporary SQLite file")
+    parser.add_argument("--replica-url", help="Sync SQLAlchemy URL of the replica; defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.primary_url = args.primary_url or f"sqlite:///{os.path.join(tmp, 'primary.db')}"
+        args.replica_url = args.replica_url or f"sqlite:///{os.path.join(tmp, 'replica.db')}"
+        unreachable = f"sqlite:///{os.path.join(tmp, 'missing', 'replica.db')}" # Directory does not exist
+        os.environ.update(
+            DATABASE_URL=args.primary_url,
+            DATABASE_REPLICA_URLS=f"{args.replica_url},{unreachable}",
+            REPLICA_STICKY_SECONDS=str(STICKY_SECONDS),
+            LOG_LEVEL="WARNING",
+        )
+        os.environ.pop("ASYNC_DATABASE_URL", None) # Derived from DATABASE_URL
+        sys.path.insert(0, SERVER_DIR)
+        started = time.perf_counter()
+        code = asyncio.run(run(args))
+        print(f"({time.perf_counter() - started:.1f} s)")
+        sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
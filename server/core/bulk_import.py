@@ -0,0 +1,80 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Optional
+
+
+# Streaming parsers for bulk uploads. They consume the request body chunk by chunk and yield one
+# record at a time, so memory stays bounded by the batch size rather than the file size.
+
+MAX_LINE_CHARS = 64 * 1024 # Refuse pathological "lines" instead of buffering an unbounded body
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")() # Strips a leading BOM from spreadsheet exports
+    buffer = ""
+    async for chunk in chunks:
+        try:
+            buffer += decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(f"Upload is not valid UTF-8: {e}")
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(buffer) > MAX_LINE_CHARS:
+            raise ImportFormatError(f"Line longer than {MAX_LINE_CHARS} characters")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    # Yields (row_number, record, error). The first non-empty line is the header; row numbers count data rows.
+    header = None
+    pending = None
+    row_number = 0
+    async for line in lines:
+        if pending is not None:
+            line = pending + "\n" + line
+            pending = None
+        if line.count('"') % 2:
+            # Odd quote count: a quoted field continues on the next physical line
+            if len(line) > MAX_LINE_CHARS:
+                raise ImportFormatError(f"Unterminated quoted field longer than {MAX_LINE_CHARS} characters")
+            pending = line
+            continue
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells are treated as missing so schema defaults (and required-field errors) apply
+        yield row_number, {key: value for key, value in zip(header, values) if value != ""}, None
+    if pending is not None:
+        yield row_number + 1, None, "Unterminated quoted field at end of file"
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record: Any = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, record, None
@@ -7,9 +7,92 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dagiandmikessecretkey")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")  # Use environment variable
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "43200"))  # Use environment variable, cast to int, ensure default is string
 
+# Authenticated principal cache (see auth_utils/principal_cache.py). Set max entries to 0 to disable.
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+# Password hashing pool (see auth_utils/hash_pool.py): "process" or "thread". A hash is rejected with a 503 when its
+# expected queue wait (hashes ahead / workers x measured hash time) exceeds PASSWORD_HASH_MAX_WAIT_SECONDS, so a login
+# burst queues as long as it can still be answered in time; PASSWORD_HASH_MAX_PENDING is only a memory backstop.
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_WAIT_SECONDS = float(os.getenv("PASSWORD_HASH_MAX_WAIT_SECONDS", "10"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "1000"))
+
 # Database URL (Example for PostgreSQL)
 DATABASE_URL = os.getenv("DATABASE_URL")  # Uncommented and ensure it's read
 
+# Read replicas (see core/replicas.py): comma-separated URLs, sync or async drivers. Read-only endpoints use a healthy
+# replica; a user's reads stay on the primary for REPLICA_STICKY_SECONDS after they write (read-your-writes).
+# Replicas are checked every REPLICA_HEALTH_INTERVAL_SECONDS and skipped while down or lagging more than
+# REPLICA_MAX_LAG_SECONDS. Stickiness is per worker process, so keep the window above the usual replication lag.
+DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", "5"))
+REPLICA_CONNECT_TIMEOUT_SECONDS = float(os.getenv("REPLICA_CONNECT_TIMEOUT_SECONDS", "2")) # Health checks and request fallback
+
+# Engine/pool settings (see core/engine_factory.py)
+# DB_POOL_MODE: "queue" (long-lived server), "null" (serverless / PgBouncer owns pooling), "sqlite" (tests)
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes") # Logs every statement; keep off in production
+
+# Prometheus metrics (see core/metrics.py): request/DB instrumentation and the unauthenticated GET /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Slow-query log (see core/slow_queries.py), read at GET /diagnostics/slow_queries. Threshold 0 disables it.
+# SLOW_QUERY_EXPLAIN captures EXPLAIN (ANALYZE, BUFFERS) for slow SELECTs on Postgres, at most once per
+# fingerprint per interval, since ANALYZE runs the statement again.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "250"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300"))
+
+# Product search (see core/product_search.py): minimum trigram word similarity for a fuzzy match
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.4"))
+
+# Product delta sync (see core/product_sync.py): how long deletions stay visible to GET /products/changes.
+# Clients that last synced before that get reset=true and reload the catalog.
+SYNC_TOMBSTONE_RETENTION_DAYS = float(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Push channel (see core/push.py, served at /push/events and /push/ws). PUSH_BACKEND "memory" fans out within
+# one process; "postgres" relays events through LISTEN/NOTIFY so every worker's subscribers get them.
+PUSH_BACKEND = os.getenv("PUSH_BACKEND", "memory")
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", "256")) # Per subscriber; overflow collapses into one "resync" event
+PUSH_KEEPALIVE_SECONDS = float(os.getenv("PUSH_KEEPALIVE_SECONDS", "15"))
+
+# Logging (see core/structured_logging.py): records go through a bounded queue to a writer thread.
+# LOG_SAMPLE_RATES keeps a fraction of INFO lines per logger, e.g. "routers.sales=0.1,routers.auth=0.25".
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json") # "json" or "text"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# Realized profit reports (see core/profit_report.py), cached per store and query until the store's next sale or
+# product change; the TTL only matters for changes made outside the API (e.g. a rollup rebuild)
+PROFIT_CACHE_MAX_ENTRIES = int(os.getenv("PROFIT_CACHE_MAX_ENTRIES", "1000"))
+PROFIT_CACHE_TTL_SECONDS = float(os.getenv("PROFIT_CACHE_TTL_SECONDS", "300"))
+
+# Demand forecasting for /analytics/reorder (see core/demand.py): each product keeps its last DEMAND_WINDOW_DAYS
+# daily unit counts, smoothed with Holt's damped-trend method (level weight ALPHA, trend weight BETA, trend
+# damping per day DAMPING < 1) or, for products that sell only now and then, Croston's method with weight ALPHA
+DEMAND_WINDOW_DAYS = int(os.getenv("DEMAND_WINDOW_DAYS", "56"))
+DEMAND_SMOOTHING_ALPHA = float(os.getenv("DEMAND_SMOOTHING_ALPHA", "0.3"))
+DEMAND_TREND_BETA = float(os.getenv("DEMAND_TREND_BETA", "0.1"))
+DEMAND_TREND_DAMPING = float(os.getenv("DEMAND_TREND_DAMPING", "0.9"))
+
+# App startup (see main.py and core/startup.py). APP_LAZY_ROUTERS imports each router on the first request under
+# its prefix, which keeps serverless cold starts short. APP_WARMUP runs a lifespan warm-up before serving: all
+# routers, mappers, auth libraries, APP_WARMUP_CONNECTIONS pooled connections and the password hashing workers.
+APP_LAZY_ROUTERS = os.getenv("APP_LAZY_ROUTERS", "true").lower() in ("1", "true", "yes")
+APP_WARMUP = os.getenv("APP_WARMUP", "false").lower() in ("1", "true", "yes")
+APP_WARMUP_CONNECTIONS = int(os.getenv("APP_WARMUP_CONNECTIONS", "2"))
+
 # If you have other global configurations, like API keys for external services, add them here.
 # EXAMPLE_API_KEY = os.getenv("EXAMPLE_API_KEY", "your_api_key_here")
 
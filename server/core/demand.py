@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete, insert, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from core import config
+
+# Demand forecasting and reorder suggestions. Each product keeps a rolling window of its last DEMAND_WINDOW_DAYS
+# daily unit counts in product_demand; like core/sales_rollups.py, every sale write applies its delta here inside
+# the same transaction, so the window is current when the sale commits. A row's window ends on the latest day
+# it has seen a sale; the forecast lines every window up with the day before the requested one, since the
+# current day is still incomplete.
+#
+# The forecast loads one row per product and smooths a products x days matrix with NumPy: the loops walk the
+# days, and each step updates every product of the store at once. Products that sell on most days get Holt's
+# method with a damped trend, so a recent rise levels off instead of growing across the lead time. Products
+# that sell now and then (average interval between selling days above INTERMITTENT_ADI) get Croston's method
+# with the Syntetos-Boylan correction, which smooths sale sizes and the gaps between them separately; plain
+# smoothing would read a single sale as a daily rate. NumPy is imported on first use so it stays out of the
+# sale path and of cold starts.
+
+INTERMITTENT_ADI = 1.32 # Syntetos-Boylan cut-off on the average demand interval, in days
+
+
+def _fit(daily_units: list, window: int) -> list:
+    # Rows written under another DEMAND_WINDOW_DAYS: keep the most recent days, zero-fill the oldest
+    daily_units = list(daily_units[-window:])
+    return [0] * (window - len(daily_units)) + daily_units
+
+
+async def apply_sale(db: AsyncSession, store_id: int, product_id: int, day: date, units: int):
+    # Pass negative units when a sale is deleted. FOR UPDATE serializes concurrent sales of the product
+    # (the sale paths also hold the product's row lock on Postgres); SQLite ignores it and serializes writers anyway.
+    window = config.DEMAND_WINDOW_DAYS
+    table = models.ProductDemand.__table__
+    key = (table.c.store_id == store_id, table.c.product_id == product_id)
+    row = (await db.execute(select(table.c.window_end, table.c.daily_units).where(*key).with_for_update())).one_or_none()
+    if row is None:
+        if units > 0: # Nothing to take back from a product with no window yet
+            await db.execute(insert(table).values(
+                store_id=store_id, product_id=product_id, window_end=day, daily_units=[0] * (window - 1) + [units]
+            ))
+        return
+
+    window_end, daily_units = row.window_end, _fit(row.daily_units, window)
+    if day > window_end:
+        # Slide the window forward; the days in between had no sales
+        daily_units = (daily_units + [0] * min((day - window_end).days, window))[-window:]
+        window_end = day
+    age = (window_end - day).days
+    if age >= window:
+        return # Older than the window, so it no longer counts towards the forecast
+    daily_units[window - 1 - age] = max(daily_units[window - 1 - age] + units, 0)
+    await db.execute(update(table).where(*key).values(window_end=window_end, daily_units=daily_units))
+
+
+async def forget_product(db: AsyncSession, product_id: int):
+    # Called before a product is deleted, like sales_rollups.forget_product
+    await forget_products(db, [product_id])
+
+
+async def forget_products(db: AsyncSession, product_ids):
+    # product_ids is a list or a SELECT of product ids
+    table = models.ProductDemand.__table__
+    await db.execute(delete(table).where(table.c.product_id.in_(product_ids)))
+
+
+def forecast(history, stock, cover_days: int, alpha: float, beta: float, phi: float) -> dict:
+    """Demand forecast for each row of history (products x days, oldest day first, ending yesterday).
+
+    Holt's method with trend damping phi for rows that sell on most days, Croston's method (SBA) for
+    intermittent rows. Returns NumPy arrays, one entry per product: velocity (mean units per day over the
+    window), demand (forecast units over the next cover_days days) and days_until_stockout (inf when the
+    forecast never empties the stock).
+    """
+    import numpy as np
+
+    products, days = history.shape
+    level = history[:, 0].copy()
+    trend = np.zeros(products)
+    size = np.zeros(products) # Croston: smoothed units on selling days
+    interval = np.zeros(products) # Croston: smoothed days between selling days
+    since = np.ones(products) # Days since the last selling day, counting the current one
+    seen = np.zeros(products, dtype=bool)
+    for t in range(days):
+        units = history[:, t]
+        if t:
+            previous = level
+            level = alpha * units + (1 - alpha) * (level + phi * trend)
+            trend = beta * (level - previous) + (1 - beta) * phi * trend
+        sold = units > 0
+        first = sold & ~seen
+        size = np.where(first, units, np.where(sold, size + alpha * (units - size), size))
+        interval = np.where(first, t + 1.0, np.where(sold, interval + alpha * (since - interval), interval))
+        since = np.where(sold, 1.0, since + 1)
+        seen |= sold
+
+    selling_days = np.count_nonzero(history > 0, axis=1)
+    intermittent = selling_days * INTERMITTENT_ADI < days # Average interval days / selling_days above the cut-off
+    croston = np.divide(size, interval, out=np.zeros(products), where=interval > 0) * (1 - alpha / 2)
+    # Daily forecasts for the cover period, never negative; a damped trend adds phi + phi^2 + ... + phi^h by day h
+    damping = np.cumsum(phi ** np.arange(1, cover_days + 1))
+    holt = np.maximum(level[:, None] + trend[:, None] * damping, 0.0)
+    daily = np.where(intermittent[:, None], croston[:, None], holt)
+
+    # When the cumulative demand reaches the stock
+    cumulative = np.cumsum(daily, axis=1)
+    demand = cumulative[:, -1]
+    runs_out = cumulative >= stock[:, None]
+    days_until_stockout = np.where(runs_out.any(axis=1), runs_out.argmax(axis=1) + 1.0, np.inf)
+    # Stock that outlasts the cover period: extrapolate at the last day's forecast rate
+    rate = daily[:, -1]
+    beyond = ~runs_out[:, -1] & (rate > 0)
+    days_until_stockout[beyond] = cover_days + np.ceil((stock[beyond] - demand[beyond]) / rate[beyond])
+    days_until_stockout[stock <= 0] = 0
+    return {"velocity": history.mean(axis=1), "demand": demand, "days_until_stockout": days_until_stockout}
+
+
+async def reorder_suggestions(db: AsyncSession, store_id: int, today: date, horizon_days: int, lead_time_days: int,
+                              limit: int) -> list:
+    # A product is suggested when its forecast demand over lead_time_days + horizon_days (the stock has to last
+    # until the order arrives, then until the next review) exceeds its stock. Soonest stockout first.
+    import numpy as np
+
+    window = config.DEMAND_WINDOW_DAYS
+    demand_table = models.ProductDemand.__table__
+    rows = (await db.execute(
+        select(
+            models.Product.id, models.Product.name, models.Product.category, models.Product.quantity,
+            demand_table.c.window_end, demand_table.c.daily_units,
+        )
+        .outerjoin(demand_table, and_(
+            demand_table.c.product_id == models.Product.id, demand_table.c.store_id == models.Product.store_id
+        ))
+        .where(models.Product.store_id == store_id)
+    )).all()
+    if not rows:
+        return []
+
+    stored = np.array([_fit(row.daily_units, window) if row.daily_units else [0] * window for row in rows], dtype=float)
+    # Line every window up so its last column is yesterday: a window that ended lag days before then moves lag
+    # columns left, and today's sales (a partial day) fall off the end
+    last_full_day = today - timedelta(days=1)
+    lag = np.array([(last_full_day - row.window_end).days if row.window_end else window for row in rows])
+    columns = np.arange(window) + np.clip(lag, -window, window)[:, None]
+    inside = (columns >= 0) & (columns < window)
+    history = np.where(inside, np.take_along_axis(stored, np.clip(columns, 0, window - 1), axis=1), 0.0)
+    stock = np.array([row.quantity for row in rows], dtype=float)
+
+    cover_days = lead_time_days + horizon_days
+    result = forecast(
+        history, stock, cover_days, config.DEMAND_SMOOTHING_ALPHA, config.DEMAND_TREND_BETA, config.DEMAND_TREND_DAMPING
+    )
+    shortfall = np.ceil(np.round(result["demand"] - stock, 6)) # Rounded first so float noise never orders a unit
+    candidates = np.flatnonzero(shortfall > 0)
+    order = candidates[np.lexsort((-shortfall[candidates], result["days_until_stockout"][candidates]))][:limit]
+
+    suggestions = []
+    for i in order:
+        days_until_stockout = result["days_until_stockout"][i]
+        suggestions.append({
+            "product_id": rows[i].id,
+            "name": rows[i].name,
+            "category": rows[i].category,
+            "quantity": rows[i].quantity,
+            "velocity": round(float(result["velocity"][i]), 3),
+            "forecast_daily": round(float(result["demand"][i]) / cover_days, 3),
+            "forecast_units": round(float(result["demand"][i]), 2),
+            "days_until_stockout": int(days_until_stockout) if np.isfinite(days_until_stockout) else None,
+            "suggested_quantity": int(shortfall[i]),
+        })
+    return suggestions
+
+
+async def rebuild(db: AsyncSession, store_id: Optional[int] = None, today: Optional[date] = None):
+    # Recompute every window from the daily product rollups, ending today
+    today = today or date.today()
+    window = config.DEMAND_WINDOW_DAYS
+    start = today - timedelta(days=window - 1)
+    table = models.ProductDemand.__table__
+    rollups = models.SalesDailyProductRollup.__table__
+    clear = delete(table)
+    source = select(rollups.c.store_id, rollups.c.product_id, rollups.c.day, rollups.c.units).where(
+        rollups.c.day >= start, rollups.c.day <= today, rollups.c.units != 0
+    )
+    if store_id is not None:
+        clear = clear.where(table.c.store_id == store_id)
+        source = source.where(rollups.c.store_id == store_id)
+
+    windows = {}
+    for row_store_id, product_id, day, units in (await db.execute(source)).all():
+        windows.setdefault((row_store_id, product_id), [0] * window)[(day - start).days] += units
+    await db.execute(clear)
+    if windows:
+        await db.execute(insert(table), [
+            {"store_id": row_store_id, "product_id": product_id, "window_end": today, "daily_units": daily_units}
+            for (row_store_id, product_id), daily_units in windows.items()
+        ])
+    await db.commit()
+
+
+async def _main(store_id: Optional[int]) -> int:
+    import database
+    async with database.AsyncSessionLocal() as db:
+        await rebuild(db, store_id)
+    print(f"Rebuilt demand windows for {'store ' + str(store_id) if store_id is not None else 'all stores'}.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage (from server/): python -m core.demand [--store-id N]
+    parser = argparse.ArgumentParser(description="Rebuild the product demand windows from the daily sales rollups.")
+    parser.add_argument("--store-id", type=int, default=None, help="Only this store (default: all stores)")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.store_id)))
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, StaticPool
+
+from core import config
+
+POOL_MODES = ("queue", "null", "sqlite")
+
+
+class PoolStats:
+    # Checkout telemetry for one engine's pool, read by the /diagnostics/pool endpoint
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=2048)
+        self.checkouts = 0
+        self.waits = 0 # Checkouts requested while every pooled connection (incl. overflow) was in use
+        self.timeouts = 0
+        self.max_latency = 0.0
+
+    def record(self, elapsed: float, waited: bool, timed_out: bool = False):
+        with self._lock:
+            self.waits += waited
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.max_latency = max(self.max_latency, elapsed)
+            self._latencies.append(elapsed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._latencies)
+            checkouts, waits, timeouts, max_latency = self.checkouts, self.waits, self.timeouts, self.max_latency
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 3) if recent else 0.0
+
+        return {
+            "checkouts": checkouts,
+            "waits": waits,
+            "timeouts": timeouts,
+            "checkout_ms_p50": percentile(0.50),
+            "checkout_ms_p95": percentile(0.95),
+            "checkout_ms_p99": percentile(0.99),
+            "checkout_ms_max": round(max_latency * 1000, 3),
+        }
+
+
+class _InstrumentedPoolMixin:
+    # Times Pool._do_get, i.e. waiting for a free connection (or opening one), not the query itself
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _is_saturated(self) -> bool:
+        if not isinstance(self, QueuePool) or self._max_overflow < 0:
+            return False
+        return self.checkedout() >= self.size() + self._max_overflow
+
+    def _do_get(self):
+        waited = self._is_saturated()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - started, waited, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started, waited)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    pass
+
+
+class InstrumentedStaticPool(_InstrumentedPoolMixin, StaticPool):
+    pass
+
+
+def _pool_options(url, mode: str, is_async: bool) -> dict:
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {POOL_MODES}, got {mode!r}")
+    backend = make_url(url).get_backend_name()
+    options = {"echo": config.DB_ECHO}
+    connect_args = {}
+    if backend == "sqlite" and not is_async:
+        connect_args["check_same_thread"] = False
+
+    if mode == "queue":
+        # Long-lived servers: a bounded pool per worker, validated on checkout and recycled before server-side timeouts
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+        )
+    elif mode == "null":
+        # Serverless or behind PgBouncer: the external pooler owns connections, so never hold one between requests
+        options["poolclass"] = InstrumentedNullPool
+        if is_async and make_url(url).get_driver_name() == "asyncpg":
+            # PgBouncer transaction pooling cannot keep per-connection prepared statements
+            connect_args.update(statement_cache_size=0, prepared_statement_cache_size=0)
+    else:
+        # Tests: one shared connection, so an in-memory SQLite database is visible to every session
+        options["poolclass"] = InstrumentedStaticPool
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def build_engine(url: str, mode: Optional[str] = None):
+    return create_engine(url, **_pool_options(url, mode or config.DB_POOL_MODE, is_async=False))
+
+
+def build_async_engine(url: str, mode: Optional[str] = None):
+    return create_async_engine(url, **_pool_options(url, mode or config.DB_POOL_MODE, is_async=True))
+
+
+def to_async_url(url: str) -> str:
+    # Same database through the async driver: psycopg2 -> asyncpg, pysqlite -> aiosqlite
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def pool_status(engine) -> dict:
+    # Live gauges plus the accumulated PoolStats for one engine (sync Engine or AsyncEngine)
+    engine = getattr(engine, "sync_engine", engine)
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            saturation=round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+from datetime import date
+
+from fastapi.responses import StreamingResponse
+
+import database
+
+EXPORT_BATCH_ROWS = 2000 # Rows fetched per server-side cursor round trip and encoded per chunk
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def _stream_rows(stmt, columns: list, format: str):
+    # The session is opened here rather than taken from a dependency: the body is produced after the
+    # endpoint returns, so the cursor has to live as long as the response stream.
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue().encode()
+            async for rows in result.partitions(EXPORT_BATCH_ROWS):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+        else:
+            async for rows in result.partitions(EXPORT_BATCH_ROWS):
+                yield "".join(
+                    json.dumps(dict(zip(columns, row)), default=_json_default, separators=(",", ":")) + "\n"
+                    for row in rows
+                ).encode()
+
+
+def export_response(stmt, columns: list, format: str, filename: str) -> StreamingResponse:
+    # Memory stays constant in the row count: one batch is held and encoded at a time
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    extension = "csv" if format == "csv" else "ndjson"
+    return StreamingResponse(
+        _stream_rows(stmt, columns, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
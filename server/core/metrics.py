@@ -0,0 +1,197 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from core.structured_logging import dropped_records
+
+# Per-process request and database instrumentation, rendered in the Prometheus text format by GET /metrics.
+# Each worker keeps its own counters; Prometheus sums them across the scraped targets.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+UNMATCHED_ROUTE = "unmatched" # Label for 404s and anything outside the routers, to keep label cardinality bounded
+NO_ROUTE = "none" # Label for statements issued outside an HTTP request (scripts, startup)
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# The middleware sets this per request; the cursor hooks find it because SQLAlchemy runs the async
+# driver's greenlet in the calling task's context
+_current_request: ContextVar[Optional[_RequestStats]] = ContextVar("metrics_current_request", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = {} # (method, route, status) -> count
+        self.latency = {} # (method, route) -> _Histogram of seconds
+        self.request_queries = {} # (method, route) -> _Histogram of statements per request
+        self.db_seconds = {} # route -> seconds spent in cursor.execute
+        self.db_queries = {} # route -> statements
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, elapsed: float, stats: _RequestStats):
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault((method, route), _Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            self.request_queries.setdefault((method, route), _Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+            self.db_seconds[route] = self.db_seconds.get(route, 0.0) + stats.db_seconds
+            self.db_queries[route] = self.db_queries.get(route, 0) + stats.queries
+
+    def query_outside_request(self, elapsed: float):
+        with self._lock:
+            self.db_seconds[NO_ROUTE] = self.db_seconds.get(NO_ROUTE, 0.0) + elapsed
+            self.db_queries[NO_ROUTE] = self.db_queries.get(NO_ROUTE, 0) + 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being served by this worker.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP http_requests_total Completed requests by method, route template and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}')
+            lines += _render_histograms(
+                "http_request_duration_seconds", "Request latency by method and route template.", self.latency
+            )
+            lines += _render_histograms(
+                "http_request_db_queries", "SQL statements executed per request.", self.request_queries
+            )
+            lines += [
+                "# HELP db_query_duration_seconds_total Time spent executing SQL statements, by route template.",
+                "# TYPE db_query_duration_seconds_total counter",
+            ]
+            for route, seconds in sorted(self.db_seconds.items()):
+                lines.append(f'db_query_duration_seconds_total{{{_labels(route=route)}}} {seconds:.6f}')
+            lines += [
+                "# HELP db_queries_total SQL statements executed, by route template.",
+                "# TYPE db_queries_total counter",
+            ]
+            for route, count in sorted(self.db_queries.items()):
+                lines.append(f'db_queries_total{{{_labels(route=route)}}} {count}')
+            lines += [
+                "# HELP log_records_dropped_total Log records dropped because the logging queue was full.",
+                "# TYPE log_records_dropped_total counter",
+                f"log_records_dropped_total {dropped_records()}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histograms(name: str, help_text: str, histograms: dict) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        labels = _labels(method=method, route=route)
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (not BaseHTTPMiddleware), so the endpoint runs in this task and context
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+        registry.request_started()
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            registry.request_finished(scope["method"], route_template(scope), status_code, time.perf_counter() - started, stats)
+
+
+def route_template(scope) -> str:
+    # Label by template (/products/{product_id}), not the raw path. The router records the match in the shared
+    # scope; rebuild the template from path_params since included routes may not carry their prefix.
+    if "endpoint" not in scope:
+        return UNMATCHED_ROUTE
+    segments = scope["path"].split("/")
+    for name, value in scope.get("path_params", {}).items():
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i] == str(value):
+                segments[i] = "{" + name + "}"
+                break
+    return "/".join(segments)
+
+
+def instrument_engine(engine):
+    # Accepts a sync Engine or an AsyncEngine; the timer start is kept on the connection, per the SQLAlchemy recipe.
+    # A connection runs one statement at a time, and a failed one is simply overwritten by the next start.
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_query_start")
+        stats = _current_request.get()
+        if stats is None:
+            registry.query_outside_request(elapsed)
+        else:
+            stats.queries += 1
+            stats.db_seconds += elapsed
@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+
+
+# Cursors are opaque to clients: base64url(JSON) of the sort spec plus the last row's sort key and id.
+# Keeping the sort spec inside the cursor lets us reject a cursor that is replayed against a different ordering.
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "v": value, "id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort or not isinstance(data["id"], int):
+            raise ValueError("cursor does not match requested sort")
+        return data["v"], data["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid cursor: {e}")
+
+
+def escape_like(term: str) -> str:
+    # Escape LIKE wildcards so user input is matched literally (used with escape="\\")
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def parse_cursor_value(value: Optional[str], kind: str) -> Any:
+    # Dates travel as ISO strings inside the cursor; convert back before comparing against the column
+    if value is not None and kind == "date":
+        return date.fromisoformat(value)
+    return value
@@ -0,0 +1,170 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import select, func, or_, text, literal, table, column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from core import config
+from core.pagination import escape_like
+
+logger = logging.getLogger(__name__)
+
+# Typo-tolerant product name search for GET /products/search. Both backends rank by trigram overlap:
+#   Postgres: pg_trgm GIN index on (store_id, lower(name)) (see the add_product_search_index migration);
+#             substring LIKE and the word-similarity operator both use it.
+#   SQLite:   an FTS5 table with the trigram tokenizer (models.SQLITE_PRODUCTS_FTS_DDL, created with the schema
+#             and by the add_sqlite_product_fts migration) yields candidates that are re-scored here. Without
+#             it (SQLite < 3.34) the store's names are scanned in-process.
+# FTS holds only raw 3-character substrings, not the word-boundary grams the scorer counts, so a typo early in
+# a short word ("itme" for "item-1") can share no FTS trigram with the name; when the candidates yield no
+# match, the store is scanned in-process like the fallback.
+
+SQLITE_CANDIDATES = 2000 # FTS candidates re-scored per query; facets on SQLite count within these
+_sqlite_fts_ready = {} # engine url -> bool, so the FTS table is looked up once per process
+
+_products_fts = table("products_fts", column("rowid"), column("rank"), column("products_fts"))
+
+
+def trigrams(value: str) -> set:
+    # pg_trgm style: lower-cased words padded with two spaces in front and one behind
+    grams = set()
+    for word in value.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def score(query: str, name: str) -> float:
+    # 1.0+ for substring hits (prefix hits first), otherwise the share of the query's trigrams found in name
+    query, lowered = query.lower(), name.lower()
+    if lowered.startswith(query):
+        return 2.0
+    if query in lowered:
+        return 1.0
+    wanted = trigrams(query)
+    return len(wanted & trigrams(lowered)) / len(wanted) if wanted else 0.0
+
+
+async def search_products(db: AsyncSession, store_id: int, query: str, category: Optional[str], limit: int) -> tuple[list, list]:
+    # Returns (products, facets); facets count matches per category before the category filter is applied
+    query = " ".join(query.split())
+    if db.get_bind().dialect.name == "postgresql":
+        return await _search_postgres(db, store_id, query, category, limit)
+    return await _search_sqlite(db, store_id, query, category, limit)
+
+
+async def _search_postgres(db: AsyncSession, store_id: int, query: str, category: Optional[str], limit: int):
+    lowered = query.lower()
+    name = func.lower(models.Product.name)
+    # Session-local threshold for the <% / %> operators, so the index does the fuzzy filtering
+    await db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                     {"threshold": str(config.SEARCH_SIMILARITY_THRESHOLD)})
+    matches = [
+        models.Product.store_id == store_id,
+        or_(name.like("%" + escape_like(lowered) + "%", escape="\\"), name.op("%>")(lowered)),
+    ]
+
+    facet_rows = (await db.execute(
+        select(models.Product.category, func.count())
+        .where(*matches)
+        .group_by(models.Product.category)
+        .order_by(func.count().desc(), models.Product.category)
+    )).all()
+
+    products_query = select(models.Product).where(*matches)
+    if category:
+        products_query = products_query.where(models.Product.category == category)
+    products = (await db.execute(
+        products_query.order_by(
+            name.like(escape_like(lowered) + "%", escape="\\").desc(),
+            func.word_similarity(literal(lowered), name).desc(),
+            models.Product.name,
+            models.Product.id,
+        ).limit(limit)
+    )).scalars().all()
+    return products, [{"category": c, "count": n} for c, n in facet_rows]
+
+
+async def _sqlite_fts_available(db: AsyncSession) -> bool:
+    # The table comes with the schema; a request never creates it
+    key = str(db.get_bind().url)
+    if key not in _sqlite_fts_ready:
+        exists = await db.scalar(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"))
+        if not exists:
+            logger.warning("products_fts is missing (run the migrations; needs SQLite 3.34+), product search scans in-process")
+        _sqlite_fts_ready[key] = bool(exists)
+    return _sqlite_fts_ready[key]
+
+
+def _score_rows(query: str, rows) -> list:
+    # (product id, name, category) rows -> (-similarity, name, id, category) for those above the threshold
+    scored = []
+    for product_id, name, product_category in rows:
+        similarity = score(query, name)
+        if similarity >= config.SEARCH_SIMILARITY_THRESHOLD:
+            scored.append((-similarity, name, product_id, product_category))
+    return scored
+
+
+async def _search_sqlite(db: AsyncSession, store_id: int, query: str, category: Optional[str], limit: int):
+    lowered = query.lower()
+    use_fts = len(query) >= 3 and await _sqlite_fts_available(db)
+
+    # 1. Substring matches (an FTS phrase query matches any substring), ranked and counted in SQL
+    if use_fts:
+        substring = models.Product.id.in_(
+            select(_products_fts.c.rowid).where(_products_fts.c.products_fts.op("MATCH")('"' + query.replace('"', '""') + '"'))
+        )
+    else:
+        substring = func.lower(models.Product.name).like("%" + escape_like(lowered) + "%", escape="\\")
+    in_store = models.Product.store_id == store_id
+    if use_fts:
+        # "+ 0" keeps SQLite off the store_id index, so the plan is driven by the FTS matches (primary key probes)
+        in_store = (models.Product.store_id + 0) == store_id
+    facet_rows = (await db.execute(
+        select(models.Product.category, func.count()).where(in_store, substring).group_by(models.Product.category)
+    )).all()
+    if sum(n for _, n in facet_rows) >= limit or len(query) < 3:
+        products_query = select(models.Product).where(in_store, substring)
+        if category:
+            products_query = products_query.where(models.Product.category == category)
+        products = (await db.execute(products_query.order_by(
+            func.lower(models.Product.name).like(escape_like(lowered) + "%", escape="\\").desc(),
+            models.Product.name,
+            models.Product.id,
+        ).limit(limit))).scalars().all()
+        return products, [{"category": c, "count": n} for c, n in sorted(facet_rows, key=lambda f: (-f[1], f[0]))]
+
+    # 2. Too few substring hits: fuzzy candidates sharing the query's trigrams, re-scored here
+    store_names = select(models.Product.id, models.Product.name, models.Product.category).where(
+        models.Product.store_id == store_id
+    )
+    scored = []
+    grams = sorted(g for g in trigrams(query) if " " not in g) # The FTS side holds raw 3-character substrings
+    if grams and use_fts:
+        # OR of the query's trigrams: rows sharing more of them rank first, which tolerates typos
+        fts_query = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+        scored = _score_rows(query, (await db.execute(
+            store_names
+            .join(_products_fts, _products_fts.c.rowid == models.Product.id)
+            .where(_products_fts.c.products_fts.op("MATCH")(fts_query))
+            .order_by(_products_fts.c.rank)
+            .limit(SQLITE_CANDIDATES)
+        )).all())
+    if not scored:
+        # No FTS, or its candidates missed: score every name in the store, boundary trigrams included
+        scored = _score_rows(query, (await db.execute(store_names)).all())
+
+    facets = {}
+    for _, _, _, product_category in scored:
+        facets[product_category] = facets.get(product_category, 0) + 1
+    hits = sorted(s for s in scored if not category or s[3] == category)[:limit]
+
+    products = []
+    if hits:
+        by_id = {p.id: p for p in (await db.execute(
+            select(models.Product).where(models.Product.id.in_([h[2] for h in hits]))
+        )).scalars().all()}
+        products = [by_id[h[2]] for h in hits if h[2] in by_id]
+    return products, [{"category": c, "count": n} for c, n in sorted(facets.items(), key=lambda f: (-f[1], f[0]))]
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, update, delete, insert, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from core import config
+from core.upsert import dialect_insert
+
+
+# Delta sync for GET /products/changes. Every transaction that writes products takes the store's next
+# change version, stamps the rows it writes with it and leaves a tombstone per deleted id. The counter row
+# stays locked until commit, so versions become visible in order: once a client has read version V, nothing
+# at or below V can still appear later.
+#
+# The counter lock serializes the store's writers from the moment it is taken, so the sale paths take it
+# late: they decrement (locking only the product row), then stamp_products() right before the store-wide
+# rows they update anyway (store_metrics, the daily rollup totals). Product edits call next_version() first
+# and also lock counter -> store_metrics -> rollups, so both kinds of writer take the shared locks in the
+# same order. Tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS are compacted away; clients whose version
+# predates the compacted range are told to reload.
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) # ProductTombstone.deleted_at is naive UTC
+
+
+async def next_version(db: AsyncSession, store_id: int) -> int:
+    table = models.StoreSyncVersion.__table__
+    stmt = dialect_insert(db, table).values(store_id=store_id, version=1, compacted_version=0)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.store_id], set_={"version": table.c.version + 1})
+    return await db.scalar(stmt.returning(table.c.version))
+
+
+async def stamp_products(db: AsyncSession, store_id: int, product_ids: list) -> int:
+    # Takes the next version for products this transaction already wrote (and so already holds locked)
+    version = await next_version(db, store_id)
+    if product_ids:
+        await db.execute(
+            update(models.Product)
+            .where(models.Product.id.in_(product_ids))
+            .values(change_version=version)
+            .execution_options(synchronize_session=False)
+        )
+    return version
+
+
+async def store_versions(db: AsyncSession, store_id: int) -> tuple[int, int]:
+    # (current version, compacted version); (0, 0) for a store that has never written a product
+    row = (await db.execute(
+        select(models.StoreSyncVersion.version, models.StoreSyncVersion.compacted_version)
+        .where(models.StoreSyncVersion.store_id == store_id)
+    )).one_or_none()
+    return (row[0], row[1]) if row is not None else (0, 0)
+
+
+async def record_deletions(db: AsyncSession, store_id: int, product_ids: list, version: int):
+    if not product_ids:
+        return
+    deleted_at = _utcnow()
+    await db.execute(insert(models.ProductTombstone), [
+        {"store_id": store_id, "change_version": version, "product_id": product_id, "deleted_at": deleted_at}
+        for product_id in product_ids
+    ])
+    await compact(db, store_id) # Cheap per store; the CLI below sweeps stores that stopped deleting
+
+
+async def compact(db: AsyncSession, store_id: int, retention_days: Optional[float] = None) -> int:
+    # Drops this store's expired tombstones and raises its compacted_version; returns the number removed.
+    # Tombstones are written in version order, so everything up to the newest expired version goes together.
+    if retention_days is None:
+        retention_days = config.SYNC_TOMBSTONE_RETENTION_DAYS
+    tombstones = models.ProductTombstone.__table__
+    watermark = await db.scalar(select(func.max(tombstones.c.change_version)).where(
+        tombstones.c.store_id == store_id,
+        tombstones.c.deleted_at < _utcnow() - timedelta(days=retention_days)
+    ))
+    if watermark is None:
+        return 0
+    removed = (await db.execute(delete(tombstones).where(
+        tombstones.c.store_id == store_id,
+        tombstones.c.change_version <= watermark
+    ))).rowcount
+    versions = models.StoreSyncVersion.__table__
+    await db.execute(
+        update(versions)
+        .where(versions.c.store_id == store_id, versions.c.compacted_version < watermark)
+        .values(compacted_version=watermark)
+    )
+    return removed
+
+
+def _after(version_column, id_column, since: int, after_id: Optional[int]):
+    # Without an id, everything newer than since; with one, resume inside a version after a page break
+    if after_id is None:
+        return version_column > since
+    return tuple_(version_column, id_column) > tuple_(since, after_id)
+
+
+async def changes_since(db: AsyncSession, store_id: int, since: int, after_id: Optional[int], include_deleted: bool, limit: int):
+    # Products and tombstones after (since, after_id) in (change_version, id) order; since=-1 reads everything.
+    # Returns (products, deleted ids, (version, id) of the last change returned, or None when nothing is left).
+    products = (await db.execute(
+        select(models.Product)
+        .where(
+            models.Product.store_id == store_id,
+            _after(models.Product.change_version, models.Product.id, since, after_id)
+        )
+        .order_by(models.Product.change_version, models.Product.id)
+        .limit(limit + 1)
+    )).scalars().all()
+    changes = [(p.change_version, p.id, p) for p in products]
+    if include_deleted:
+        tombstones = models.ProductTombstone.__table__
+        changes += [(version, product_id, None) for version, product_id in (await db.execute(
+            select(tombstones.c.change_version, tombstones.c.product_id)
+            .where(
+                tombstones.c.store_id == store_id,
+                _after(tombstones.c.change_version, tombstones.c.product_id, since, after_id)
+            )
+            .order_by(tombstones.c.change_version, tombstones.c.product_id)
+            .limit(limit + 1)
+        )).all()]
+        changes.sort(key=lambda change: change[:2])
+
+    page = changes[:limit]
+    last_key = page[-1][:2] if len(changes) > limit else None
+    return [p for _, _, p in page if p is not None], [product_id for _, product_id, p in page if p is None], last_key
+
+
+async def _main(store_id: Optional[int], retention_days: Optional[float]) -> int:
+    import database
+    async with database.AsyncSessionLocal() as db:
+        stores_query = select(models.ProductTombstone.store_id).distinct()
+        if store_id is not None:
+            stores_query = stores_query.where(models.ProductTombstone.store_id == store_id)
+        removed = 0
+        for sid in (await db.execute(stores_query)).scalars().all():
+            removed += await compact(db, sid, retention_days)
+            await db.commit() # One store at a time, so writers in other stores are never held up
+    print(f"Removed {removed} expired product tombstone(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage (from server/): python -m core.product_sync [--store-id N] [--retention-days D]
+    parser = argparse.ArgumentParser(description="Compact expired product tombstones of the delta sync feed.")
+    parser.add_argument("--store-id", type=int, default=None, help="Only this store (default: all stores)")
+    parser.add_argument("--retention-days", type=float, default=None, help="Default: SYNC_TOMBSTONE_RETENTION_DAYS")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.store_id, args.retention_days)))
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from core import config, product_sync
+
+# Realized profit: what the units actually sold earned, as opposed to Product.net_profit, which projects the
+# remaining stock. Revenue is valued at max_sell_price like every other sales figure here (a sale has no
+# price of its own), cost at the product's purchase_price. The aggregation runs in SQL over
+# sales_daily_product_rollups (core/sales_rollups.py, maintained from sales in the same transactions) joined
+# to products, so its cost follows the number of product-days sold, not the number of sales rows.
+#
+# Reports are cached per store and query, keyed by the store's sync version (core/product_sync.py): every
+# sale, sale deletion and product write (price changes included) bumps it, so a cached report is only
+# served while nothing it depends on has changed, in any worker. The TTL covers out-of-band changes such as
+# `python -m core.sales_rollups`.
+
+
+class ProfitReportCache:
+    """Bounded LRU of profit reports keyed by (store_id, query), valid for one store version and a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple[int, float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, store_id: int, query: tuple, version: int) -> Optional[dict]:
+        key = (store_id, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, store_id: int, query: tuple, version: int, report: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (store_id, query)
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+profit_cache = ProfitReportCache(
+    max_entries=config.PROFIT_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.PROFIT_CACHE_TTL_SECONDS,
+)
+
+
+def profit_figures(units, revenue, cost) -> dict:
+    units, revenue, cost = int(units or 0), float(revenue or 0.0), float(cost or 0.0)
+    return {
+        "units": units,
+        "revenue": round(revenue, 2),
+        "cost": round(cost, 2),
+        "profit": round(revenue - cost, 2),
+        "margin": round((revenue - cost) / revenue, 4) if revenue else None, # Share of revenue kept
+    }
+
+
+async def _compute(db: AsyncSession, store_id: int, start: date, end: date, group_by: str, limit: int) -> dict:
+    rollup = models.SalesDailyProductRollup
+    units = func.sum(rollup.units)
+    revenue = func.sum(rollup.revenue)
+    cost = func.sum(rollup.units * models.Product.purchase_price)
+    in_range = (rollup.store_id == store_id, rollup.day >= start, rollup.day <= end)
+
+    def aggregate(*columns):
+        return (
+            select(*columns, units, revenue, cost)
+            .join(models.Product, models.Product.id == rollup.product_id)
+            .where(*in_range)
+        )
+
+    total = (await db.execute(aggregate())).one()
+    if group_by == "product":
+        profit = (revenue - cost).label("profit")
+        rows = (await db.execute(
+            aggregate(rollup.product_id, models.Product.name, models.Product.category)
+            .add_columns(profit)
+            .group_by(rollup.product_id, models.Product.name, models.Product.category)
+            .having(units != 0)
+            .order_by(profit.desc(), rollup.product_id)
+            .limit(limit)
+        )).all()
+        groups = [
+            dict(product_id=product_id, name=name, category=category, **profit_figures(u, r, c))
+            for product_id, name, category, u, r, c, _ in rows
+        ]
+    elif group_by == "category":
+        profit = (revenue - cost).label("profit")
+        rows = (await db.execute(
+            aggregate(rollup.category).add_columns(profit)
+            .group_by(rollup.category)
+            .having(units != 0)
+            .order_by(profit.desc(), rollup.category)
+            .limit(limit)
+        )).all()
+        groups = [dict(category=category, **profit_figures(u, r, c)) for category, u, r, c, _ in rows]
+    else:
+        # One row per day, unrounded; the router folds days into day/week/month buckets
+        rows = (await db.execute(aggregate(rollup.day).group_by(rollup.day).order_by(rollup.day))).all()
+        groups = [dict(period_start=day, units=int(u or 0), revenue=float(r or 0.0), cost=float(c or 0.0)) for day, u, r, c in rows]
+    return {"total": profit_figures(*total), "groups": groups}
+
+
+async def realized_profit(db: AsyncSession, store_id: int, start: date, end: date, group_by: str, limit: int) -> tuple[dict, bool]:
+    # Returns (report, served from cache). The version is read before the aggregates: if a sale commits in
+    # between, the report may include it while carrying the older version, and is simply recomputed next time.
+    version, _ = await product_sync.store_versions(db, store_id)
+    query = (start, end, group_by, limit)
+    report = profit_cache.get(store_id, query, version)
+    if report is not None:
+        return report, True
+    report = await _compute(db, store_id, start, end, group_by, limit)
+    profit_cache.put(store_id, query, version, report)
+    return report, False
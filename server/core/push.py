@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from sqlalchemy import event, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+# Per-store push of stock and sales changes to open dashboards and tills (routers/push.py serves them over
+# SSE and WebSocket). Write paths call publish() inside their transaction, before commit; subscribers only
+# ever see committed changes:
+#   memory:   events wait on the session and reach this process's hub from the after_commit hook.
+#   postgres: events are sent with pg_notify(), which Postgres delivers at commit (and drops on rollback) to
+#             every worker; each worker LISTENs on one connection and fans out to its own subscribers.
+# Every event carries the store's sync version (core/product_sync.py). A client that gets "resync", or
+# reconnects, catches up through GET /products/changes?since=<last version seen>.
+
+CHANNEL = "product_registration_push"
+_PENDING_KEY = "push_pending_events"
+
+
+class PushHub:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers = {} # store_id -> set of asyncio.Queue of (event, data JSON)
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, store_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(store_id, set()).add(queue)
+        if config.PUSH_BACKEND == "postgres":
+            self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, store_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(store_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[store_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def deliver(self, store_id: int, event_name: str, data: str):
+        # data is serialized once per event, not once per subscriber
+        for queue in self._subscribers.get(store_id, ()):
+            try:
+                queue.put_nowait((event_name, data))
+            except asyncio.QueueFull:
+                # A subscriber this far behind has to catch up through the sync feed anyway
+                _replace_with_resync(queue)
+
+    def deliver_all(self, event_name: str, data: str):
+        for store_id in list(self._subscribers):
+            self.deliver(store_id, event_name, data)
+
+    def _ensure_listener(self):
+        import database
+        if database.async_engine.dialect.name != "postgresql":
+            return # publish() falls back to in-process delivery on other backends
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(_listen(self))
+
+
+def _replace_with_resync(queue: asyncio.Queue):
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(("resync", "{}"))
+
+
+hub = PushHub(config.PUSH_QUEUE_SIZE)
+
+
+async def publish(db: AsyncSession, store_id: int, event_name: str, **data):
+    # Call before db.commit(); data must be JSON serializable (dump pydantic models with mode="json")
+    payload = json.dumps(data, separators=(",", ":"))
+    if config.PUSH_BACKEND == "postgres" and db.get_bind().dialect.name == "postgresql":
+        message = json.dumps({"s": store_id, "e": event_name, "d": data}, separators=(",", ":"))
+        await db.execute(select(func.pg_notify(CHANNEL, message)))
+    else:
+        db.sync_session.info.setdefault(_PENDING_KEY, []).append((store_id, event_name, payload))
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session):
+    for store_id, event_name, payload in session.info.pop(_PENDING_KEY, ()):
+        hub.deliver(store_id, event_name, payload)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session, previous_transaction):
+    if not previous_transaction.nested: # A rolled back savepoint leaves the outer transaction's events
+        session.info.pop(_PENDING_KEY, None)
+
+
+async def _listen(target: PushHub):
+    # Runs while anyone in this process is subscribed; reconnects with backoff if the connection drops
+    import database
+    backoff = 1.0
+    while target.subscriber_count():
+        lost = asyncio.Event()
+
+        def on_notify(connection, pid, channel, payload):
+            try:
+                message = json.loads(payload)
+                target.deliver(message["s"], message["e"], json.dumps(message["d"], separators=(",", ":")))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring malformed push notification: {e}")
+
+        def on_terminate(connection):
+            lost.set()
+
+        try:
+            async with database.async_engine.connect() as conn:
+                listener = (await conn.get_raw_connection()).driver_connection # asyncpg connection
+                listener.add_termination_listener(on_terminate)
+                await listener.add_listener(CHANNEL, on_notify)
+                logger.info(f"Listening for push events on {CHANNEL}")
+                if backoff > 1.0:
+                    target.deliver_all("resync", "{}") # Notifications sent while disconnected are gone
+                backoff = 1.0
+                try:
+                    while target.subscriber_count() and not lost.is_set():
+                        try:
+                            await asyncio.wait_for(lost.wait(), timeout=config.PUSH_KEEPALIVE_SECONDS)
+                        except asyncio.TimeoutError:
+                            pass
+                finally:
+                    listener.remove_termination_listener(on_terminate)
+                    if not lost.is_set(): # The connection goes back to the pool, so stop listening on it
+                        await listener.remove_listener(CHANNEL, on_notify)
+        except Exception as e:
+            logger.warning(f"Push listener connection failed, retrying in {backoff:.0f} s: {e}")
+        if target.subscriber_count():
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+    logger.info("Push listener stopped: no subscribers left")
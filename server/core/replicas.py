@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from core import config
+from core.engine_factory import pool_status
+
+logger = logging.getLogger(__name__)
+
+# Read replica routing (DATABASE_REPLICA_URLS). Read-only endpoints take their session from
+# auth_deps.get_read_db, which asks choose() for a replica; everything else stays on the primary.
+#   read-your-writes: a commit on the primary by an authenticated user keeps that user's reads on the primary
+#                     for REPLICA_STICKY_SECONDS (tracked in this process).
+#   health:           a background task checks every replica each REPLICA_HEALTH_INTERVAL_SECONDS and skips
+#                     the ones that are unreachable or lag more than REPLICA_MAX_LAG_SECONDS. A replica that
+#                     fails to connect for a request (within REPLICA_CONNECT_TIMEOUT_SECONDS) is skipped right
+#                     away, and that request uses the primary.
+# With no replicas configured, choose() always returns None and nothing is tracked.
+
+REPLICA_KEY = "replica" # Session.info key naming the replica a session is bound to
+
+# Seconds since the last replayed transaction, or 0 when the replica has replayed everything it received
+# (an idle primary sends nothing, so the replay timestamp alone would read as growing lag)
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_current_user: ContextVar[Optional[int]] = ContextVar("replica_user", default=None)
+
+
+class Replica:
+    def __init__(self, engine):
+        self.engine = engine
+        self.name = make_url(str(engine.url)).render_as_string(hide_password=True)
+        self.healthy = True # Until the first check says otherwise
+        self.lag_seconds = 0.0
+        self.error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat(timespec="seconds") if self.checked_at else None,
+            "pool": pool_status(self.engine),
+        }
+
+
+class ReplicaSet:
+    def __init__(self):
+        self._replicas: Optional[list] = None
+        self._next = 0
+        self._sticky = {} # user id -> monotonic deadline
+        self._monitor: Optional[asyncio.Task] = None
+
+    @property
+    def replicas(self) -> list:
+        if self._replicas is None:
+            import database
+            self._replicas = [Replica(engine) for engine in database.replica_engines]
+        return self._replicas
+
+    def stick(self, user_id: int):
+        self._sticky[user_id] = time.monotonic() + config.REPLICA_STICKY_SECONDS
+
+    def is_sticky(self, user_id: int) -> bool:
+        deadline = self._sticky.get(user_id)
+        if deadline is None:
+            return False
+        if deadline <= time.monotonic():
+            self._sticky.pop(user_id, None)
+            return False
+        return True
+
+    def choose(self, user_id: Optional[int]) -> Optional[Replica]:
+        # Round-robin over healthy replicas; None means "use the primary"
+        if not self.replicas:
+            return None
+        self._ensure_monitor()
+        if user_id is not None and self.is_sticky(user_id):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    def mark_failed(self, replica: Replica, error: Exception):
+        if replica.healthy:
+            logger.warning("Replica %s failed, reads go elsewhere until it recovers: %s", replica.name, error)
+        replica.healthy = False
+        replica.error = str(error) or type(error).__name__ # A connect timeout has no message
+
+    async def _probe(self, replica: Replica) -> float:
+        async with replica.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return float(await conn.scalar(_PG_LAG_SQL))
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+
+    async def check(self, replica: Replica):
+        try:
+            lag = await asyncio.wait_for(self._probe(replica), timeout=config.REPLICA_CONNECT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.mark_failed(replica, TimeoutError(f"no answer within {config.REPLICA_CONNECT_TIMEOUT_SECONDS:g} s"))
+        except Exception as e:
+            self.mark_failed(replica, e)
+        else:
+            healthy = lag <= config.REPLICA_MAX_LAG_SECONDS
+            if healthy != replica.healthy:
+                if healthy:
+                    logger.info("Replica %s is back (lag %.1f s)", replica.name, lag)
+                else:
+                    logger.warning("Replica %s lags %.1f s, reads go elsewhere", replica.name, lag)
+            replica.healthy = healthy
+            replica.lag_seconds = lag
+            replica.error = None if healthy else f"lag {lag:.1f} s exceeds {config.REPLICA_MAX_LAG_SECONDS:g} s"
+        replica.checked_at = datetime.now(timezone.utc)
+
+    def _ensure_monitor(self):
+        if self._monitor is None or self._monitor.done() or self._monitor.get_loop() is not asyncio.get_running_loop():
+            self._monitor = asyncio.get_running_loop().create_task(self._monitor_loop())
+
+    async def _monitor_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            now = time.monotonic()
+            for user_id, deadline in list(self._sticky.items()):
+                if deadline <= now:
+                    self._sticky.pop(user_id, None)
+            await asyncio.sleep(config.REPLICA_HEALTH_INTERVAL_SECONDS)
+
+    def status(self) -> list:
+        # Empty until a read has been routed to the replicas; never builds their engines
+        return [replica.status() for replica in self._replicas or []]
+
+
+replica_set = ReplicaSet()
+
+
+def tag_user(user_id: int):
+    # Called by get_current_user, so a commit later in the request can be attributed to the user
+    _current_user.set(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_after_write(session):
+    # A commit on the primary inside an authenticated request: that user's next reads must see it
+    user_id = _current_user.get()
+    if user_id is not None and REPLICA_KEY not in session.info and config.DATABASE_REPLICA_URLS:
+        replica_set.stick(user_id)
@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, update, delete, insert, bindparam, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from core.upsert import dialect_insert
+
+
+# Daily sales rollups for the analytics endpoints. Like core/store_metrics.py, every sale write applies
+# its delta here inside the same transaction, so every bucket (including today's) is current and the
+# analytics queries never touch the sales table.
+
+async def apply_sale(db: AsyncSession, store_id: int, day: date, product_id: int, category: str, units: int, revenue: float):
+    # Pass negative units/revenue when a sale is deleted
+    totals = models.SalesDailyTotal.__table__
+    stmt = dialect_insert(db, totals).values(store_id=store_id, day=day, units=units, revenue=revenue)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[totals.c.store_id, totals.c.day],
+        set_={"units": totals.c.units + stmt.excluded.units, "revenue": totals.c.revenue + stmt.excluded.revenue},
+    ))
+
+    rollups = models.SalesDailyProductRollup.__table__
+    stmt = dialect_insert(db, rollups).values(
+        store_id=store_id, day=day, product_id=product_id, category=category, units=units, revenue=revenue
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[rollups.c.store_id, rollups.c.day, rollups.c.product_id],
+        set_={"units": rollups.c.units + stmt.excluded.units, "revenue": rollups.c.revenue + stmt.excluded.revenue},
+    ))
+
+
+async def revalue_product(db: AsyncSession, product_id: int, old_price: float, new_price: float):
+    # Revenue is valued at the current max_sell_price, so a price change re-values every day the product sold
+    await revalue_products(db, {product_id: (old_price, new_price)})
+
+
+async def revalue_products(db: AsyncSession, prices: dict):
+    # prices is {product_id: (old_price, new_price)}, with the products already updated in this transaction
+    rollups = models.SalesDailyProductRollup.__table__
+    totals = models.SalesDailyTotal.__table__
+    sold_days = (await db.execute(
+        select(rollups.c.store_id, rollups.c.day, rollups.c.product_id, rollups.c.units)
+        .where(rollups.c.product_id.in_(list(prices)))
+    )).all()
+    if not sold_days:
+        return
+    current_price = select(models.Product.max_sell_price).where(models.Product.id == rollups.c.product_id).scalar_subquery()
+    await db.execute(
+        update(rollups).where(rollups.c.product_id.in_(list(prices))).values(revenue=rollups.c.units * current_price)
+    )
+    deltas = {}
+    for store_id, day, product_id, units in sold_days:
+        old_price, new_price = prices[product_id]
+        deltas[(store_id, day)] = deltas.get((store_id, day), 0.0) + units * (new_price - old_price)
+    await db.execute(
+        update(totals)
+        .where(totals.c.store_id == bindparam("b_store_id"), totals.c.day == bindparam("b_day"))
+        .values(revenue=totals.c.revenue + bindparam("b_delta")),
+        [{"b_store_id": store_id, "b_day": day, "b_delta": delta} for (store_id, day), delta in deltas.items()],
+    )
+
+
+async def recategorize_product(db: AsyncSession, product_id: int, category: str):
+    rollups = models.SalesDailyProductRollup.__table__
+    await db.execute(update(rollups).where(rollups.c.product_id == product_id).values(category=category))
+
+
+async def recategorize_products(db: AsyncSession, product_ids: list):
+    # Copies each product's current category onto its rollups, for products already updated in this transaction
+    rollups = models.SalesDailyProductRollup.__table__
+    current_category = select(models.Product.category).where(models.Product.id == rollups.c.product_id).scalar_subquery()
+    await db.execute(update(rollups).where(rollups.c.product_id.in_(product_ids)).values(category=current_category))
+
+
+async def forget_product(db: AsyncSession, product_id: int):
+    # Called before a product is deleted; leftover zero-unit rows would otherwise block the FK
+    await forget_products(db, [product_id])
+
+
+async def forget_products(db: AsyncSession, product_ids):
+    # product_ids is a list or a SELECT of product ids
+    rollups = models.SalesDailyProductRollup.__table__
+    await db.execute(delete(rollups).where(rollups.c.product_id.in_(product_ids)))
+
+
+async def rebuild(db: AsyncSession, store_id: Optional[int] = None):
+    # Recompute both rollup tables from sales with two INSERT ... SELECT statements
+    totals = models.SalesDailyTotal.__table__
+    rollups = models.SalesDailyProductRollup.__table__
+    clear_totals, clear_rollups = delete(totals), delete(rollups)
+    totals_source = (
+        select(
+            models.Product.store_id, models.Sale.timestamp,
+            func.sum(models.Sale.quantity), func.sum(models.Sale.quantity * models.Product.max_sell_price),
+        )
+        .join(models.Product, models.Sale.product_id == models.Product.id)
+        .group_by(models.Product.store_id, models.Sale.timestamp)
+    )
+    rollups_source = (
+        select(
+            models.Product.store_id, models.Sale.timestamp, models.Sale.product_id, models.Product.category,
+            func.sum(models.Sale.quantity), func.sum(models.Sale.quantity * models.Product.max_sell_price),
+        )
+        .join(models.Product, models.Sale.product_id == models.Product.id)
+        .group_by(models.Product.store_id, models.Sale.timestamp, models.Sale.product_id, models.Product.category)
+    )
+    if store_id is not None:
+        clear_totals = clear_totals.where(totals.c.store_id == store_id)
+        clear_rollups = clear_rollups.where(rollups.c.store_id == store_id)
+        totals_source = totals_source.where(models.Product.store_id == store_id)
+        rollups_source = rollups_source.where(models.Product.store_id == store_id)
+
+    await db.execute(clear_totals)
+    await db.execute(clear_rollups)
+    await db.execute(insert(totals).from_select(["store_id", "day", "units", "revenue"], totals_source))
+    await db.execute(insert(rollups).from_select(
+        ["store_id", "day", "product_id", "category", "units", "revenue"], rollups_source
+    ))
+    await db.commit()
+
+
+async def _main(store_id: Optional[int]) -> int:
+    import database
+    async with database.AsyncSessionLocal() as db:
+        await rebuild(db, store_id)
+    print(f"Rebuilt sales rollups for {'store ' + str(store_id) if store_id is not None else 'all stores'}.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage (from server/): python -m core.sales_rollups [--store-id N]
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollup tables from the sales table.")
+    parser.add_argument("--store-id", type=int, default=None, help="Only this store (default: all stores)")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.store_id)))
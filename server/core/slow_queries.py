@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+
+from core import config
+from core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Slow-query recorder: statements slower than SLOW_QUERY_THRESHOLD_MS land in a bounded ring buffer with
+# the route and store that issued them, plus per-store, per-fingerprint aggregates. Bind values are never stored,
+# only their types. Read through GET /diagnostics/slow_queries, which only shows and clears the caller's store;
+# statements not tied to a store (startup, scripts, unauthenticated requests) stay visible in the server log.
+# Per process, like core/metrics.py.
+
+MAX_FINGERPRINTS = 500 # Aggregates kept; the least recently seen (store, fingerprint) is dropped beyond this
+
+
+class _RequestTag:
+    __slots__ = ("scope", "store_id")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.store_id = None
+
+
+_current_request: ContextVar[Optional[_RequestTag]] = ContextVar("slow_query_request", default=None)
+
+
+class SlowQueryMiddleware:
+    # Remembers which request (and, once authenticated, which store) is issuing statements
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_request.set(_RequestTag(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+
+
+def tag_store(store_id: int):
+    # Called by get_current_user so slow statements can be attributed to a tenant
+    tag = _current_request.get()
+    if tag is not None:
+        tag.store_id = store_id
+
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|\$\d+(?:::\w+)?|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+
+
+def normalize_sql(statement: str) -> str:
+    # Literals become ?, and IN (...)/multi-row VALUES lists collapse, so one query shape gets one fingerprint
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _VALUES_LIST.sub(r"\1, ...", sql)
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:12]
+
+
+def parameter_shape(parameters, executemany: bool):
+    # Types only, never values
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, max_entries: int):
+        self._lock = threading.Lock()
+        self.entries = deque(maxlen=max_entries)
+        self.aggregates: "OrderedDict[tuple, dict]" = OrderedDict() # (store_id, fingerprint) -> aggregate
+        self._last_explained = {} # fingerprint -> monotonic time of the last EXPLAIN
+
+    def record(self, entry: dict):
+        with self._lock:
+            self.entries.append(entry)
+            key = (entry["store_id"], entry["fingerprint"])
+            aggregate = self.aggregates.pop(key, None) or {
+                "fingerprint": entry["fingerprint"], "store_id": entry["store_id"], "sql": entry["sql"], "count": 0, "total_ms": 0.0,
+                "max_ms": 0.0, "routes": {},
+            }
+            aggregate["count"] += 1
+            aggregate["total_ms"] += entry["duration_ms"]
+            aggregate["max_ms"] = max(aggregate["max_ms"], entry["duration_ms"])
+            aggregate["last_seen"] = entry["at"]
+            aggregate["routes"][entry["route"]] = aggregate["routes"].get(entry["route"], 0) + 1
+            self.aggregates[key] = aggregate
+            while len(self.aggregates) > MAX_FINGERPRINTS:
+                self.aggregates.popitem(last=False)
+
+    def should_explain(self, key: str) -> bool:
+        # At most one EXPLAIN ANALYZE per fingerprint per interval: it runs the statement a second time
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(key)
+            if last is not None and now - last < config.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+                return False
+            self._last_explained[key] = now
+            if len(self._last_explained) > MAX_FINGERPRINTS:
+                self._last_explained.pop(next(iter(self._last_explained)))
+            return True
+
+    def snapshot(self, store_id: Optional[int] = None) -> dict:
+        # One store's entries and aggregates; every store's, and the untagged ones, when store_id is None
+        with self._lock:
+            entries = [dict(e) for e in self.entries if store_id is None or e["store_id"] == store_id]
+            aggregates = [
+                dict(a, routes=dict(a["routes"]), total_ms=round(a["total_ms"], 3), max_ms=round(a["max_ms"], 3),
+                     mean_ms=round(a["total_ms"] / a["count"], 3))
+                for a in self.aggregates.values() if store_id is None or a["store_id"] == store_id
+            ]
+        aggregates.sort(key=lambda a: a["total_ms"], reverse=True)
+        return {
+            "threshold_ms": config.SLOW_QUERY_THRESHOLD_MS,
+            "explain": config.SLOW_QUERY_EXPLAIN,
+            "recent": entries[::-1], # Newest first
+            "by_fingerprint": aggregates,
+        }
+
+    def clear(self, store_id: Optional[int] = None):
+        # Same scoping as snapshot; the EXPLAIN throttle is only reset when everything goes
+        with self._lock:
+            if store_id is None:
+                self.entries.clear()
+                self.aggregates.clear()
+                self._last_explained.clear()
+                return
+            kept = [e for e in self.entries if e["store_id"] != store_id]
+            self.entries.clear()
+            self.entries.extend(kept)
+            for key in [key for key in self.aggregates if key[0] == store_id]:
+                del self.aggregates[key]
+
+
+slow_query_log = SlowQueryLog(config.SLOW_QUERY_LOG_SIZE)
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    # Runs on a fresh DBAPI cursor (the original one still holds its results) inside a savepoint,
+    # so a failing EXPLAIN cannot abort the request's transaction
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            logger.warning(f"EXPLAIN failed for slow query: {e}")
+            return None
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine):
+    # Accepts a sync Engine or an AsyncEngine
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["slow_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info.pop("slow_query_start")) * 1000
+        if duration_ms < config.SLOW_QUERY_THRESHOLD_MS:
+            return
+
+        tag = _current_request.get()
+        route = f"{tag.scope['method']} {route_template(tag.scope)}" if tag is not None else None
+        store_id = tag.store_id if tag is not None else None
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        plan = None
+        if (
+            config.SLOW_QUERY_EXPLAIN
+            and conn.dialect.name == "postgresql"
+            and not executemany
+            and normalized[:6].upper() == "SELECT" # ANALYZE executes the statement again; never repeat a write
+            and not (context is not None and context.execution_options.get("stream_results"))
+            and slow_query_log.should_explain(key)
+        ):
+            plan = _explain(conn, statement, parameters)
+
+        slow_query_log.record({
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "fingerprint": key,
+            "sql": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "duration_ms": round(duration_ms, 3),
+            "route": route,
+            "store_id": store_id,
+            "plan": plan,
+        })
+        logger.warning(f"Slow query {key} took {duration_ms:.1f} ms (route: {route}, store: {store_id}): {normalized[:200]}")
@@ -0,0 +1,106 @@
+import importlib
+import logging
+import threading
+import time
+from contextlib import AsyncExitStack
+from typing import NamedTuple, Optional
+
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+# Cold-start helpers for main.create_app(). On a serverless platform every cold instance pays for importing the
+# app before it can answer, so routers are mounted on demand: the first request under /products imports only
+# routers/products.py (and what it needs), not the whole API. warm_up() does the opposite for long-lived
+# servers, or platforms that run the ASGI lifespan before routing traffic: it pays all of it up front.
+
+
+class RouterSpec(NamedTuple):
+    module: str # e.g. "routers.products", must define `router`
+    prefix: str
+    tags: list
+    match: Optional[str] = None # Path prefix that triggers the import; defaults to prefix
+
+
+class LazyRouters:
+    def __init__(self, app: FastAPI, specs: list):
+        self.app = app
+        self.pending = list(specs)
+        self._lock = threading.Lock()
+
+    def _include(self, spec: RouterSpec):
+        module = importlib.import_module(spec.module)
+        self.app.include_router(module.router, prefix=spec.prefix, tags=spec.tags)
+
+    def include_for(self, path: str):
+        # Mounts the router(s) serving path; the OpenAPI document needs every route
+        with self._lock:
+            load_all = path == self.app.openapi_url
+            for spec in list(self.pending):
+                match = spec.match or spec.prefix
+                if load_all or path == match or path.startswith(match + "/"):
+                    self._include(spec)
+                    self.pending.remove(spec)
+
+    def include_all(self):
+        with self._lock:
+            for spec in self.pending:
+                self._include(spec)
+            self.pending.clear()
+
+
+class LazyRouterMiddleware:
+    # Pure ASGI (no BaseHTTPMiddleware), so it also covers the WebSocket route; a no-op once everything is mounted
+    def __init__(self, app, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope, receive, send):
+        if self.routers.pending and scope["type"] in ("http", "websocket"):
+            self.routers.include_for(scope["path"])
+        await self.app(scope, receive, send)
+
+
+async def _open_connections(count: int):
+    # Holds `count` connections at once so the pool really opens that many, then returns them all
+    import database
+    async with AsyncExitStack() as stack:
+        for _ in range(count):
+            conn = await stack.enter_async_context(database.async_engine.connect())
+            await conn.execute(text("SELECT 1"))
+
+
+async def warm_up(routers: Optional[LazyRouters]):
+    # Lifespan startup work (APP_WARMUP). Each step is best effort: a database that is not reachable yet
+    # must not keep the app from starting, it only loses the head start.
+    from sqlalchemy.orm import configure_mappers
+    from auth_utils import security
+    from auth_utils.hash_pool import hash_pool
+
+    started = time.perf_counter()
+    steps = [
+        ("routers", lambda: routers.include_all() if routers is not None else None),
+        ("mappers", configure_mappers),
+        ("auth backends", security.load_backends),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+
+    # Without a pool (DB_POOL_MODE=null) a held connection is closed right away; one connect still
+    # initializes the dialect (server version, type info) before the first request
+    connections = 1 if config.DB_POOL_MODE != "queue" else min(config.APP_WARMUP_CONNECTIONS, config.DB_POOL_SIZE)
+    for name, step in (
+        ("connections", _open_connections(max(1, connections))),
+        ("password hashing pool", hash_pool.warm_up(security.load_backends)),
+    ):
+        try:
+            await step
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+    logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000)
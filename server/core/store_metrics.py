@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from core.upsert import dialect_insert
+
+
+# Incremental maintenance of models.StoreMetrics. Write paths call apply_delta() inside their own
+# transaction, right before commit, so the aggregate commits (or rolls back) together with the change
+# and the store's metrics row stays locked only briefly.
+
+async def apply_delta(db: AsyncSession, store_id: int, products: int = 0, items_sold: int = 0, sales_value: float = 0.0):
+    if not (products or items_sold or sales_value):
+        return
+    table = models.StoreMetrics.__table__
+    stmt = dialect_insert(db, table).values(
+        store_id=store_id, product_count=products, items_sold=items_sold, sales_value=sales_value
+    )
+    # Single atomic statement: creates the row for a new store, otherwise increments in place
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.store_id],
+        set_={
+            "product_count": table.c.product_count + stmt.excluded.product_count,
+            "items_sold": table.c.items_sold + stmt.excluded.items_sold,
+            "sales_value": table.c.sales_value + stmt.excluded.sales_value,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def units_sold(db: AsyncSession, store_id: int, product_id: int) -> int:
+    # Needed when max_sell_price changes: sales_value is valued at the product's current price
+    return await db.scalar(select(func.coalesce(func.sum(models.Sale.quantity), 0)).where(
+        models.Sale.store_id == store_id, # Served by ix_sales_store_id_product_id
+        models.Sale.product_id == product_id
+    ))
+
+
+async def units_sold_by_product(db: AsyncSession, store_id: int, product_ids: list) -> dict:
+    # units_sold() for many products at once: {product_id: units}, products without sales left out
+    rows = await db.execute(
+        select(models.Sale.product_id, func.sum(models.Sale.quantity))
+        .where(models.Sale.store_id == store_id, models.Sale.product_id.in_(product_ids))
+        .group_by(models.Sale.product_id)
+    )
+    return {product_id: units for product_id, units in rows}
+
+
+async def compute(db: AsyncSession, store_id: Optional[int] = None) -> dict:
+    # Full recomputation from base tables: {store_id: (product_count, items_sold, sales_value)}
+    products_query = select(models.Product.store_id, func.count(models.Product.id)).group_by(models.Product.store_id)
+    sales_query = (
+        select(
+            models.Product.store_id,
+            func.sum(models.Sale.quantity),
+            func.sum(models.Sale.quantity * models.Product.max_sell_price),
+        )
+        .join(models.Product, models.Sale.product_id == models.Product.id)
+        .group_by(models.Product.store_id)
+    )
+    stores_query = select(models.Store.id)
+    if store_id is not None:
+        products_query = products_query.where(models.Product.store_id == store_id)
+        sales_query = sales_query.where(models.Product.store_id == store_id)
+        stores_query = stores_query.where(models.Store.id == store_id)
+
+    totals = {sid: (0, 0, 0.0) for sid in (await db.execute(stores_query)).scalars()}
+    for sid, count in (await db.execute(products_query)).all():
+        totals[sid] = (count, 0, 0.0)
+    for sid, items, value in (await db.execute(sales_query)).all():
+        totals[sid] = (totals.get(sid, (0, 0, 0.0))[0], items or 0, value or 0.0)
+    return totals
+
+
+async def rebuild(db: AsyncSession, store_id: Optional[int] = None, check_only: bool = False) -> list:
+    # Reconcile stored aggregates with the base tables; returns [(store_id, stored, actual)] for rows that drifted
+    expected = await compute(db, store_id)
+    stored_query = select(
+        models.StoreMetrics.store_id, models.StoreMetrics.product_count,
+        models.StoreMetrics.items_sold, models.StoreMetrics.sales_value,
+    )
+    if store_id is not None:
+        stored_query = stored_query.where(models.StoreMetrics.store_id == store_id)
+    stored = {row[0]: tuple(row[1:]) for row in (await db.execute(stored_query)).all()}
+
+    drift = []
+    for sid, actual in expected.items():
+        current = stored.get(sid)
+        if current is None or current[:2] != actual[:2] or abs(current[2] - actual[2]) > 0.005:
+            drift.append((sid, current, actual))
+
+    if drift and not check_only:
+        table = models.StoreMetrics.__table__
+        stmt = dialect_insert(db, table).values([
+            {"store_id": sid, "product_count": actual[0], "items_sold": actual[1], "sales_value": actual[2]}
+            for sid, _, actual in drift
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.store_id],
+            set_={
+                "product_count": stmt.excluded.product_count,
+                "items_sold": stmt.excluded.items_sold,
+                "sales_value": stmt.excluded.sales_value,
+            },
+        )
+        await db.execute(stmt)
+        await db.commit()
+    return drift
+
+
+async def _main(store_id: int, check_only: bool) -> int:
+    import database
+    async with database.AsyncSessionLocal() as db:
+        drift = await rebuild(db, store_id, check_only)
+    for sid, stored, actual in drift:
+        print(f"store {sid}: stored={stored} actual={actual}")
+    action = "found" if check_only else "repaired"
+    print(f"{len(drift)} store(s) with drifted metrics {action}.")
+    return 1 if (drift and check_only) else 0
+
+
+if __name__ == "__main__":
+    # Usage (from server/): python -m core.store_metrics [--store-id N] [--check]
+    parser = argparse.ArgumentParser(description="Rebuild or check the store_metrics dashboard aggregates.")
+    parser.add_argument("--store-id", type=int, default=None, help="Only this store (default: all stores)")
+    parser.add_argument("--check", action="store_true", help="Report drift without writing; exit 1 if any")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.store_id, args.check)))
@@ -0,0 +1,200 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import traceback
+from datetime import datetime, timezone
+from typing import Optional
+
+from core import config
+
+# Non-blocking logging: route handlers only put LogRecords on a bounded queue; a writer thread formats them
+# (JSON lines by default) and writes them to stderr in batches. Records are queued with their msg/args untouched, so
+# the %-interpolation happens on the writer thread too: prefer logger.info("... %s", value) over f-strings
+# on hot paths. When the queue is full, records are dropped and counted rather than blocking the event loop.
+# LOG_SAMPLE_RATES thins out high-volume INFO (and DEBUG) lines per logger; warnings and errors always pass.
+
+# LogRecord attributes that are not user-supplied extras
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value # logger.info("...", extra={"store_id": 3}) becomes a field
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps 1 in round(1 / rate) INFO-or-lower records for each configured logger (or logger prefix)
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self._every = {name: max(1, round(1 / rate)) if rate > 0 else 0 for name, rate in rates.items()}
+        self._counts = {}
+        self._resolved = {} # logger name -> configured name it falls under (or None)
+
+    def _rule(self, name: str) -> Optional[str]:
+        if name not in self._resolved:
+            match = None
+            for configured in self._every:
+                if (name == configured or name.startswith(configured + ".")) and (match is None or len(configured) > len(match)):
+                    match = configured
+            self._resolved[name] = match
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rule = self._rule(record.name)
+        if rule is None:
+            return True
+        every = self._every[rule]
+        if every == 0:
+            return False
+        count = self._counts.get(rule, 0) # Approximate under threads; exact on the event loop
+        self._counts[rule] = count + 1
+        return count % every == 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the stdlib QueueHandler, leave msg/args for the writer thread to interpolate. Tracebacks are
+        # rendered here, since frames change after the except block ends (rare path).
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # SimpleQueue is lock-free for the producer; the bound is a size check, which is enough for a drop policy
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+        else:
+            self.queue.put(record)
+
+
+class _Writer(threading.Thread):
+    # Drains the queue in batches: one write and one flush per batch instead of per record
+    MAX_BATCH = 512
+
+    def __init__(self, log_queue: queue.SimpleQueue, handler: logging.StreamHandler):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.handler = handler
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            records = [self.queue.get()]
+            while len(records) < self.MAX_BATCH:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in records: # Sentinel from stop(); everything queued before it is in this batch
+                records = [record for record in records if record is not None]
+                stopping = True
+            lines = []
+            for record in records:
+                try:
+                    lines.append(self.handler.format(record))
+                except Exception:
+                    self.handler.handleError(record)
+            if lines:
+                try:
+                    self.handler.stream.write("\n".join(lines) + "\n")
+                    self.handler.flush()
+                except Exception:
+                    self.handler.handleError(records[-1])
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
+
+
+# uvicorn installs its own stderr handlers (access log included) before importing the app; sending them
+# through the queue as well keeps those writes off the event loop and lets LOG_SAMPLE_RATES cover them
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_state = {}
+_lock = threading.Lock()
+
+
+def dropped_records() -> int:
+    # Exported as log_records_dropped_total by GET /metrics
+    handler = _state.get("handler")
+    return handler.dropped if handler is not None else 0
+
+
+def parse_sample_rates(value: str) -> dict:
+    # "routers.sales=0.1,routers.auth=0.25" -> {"routers.sales": 0.1, "routers.auth": 0.25}
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def configure_logging(level: Optional[str] = None, stream=None) -> NonBlockingQueueHandler:
+    # Installs the queue handler on the root logger and starts the writer thread (once per process)
+    with _lock:
+        if "handler" in _state:
+            return _state["handler"]
+        log_queue = queue.SimpleQueue()
+        writer = logging.StreamHandler(stream or sys.stderr)
+        if config.LOG_FORMAT == "json":
+            writer.setFormatter(JsonFormatter())
+        else:
+            writer.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+        handler = NonBlockingQueueHandler(log_queue, config.LOG_QUEUE_SIZE)
+        rates = parse_sample_rates(config.LOG_SAMPLE_RATES)
+        if rates:
+            handler.addFilter(SamplingFilter(rates))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level or config.LOG_LEVEL)
+        for name in UVICORN_LOGGERS:
+            logging.getLogger(name).handlers.clear()
+            logging.getLogger(name).propagate = True
+
+        listener = _Writer(log_queue, writer)
+        listener.start()
+        atexit.register(listener.stop) # Drains what is still queued
+        _state.update(handler=handler, listener=listener)
+        return handler
+
+
+def shutdown_logging():
+    # Stops the writer thread after flushing the queue; configure_logging() can install a fresh pipeline afterwards
+    with _lock:
+        listener = _state.pop("listener", None)
+        handler = _state.pop("handler", None)
+    if listener is not None:
+        listener.stop()
+        atexit.unregister(listener.stop)
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
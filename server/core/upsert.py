@@ -0,0 +1,11 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db, table):
+    # INSERT construct with .on_conflict_do_update() for the session's backend (Postgres in production, SQLite locally)
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upsert is not supported on the {dialect_name} dialect")
@@ -1,25 +1,87 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker
 import os
+import threading
 from dotenv import load_dotenv
 
 # Always load .env from the server directory
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 
+from core import config # After load_dotenv so settings read from .env are picked up
+from core.engine_factory import build_engine, build_async_engine, to_async_url
+
 USER = os.getenv("USER")
 PASSWORD = os.getenv("PASSWORD")
 HOST = os.getenv("HOST")
 PORT = os.getenv("PORT")
 DBNAME = os.getenv("DBNAME")
 
-print("USER:", USER)
-print("PASSWORD:", PASSWORD)
-print("HOST:", HOST)
-print("PORT:", PORT)
-print("DBNAME:", DBNAME)
+# DATABASE_URL (e.g. sqlite:///./test.db) takes precedence over the individual connection variables
+DATABASE_URL = config.DATABASE_URL or f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
+
+# Async driver URL used by the routers. Defaults to DATABASE_URL through the matching async driver.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
 
-DATABASE_URL = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
+# Read replicas, through the async driver as well (routing in core/replicas.py)
+REPLICA_URLS = [to_async_url(url.strip()) for url in config.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
-engine = create_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# engine, SessionLocal, async_engine, AsyncSessionLocal and replica_engines are built on first access (module __getattr__), so
+# importing this module (every router does) neither loads a DB driver nor creates a pool. On a serverless
+# cold start that work then happens on the first request that needs the database, or in the warm-up.
+#
+# Route handlers are async def, so they use async_engine to avoid blocking the event loop on queries.
+# expire_on_commit=False keeps attributes loaded after commit (no implicit lazy IO outside an await).
+_ENGINE_ATTRS = ("engine", "SessionLocal", "async_engine", "AsyncSessionLocal", "replica_engines")
+_engines = {}
+_engine_hooks = []
+_lock = threading.Lock()
+
+
+def _build(name: str):
+    # Returns (new engines, module attributes to set)
+    if name in ("engine", "SessionLocal"):
+        # Pool mode, sizing and echo come from core.config (DB_POOL_MODE, DB_POOL_SIZE, ...)
+        engine = build_engine(DATABASE_URL)
+        return [engine], {"engine": engine, "SessionLocal": sessionmaker(autocommit=False, autoflush=False, bind=engine)}
+    if name == "replica_engines":
+        # Sessions on a replica come from AsyncSessionLocal(bind=...), so they share its settings
+        engines = [build_async_engine(url) for url in REPLICA_URLS]
+        return engines, {"replica_engines": engines}
+    engine = build_async_engine(ASYNC_DATABASE_URL)
+    return [engine], {
+        "async_engine": engine,
+        "AsyncSessionLocal": async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False),
+    }
+
+
+def __getattr__(name: str):
+    if name not in _ENGINE_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        if name not in _engines:
+            engines, built = _build(name)
+            for engine in engines:
+                for hook in _engine_hooks:
+                    hook(engine)
+            _engines.update(built)
+            globals().update(built) # Later lookups are plain module attributes
+    return _engines[name]
+
+
+def built_engines() -> dict:
+    # The engines created so far, without building the rest: {"engine": ..., "async_engine": ..., "replica_engines": [...]}
+    with _lock:
+        return {name: _engines[name] for name in ("engine", "async_engine", "replica_engines") if name in _engines}
+
+
+def on_engine_created(hook):
+    # hook(engine) runs for each engine when it is built, and right away for engines that already exist.
+    # Used for event-listener instrumentation (core/metrics.py, core/slow_queries.py).
+    with _lock:
+        _engine_hooks.append(hook)
+        existing = [_engines[name] for name in ("engine", "async_engine") if name in _engines]
+        existing += _engines.get("replica_engines", [])
+    for engine in existing:
+        hook(engine)
@@ -2,13 +2,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import asyncio
 import logging
 
 import database
 import models
-from core import config
+from core import config, slow_queries
+from core.replicas import REPLICA_KEY, replica_set, tag_user
 from auth_utils import security # For verify_password, get_password_hash, create_access_token
+from auth_utils.principal_cache import Principal, principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +25,10 @@ def get_db():
     finally:
         db.close()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     if token is None: # Handle case where token is not provided (due to auto_error=False)
         logger.warning("No token provided for authentication.")
         raise HTTPException(
@@ -30,6 +37,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    from jose import JWTError, jwt # Deferred: see auth_utils/security.py
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -44,10 +53,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         if sub is None or role is None or user_id is None:
             logger.warning(f"Token missing sub, role, or id. Payload: {payload}")
             raise credentials_exception
-        
-        user = None
+
+        # Common case: the principal for this exact token was verified recently, skip the users lookup
+        issued_at = payload.get("iat", 0)
+        cached = principal_cache.get(user_id, issued_at)
+        if cached is not None and cached.role == role and (role != "admin" or cached.email == sub):
+            slow_queries.tag_store(cached.store_id)
+            tag_user(cached.id)
+            return cached
+
         # Fetch user by ID and verify role from token matches DB role for extra security
-        db_user = db.query(models.User).filter(models.User.id == user_id).first()
+        db_user = (await db.execute(select(models.User).where(models.User.id == user_id))).scalars().first()
 
         if not db_user:
             logger.warning(f"User with id {user_id} not found in DB.")
@@ -69,8 +85,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         # elif role == "employee" and db_user.username != sub: # Assuming employee uses username as sub
         #     logger.warning(f"Employee token sub {sub} does not match DB username {db_user.username} for user id {user_id}.")
         #     raise credentials_exception
-            
-        return db_user # Return the user model instance
+
+        principal = Principal.from_user(db_user)
+        principal_cache.put(issued_at, principal)
+        slow_queries.tag_store(principal.store_id)
+        tag_user(principal.id)
+        return principal # Detached snapshot of the user row, shared with later requests via the cache
     except JWTError as e:
         logger.error(f"JWTError decoding token: {e}")
         raise credentials_exception
@@ -78,6 +98,27 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         logger.error(f"Unexpected error in get_current_user: {e}")
         raise credentials_exception
 
+# Session for read-only endpoints: a healthy read replica when DATABASE_REPLICA_URLS is set, unless this user
+# wrote recently (see core/replicas.py); the primary otherwise
+async def get_read_db(current_user: models.User = Depends(get_current_user)):
+    db = None
+    replica = replica_set.choose(current_user.id)
+    while replica is not None and db is None:
+        db = database.AsyncSessionLocal(bind=replica.engine, info={REPLICA_KEY: replica.name})
+        try:
+            await asyncio.wait_for(db.connection(), timeout=config.REPLICA_CONNECT_TIMEOUT_SECONDS)
+        except Exception as e:
+            await db.close()
+            db = None
+            replica_set.mark_failed(replica, e) # Takes it out of rotation, so the next choice is another one
+            replica = replica_set.choose(current_user.id)
+    if db is None:
+        db = database.AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
 def admin_required(current_user: models.User = Depends(get_current_user)):
     if current_user.role != "admin":
         logger.warning(f"Admin access denied for user: {current_user.email if hasattr(current_user, 'email') else current_user.id} with role {current_user.role}")
@@ -1,42 +1,83 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 # Changed to absolute imports assuming 'server' is the root for Vercel
-import models
-import database 
-from routers import auth, products, sales, dashboard
+import database
 from core import config
+from core.metrics import MetricsMiddleware, instrument_engine as instrument_metrics
+from core.slow_queries import SlowQueryMiddleware, instrument_engine as instrument_slow_queries
+from core.startup import LazyRouters, LazyRouterMiddleware, RouterSpec, warm_up
+from core.structured_logging import configure_logging
 
 # models.Base.metadata.create_all(bind=database.engine) # Commented out for Vercel deployment
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-# Allow CORS for local frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], # Consider restricting this in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Routers, mounted up front or, with APP_LAZY_ROUTERS, on the first request under their prefix (core/startup.py)
+ROUTERS = [
+    RouterSpec("routers.auth", "/auth", ["authentication"]),
+    RouterSpec("routers.products", "/products", ["products"]),
+    RouterSpec("routers.sales", "/sales", ["sales"]),
+    RouterSpec("routers.dashboard", "/dashboard", ["dashboard"]),
+    RouterSpec("routers.analytics", "/analytics", ["analytics"]),
+    RouterSpec("routers.diagnostics", "/diagnostics", ["diagnostics"]),
+    RouterSpec("routers.push", "/push", ["push"]),
+]
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+def create_app() -> FastAPI:
+    # Cheap to call: engines are created on first use (database.py) and, with APP_LAZY_ROUTERS, routers too
+    configure_logging() # Queue + writer thread instead of synchronous stderr writes on the event loop
+    specs = list(ROUTERS)
+    if config.METRICS_ENABLED:
+        specs.append(RouterSpec("routers.metrics", "", ["metrics"], match="/metrics"))
+
+    routers = None
+    lifespan = None
+    if config.APP_WARMUP:
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            await warm_up(routers)
+            yield
+
+    app = FastAPI(lifespan=lifespan)
+
+    # Allow CORS for local frontend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"], # Consider restricting this in production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if config.SLOW_QUERY_THRESHOLD_MS > 0:
+        app.add_middleware(SlowQueryMiddleware)
+        database.on_engine_created(instrument_slow_queries)
 
-# Include routers
-app.include_router(auth.router, prefix="/auth", tags=["authentication"])
-app.include_router(products.router, prefix="/products", tags=["products"])
-app.include_router(sales.router, prefix="/sales", tags=["sales"])
-app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+    if config.METRICS_ENABLED:
+        # Added last so it wraps CORS too and times the whole request
+        app.add_middleware(MetricsMiddleware)
+        database.on_engine_created(instrument_metrics)
+
+    routers = LazyRouters(app, specs)
+    if config.APP_LAZY_ROUTERS:
+        app.add_middleware(LazyRouterMiddleware, routers=routers) # Outermost, so routes exist before anything else runs
+    else:
+        routers.include_all()
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to the Product Registration API"}
+
+    return app
+
+app = create_app()
 
 # Example of how to access config if needed here, though typically not.
 # logger.info(f"SECRET_KEY from config: {config.SECRET_KEY}")
 
-@app.get("/")
-async def root():
-    return {"message": "Welcome to the Product Registration API"}
-
 # Ensure any remaining specific endpoint logic previously in main.py is moved to appropriate routers.
 # For example, if there were any root-level endpoints or general utility endpoints not fitting elsewhere.
 # Based on the refactoring, most logic should now reside in the 'routers' modules
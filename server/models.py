@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, DDL, JSON, event, text
 from sqlalchemy.orm import relationship
 from database import Base # Changed to absolute import
 
@@ -37,17 +37,137 @@ class Product(Base):
     max_sell_price = Column(Float, nullable=False)
     date = Column(Date, nullable=False)
     net_profit = Column(Float, nullable=False)
+    sku = Column(String, nullable=True) # SKU or barcode as scanned at the till; unique within a store
+    change_version = Column(Integer, nullable=False, default=0, server_default="0") # Store sync version of the last write (core/product_sync.py)
     store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     store = relationship("Store", back_populates="products")
     sales = relationship("Sale", back_populates="product")
 
+    # Composite indexes backing keyset pagination and server-side filters on GET /products
+    __table_args__ = (
+        Index("ix_products_store_id_id", "store_id", "id"),
+        Index("ix_products_store_id_category_id", "store_id", "category", "id"),
+        Index("ix_products_store_id_name_id", "store_id", "name", "id"),
+        Index("ix_products_store_id_date_id", "store_id", "date", "id"),
+        Index("ix_products_store_id_purchase_price_id", "store_id", "purchase_price", "id"),
+        Index("ix_products_store_id_quantity_id", "store_id", "quantity", "id"),
+        Index("ux_products_store_id_sku", "store_id", "sku", unique=True), # Scan lookups; NULL SKUs don't collide
+        Index("ix_products_store_id_change_version_id", "store_id", "change_version", "id"), # GET /products/changes
+        # Trigram index for GET /products/search on Postgres (SQLite uses an FTS5 table, see core/product_search.py)
+        Index(
+            "ix_products_store_id_name_trgm", text("store_id"), text("lower(name) gin_trgm_ops"), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
 class Sale(Base):
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False) # Copy of the product's store, so tenant filters skip the join
     quantity = Column(Integer, nullable=False)
     timestamp = Column(Date, nullable=False)
     product = relationship("Product", back_populates="sales")
     user = relationship("User", back_populates="sales")
+
+    # Tenant-scoped composite indexes: date-ordered listing/export and per-product sales within a store
+    __table_args__ = (
+        Index("ix_sales_store_id_timestamp_id", "store_id", "timestamp", "id"),
+        Index("ix_sales_store_id_product_id", "store_id", "product_id"),
+    )
+
+class StoreSyncVersion(Base):
+    # Per-store product change counter for the delta sync feed (see core/product_sync.py)
+    __tablename__ = "store_sync_versions"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    compacted_version = Column(Integer, nullable=False, default=0) # Tombstones up to this version have been purged
+
+class ProductTombstone(Base):
+    # Deleted product ids, served by GET /products/changes until compacted
+    __tablename__ = "product_tombstones"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    change_version = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True) # No FK: the product row is gone
+    deleted_at = Column(DateTime, nullable=False) # UTC
+
+    __table_args__ = (
+        Index("ix_product_tombstones_deleted_at", "deleted_at"),
+    )
+
+class StoreMetrics(Base):
+    # Per-store dashboard aggregates, kept current by the product/sale write paths (see core/store_metrics.py)
+    __tablename__ = "store_metrics"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    product_count = Column(Integer, nullable=False, default=0)
+    items_sold = Column(Integer, nullable=False, default=0)
+    sales_value = Column(Float, nullable=False, default=0.0) # Sum of sale quantity * product max_sell_price
+
+class SalesDailyTotal(Base):
+    # Per-store daily sales totals for time-series analytics (see core/sales_rollups.py)
+    __tablename__ = "sales_daily_totals"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0) # Valued at the product's max_sell_price, like StoreMetrics
+
+class SalesDailyProductRollup(Base):
+    # Per-store, per-day, per-product sales for top-N product and category analytics
+    __tablename__ = "sales_daily_product_rollups"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    category = Column(String, nullable=False)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_sales_daily_product_rollups_product_id", "product_id"),
+    )
+
+class ProductDemand(Base):
+    # Rolling window of a product's daily units sold, for demand forecasting (see core/demand.py)
+    __tablename__ = "product_demand"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    window_end = Column(Date, nullable=False) # Day of the last entry in daily_units
+    daily_units = Column(JSON, nullable=False) # DEMAND_WINDOW_DAYS integers, oldest day first
+
+# Extensions behind ix_products_store_id_name_trgm (btree_gin lets store_id share the GIN index)
+for _extension in ("pg_trgm", "btree_gin"):
+    event.listen(
+        Base.metadata, "before_create", DDL(f"CREATE EXTENSION IF NOT EXISTS {_extension}").execute_if(dialect="postgresql")
+    )
+
+# SQLite stand-in for that index: an FTS5 trigram table over products.name, kept in sync by triggers (queried by
+# core/product_search.py). Created with the tables here and by the add_sqlite_product_fts migration; the trigram
+# tokenizer needs SQLite 3.34+, and without it search scans the store in-process.
+SQLITE_PRODUCTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, content='products', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); END",
+)
+
+def sqlite_fts_trigram_available(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    version = tuple(int(part) for part in connection.exec_driver_sql("SELECT sqlite_version()").scalar().split("."))
+    return version >= (3, 34) and bool(connection.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+for _statement in SQLITE_PRODUCTS_FTS_DDL:
+    event.listen(
+        Product.__table__, "after_create",
+        DDL(_statement).execute_if(callable_=lambda ddl, target, bind, **kw: sqlite_fts_trigram_available(bind))
+    )
@@ -0,0 +1,191 @@
+\
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import List, Optional
+from datetime import date, timedelta
+import logging
+
+import models
+import schemas
+from dependencies import auth_deps
+from core import config
+from core.demand import reorder_suggestions
+from core.profit_report import profit_cache, profit_figures, realized_profit
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MAX_RANGE_DAYS = 3660 # About ten years of daily buckets
+
+# All analytics read the daily rollup tables maintained by core/sales_rollups.py, never the sales table.
+
+def _resolve_range(start: Optional[date], end: Optional[date]) -> tuple[date, date]:
+    end = end or date.today()
+    start = start or end - timedelta(days=29) # Default: the last 30 days
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be on or before end")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+    return start, end
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def _next_bucket(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+@router.get("/sales", response_model=schemas.SalesTimeSeriesOut)
+async def sales_over_time(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = Query(default="day", pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    start, end = _resolve_range(start, end)
+    logger.info("Admin %s requesting %s sales for store %s from %s to %s", current_user.id, bucket, current_user.store_id, start, end)
+    rows = (await db.execute(
+        select(models.SalesDailyTotal.day, models.SalesDailyTotal.units, models.SalesDailyTotal.revenue)
+        .where(
+            models.SalesDailyTotal.store_id == current_user.store_id,
+            models.SalesDailyTotal.day >= start,
+            models.SalesDailyTotal.day <= end
+        )
+    )).all()
+
+    # At most one row per day, so week/month bucketing in Python is cheap; empty buckets are zero-filled
+    totals = {}
+    for day, units, revenue in rows:
+        key = _bucket_start(day, bucket)
+        current_units, current_revenue = totals.get(key, (0, 0.0))
+        totals[key] = (current_units + units, current_revenue + revenue)
+
+    points = []
+    period = _bucket_start(start, bucket)
+    while period <= end:
+        units, revenue = totals.get(period, (0, 0.0))
+        points.append(schemas.SalesBucketOut(period_start=period, units=units, revenue=round(revenue, 2)))
+        period = _next_bucket(period, bucket)
+    return schemas.SalesTimeSeriesOut(bucket=bucket, start=start, end=end, points=points)
+
+@router.get("/top-products", response_model=List[schemas.TopProductOut])
+async def top_products(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(default=10, ge=1, le=100),
+    order_by: str = Query(default="revenue", pattern="^(revenue|units)$"),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    start, end = _resolve_range(start, end)
+    rollup = models.SalesDailyProductRollup
+    units = func.sum(rollup.units).label("units")
+    revenue = func.sum(rollup.revenue).label("revenue")
+    ranked = (
+        select(rollup.product_id, units, revenue)
+        .where(rollup.store_id == current_user.store_id, rollup.day >= start, rollup.day <= end)
+        .group_by(rollup.product_id)
+        .having(func.sum(rollup.units) > 0)
+        .order_by((revenue if order_by == "revenue" else units).desc(), rollup.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(ranked.c.product_id, models.Product.name, models.Product.category, ranked.c.units, ranked.c.revenue)
+        .join(models.Product, models.Product.id == ranked.c.product_id)
+        .order_by((ranked.c.revenue if order_by == "revenue" else ranked.c.units).desc(), ranked.c.product_id)
+    )).all()
+    return [
+        schemas.TopProductOut(product_id=product_id, name=name, category=category, units=units, revenue=round(revenue, 2))
+        for product_id, name, category, units, revenue in rows
+    ]
+
+@router.get("/top-categories", response_model=List[schemas.TopCategoryOut])
+async def top_categories(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(default=10, ge=1, le=100),
+    order_by: str = Query(default="revenue", pattern="^(revenue|units)$"),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    start, end = _resolve_range(start, end)
+    rollup = models.SalesDailyProductRollup
+    units = func.sum(rollup.units).label("units")
+    revenue = func.sum(rollup.revenue).label("revenue")
+    rows = (await db.execute(
+        select(rollup.category, units, revenue)
+        .where(rollup.store_id == current_user.store_id, rollup.day >= start, rollup.day <= end)
+        .group_by(rollup.category)
+        .having(func.sum(rollup.units) > 0)
+        .order_by((revenue if order_by == "revenue" else units).desc(), rollup.category)
+        .limit(limit)
+    )).all()
+    return [
+        schemas.TopCategoryOut(category=category, units=units, revenue=round(revenue, 2))
+        for category, units, revenue in rows
+    ]
+
+# Realized profit of the units sold in the range, per product, category or period (see core/profit_report.py)
+@router.get("/profit", response_model=schemas.ProfitReportOut)
+async def profit_report(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: str = Query(default="product", pattern="^(product|category|period)$"),
+    bucket: str = Query(default="day", pattern="^(day|week|month)$"), # For group_by=period
+    limit: int = Query(default=50, ge=1, le=1000), # Top groups by profit, for product and category
+    db: AsyncSession = Depends(auth_deps.get_read_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    start, end = _resolve_range(start, end)
+    logger.info("Admin %s requesting profit by %s for store %s from %s to %s", current_user.id, group_by, current_user.store_id, start, end)
+    report, cached = await realized_profit(db, current_user.store_id, start, end, group_by, limit if group_by != "period" else 0)
+    groups = report["groups"]
+    if group_by == "period":
+        # Days fold into buckets in Python (at most one row per day); empty buckets are zero-filled
+        sums = {}
+        for group in groups:
+            key = _bucket_start(group["period_start"], bucket)
+            units, revenue, cost = sums.get(key, (0, 0.0, 0.0))
+            sums[key] = (units + group["units"], revenue + group["revenue"], cost + group["cost"])
+        groups = []
+        period = _bucket_start(start, bucket)
+        while period <= end:
+            units, revenue, cost = sums.get(period, (0, 0.0, 0.0))
+            groups.append(dict(period_start=period, **profit_figures(units, revenue, cost)))
+            period = _next_bucket(period, bucket)
+    return schemas.ProfitReportOut(
+        group_by=group_by, bucket=bucket if group_by == "period" else None, start=start, end=end,
+        total=report["total"], groups=groups, cached=cached,
+    )
+
+# Profit report cache hit/miss counters for this worker (admin only)
+@router.get("/profit/cache_stats")
+async def profit_cache_stats(current_user: models.User = Depends(auth_deps.admin_required)):
+    return profit_cache.stats()
+
+# Products forecast to run short, soonest stockout first (see core/demand.py)
+@router.get("/reorder", response_model=schemas.ReorderReportOut)
+async def reorder_report(
+    as_of: Optional[date] = None, # Day the forecast starts from, its own sales left out as incomplete; defaults to today
+    horizon_days: int = Query(default=14, ge=1, le=90), # Days the reorder should cover once it arrives
+    lead_time_days: int = Query(default=7, ge=0, le=90), # Days until a reorder arrives
+    limit: int = Query(default=50, ge=1, le=1000),
+    db: AsyncSession = Depends(auth_deps.get_read_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    as_of = as_of or date.today()
+    logger.info("Admin %s requesting reorder suggestions for store %s as of %s", current_user.id, current_user.store_id, as_of)
+    items = await reorder_suggestions(db, current_user.store_id, as_of, horizon_days, lead_time_days, limit)
+    return schemas.ReorderReportOut(
+        as_of=as_of, window_days=config.DEMAND_WINDOW_DAYS, horizon_days=horizon_days, lead_time_days=lead_time_days, items=items,
+    )
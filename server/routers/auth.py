@@ -1,7 +1,8 @@
 \
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordRequestForm # Added back this import
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import Any, Optional, Union # Added Union
 
 import schemas
@@ -9,6 +10,8 @@ import models
 import database
 from dependencies import auth_deps
 from auth_utils import security
+from auth_utils.principal_cache import principal_cache
+from auth_utils.hash_pool import hash_pool
 from core import config
 import logging
 
@@ -17,10 +20,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/login_admin", response_model=schemas.Token)
-async def login_admin_for_access_token(admin_credentials: schemas.AdminLogin, db: Session = Depends(auth_deps.get_db)): # Changed from OAuth2PasswordRequestForm
-    logger.info(f"Admin login attempt for email: {admin_credentials.email}") # Changed from form_data.username
-    user = db.query(models.User).filter(models.User.email == admin_credentials.email, models.User.role == "admin").first() # Changed
-    if not user or not security.verify_password(admin_credentials.password, user.hashed_password): # Changed from form_data.password
+async def login_admin_for_access_token(admin_credentials: schemas.AdminLogin, db: AsyncSession = Depends(auth_deps.get_async_db)): # Changed from OAuth2PasswordRequestForm
+    logger.info("Admin login attempt for email: %s", admin_credentials.email) # Changed from form_data.username
+    user = (await db.execute(select(models.User).where(models.User.email == admin_credentials.email, models.User.role == "admin"))).scalars().first()
+    if not user or not await security.verify_password_async(admin_credentials.password, user.hashed_password):
         logger.warning(f"Admin login failed for email: {admin_credentials.email}") # Changed
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,16 +33,16 @@ async def login_admin_for_access_token(admin_credentials: schemas.AdminLogin, db
     access_token = security.create_access_token(
         data={"sub": user.email, "role": user.role, "id": user.id}
     )
-    logger.info(f"Admin login successful for email: {admin_credentials.email}") # Changed
+    logger.info("Admin login successful for email: %s", admin_credentials.email) # Changed
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login_employee", response_model=schemas.Token)
-async def login_employee_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(auth_deps.get_db)):
-    logger.info(f"Employee login attempt for username: {form_data.username}")
+async def login_employee_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(auth_deps.get_async_db)):
+    logger.info("Employee login attempt for username: %s", form_data.username)
     # Assuming employee username is stored in 'email' field for simplicity, or a dedicated 'username' field.
     # Adjust query if employees use a different field for login (e.g., models.User.username)
-    user = db.query(models.User).filter(models.User.email == form_data.username, models.User.role == "employee").first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = (await db.execute(select(models.User).where(models.User.email == form_data.username, models.User.role == "employee"))).scalars().first()
+    if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
         logger.warning(f"Employee login failed for username: {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,38 +53,36 @@ async def login_employee_for_access_token(form_data: OAuth2PasswordRequestForm =
     access_token = security.create_access_token(
         data={"sub": user.email, "role": user.role, "id": user.id} # Or user.username if that's the login identifier
     )
-    logger.info(f"Employee login successful for username: {form_data.username}")
+    logger.info("Employee login successful for username: %s", form_data.username)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register_admin", response_model=schemas.AdminOut, status_code=status.HTTP_201_CREATED) # Changed response_model to AdminOut
 async def register_admin_and_store(
     admin_data: schemas.AdminStoreRegister,
-    db: Session = Depends(auth_deps.get_db)
+    db: AsyncSession = Depends(auth_deps.get_async_db)
 ):
-    logger.info(f"Admin registration attempt for email: {admin_data.email} and store: {admin_data.store_name}")
+    logger.info("Admin registration attempt for email: %s and store: %s", admin_data.email, admin_data.store_name)
 
-    existing_store_by_name = db.query(models.Store).filter(models.Store.name == admin_data.store_name).first()
+    existing_store_by_name = (await db.execute(select(models.Store).where(models.Store.name == admin_data.store_name))).scalars().first()
     if existing_store_by_name:
         logger.warning(f"Admin registration failed. Store name already exists: {admin_data.store_name}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Store name already registered.")
     
-    existing_user_by_email = db.query(models.User).filter(models.User.email == admin_data.email).first()
+    existing_user_by_email = (await db.execute(select(models.User).where(models.User.email == admin_data.email))).scalars().first()
     if existing_user_by_email:
         logger.warning(f"Admin registration failed. Email already registered: {admin_data.email}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered.")
 
-    # Create the store first
+    # Hash before writing anything: the hash pool can reject with a 503, which must not leave a store without its admin
+    hashed_password = await security.get_password_hash_async(admin_data.password)
+
+    # Store and admin go in one transaction; the flush assigns the store's id
     new_store = models.Store(
         name=admin_data.store_name,
     )
     db.add(new_store)
-    db.commit()
-    db.refresh(new_store)
-    logger.info(f"Store created successfully: {new_store.name} with ID: {new_store.id}")
+    await db.flush()
 
-    # Now create the admin user
-    hashed_password = security.get_password_hash(admin_data.password)
-    
     # Ensure all fields expected by models.User are present and correctly named
     new_admin_data = {
         "email": admin_data.email,
@@ -96,9 +97,10 @@ async def register_admin_and_store(
     new_admin = models.User(**new_admin_data)
     
     db.add(new_admin)
-    db.commit()
-    db.refresh(new_admin)
-    logger.info(f"Admin user created successfully: {new_admin.email} for store ID: {new_store.id}")
+    await db.commit()
+    await db.refresh(new_admin)
+    logger.info("Store created successfully: %s with ID: %s", new_store.name, new_store.id)
+    logger.info("Admin user created successfully: %s for store ID: %s", new_admin.email, new_store.id)
     
     # Return AdminOut schema
     return schemas.AdminOut(
@@ -116,14 +118,14 @@ async def register_admin_and_store(
 @router.post("/add_employee", response_model=schemas.EmployeeOut, status_code=status.HTTP_201_CREATED) # Changed to EmployeeOut
 async def add_employee(
     employee_data: schemas.EmployeeCreate, # Changed from UserCreate to EmployeeCreate for clarity
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_admin: models.User = Depends(auth_deps.admin_required)
 ):
-    logger.info(f"Attempting to add employee by admin: {current_admin.email}")
+    logger.info("Attempting to add employee by admin: %s", current_admin.email)
     # Note: EmployeeCreate doesn't have an email field. Employees might not have emails.
     # If employees can have emails and they should be unique, add email to EmployeeCreate and check for existing.
 
-    hashed_password = security.get_password_hash(employee_data.password)
+    hashed_password = await security.get_password_hash_async(employee_data.password)
     
     new_employee_data = {
         "first_name": employee_data.first_name,
@@ -138,9 +140,9 @@ async def add_employee(
     new_employee = models.User(**new_employee_data)
     
     db.add(new_employee)
-    db.commit()
-    db.refresh(new_employee)
-    logger.info(f"Employee added successfully: {new_employee.first_name} {new_employee.last_name} for store ID: {current_admin.store_id}")
+    await db.commit()
+    await db.refresh(new_employee)
+    logger.info("Employee added successfully: %s %s for store ID: %s", new_employee.first_name, new_employee.last_name, current_admin.store_id)
     
     # Return EmployeeOut schema
     return schemas.EmployeeOut(
@@ -154,7 +156,7 @@ async def add_employee(
 
 @router.get("/users/me", response_model=Union[schemas.AdminOut, schemas.EmployeeOut]) # Changed to Union of AdminOut and EmployeeOut
 async def read_users_me(current_user: models.User = Depends(auth_deps.get_current_user)):
-    logger.info(f"Fetching details for current user: {current_user.id} with role: {current_user.role}")
+    logger.info("Fetching details for current user: %s with role: %s", current_user.id, current_user.role)
     # Pydantic will attempt to serialize current_user (models.User) into AdminOut or EmployeeOut
     # Ensure that the fields in models.User can correctly populate the respective Out schemas.
     # For example, if current_user.role == 'admin', it will try to fit into AdminOut.
@@ -165,34 +167,34 @@ async def read_users_me(current_user: models.User = Depends(auth_deps.get_curren
 @router.get("/users/{user_id}", response_model=Union[schemas.AdminOut, schemas.EmployeeOut]) # Changed to Union
 async def read_user(
     user_id: int, 
-    db: Session = Depends(auth_deps.get_db), 
+    db: AsyncSession = Depends(auth_deps.get_async_db), 
     # current_user: models.User = Depends(auth_deps.get_current_user) # Basic auth
     # More specific: current_user_or_admin_required dependency
     # For this, we need to pass user_id to the dependency. FastAPI doesn't support this directly in Depends.
     # So, we'll do the check inside the endpoint.
     requesting_user: models.User = Depends(auth_deps.get_current_user)
 ):
-    logger.info(f"User {requesting_user.id} attempting to fetch details for user: {user_id}")
+    logger.info("User %s attempting to fetch details for user: %s", requesting_user.id, user_id)
     if requesting_user.role != "admin" and requesting_user.id != user_id:
         logger.warning(f"Access denied for user {requesting_user.id} to view user {user_id} details.")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this resource")
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if user is None:
         logger.warning(f"User with id {user_id} not found.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    logger.info(f"Successfully fetched details for user: {user_id}")
+    logger.info("Successfully fetched details for user: %s", user_id)
     return user
 
 # Placeholder for listing users (admin only)
 @router.get("/users", response_model=list[Union[schemas.AdminOut, schemas.EmployeeOut]]) # Changed response model
 async def list_users(
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_read_db),
     current_admin: models.User = Depends(auth_deps.admin_required) # Ensures only admin can list users
 ):
-    logger.info(f"Admin {current_admin.email} listing all users in their store.")
+    logger.info("Admin %s listing all users in their store.", current_admin.email)
     # Filter users by the admin's store_id
-    users = db.query(models.User).filter(models.User.store_id == current_admin.store_id).all()
+    users = (await db.execute(select(models.User).where(models.User.store_id == current_admin.store_id))).scalars().all()
     return users
 
 # Placeholder for updating user (admin or self) - simplified
@@ -200,12 +202,12 @@ async def list_users(
 async def update_user_details(
     user_id: int, 
     user_update: schemas.UserUpdate, # Using the new UserUpdate schema
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     requesting_user: models.User = Depends(auth_deps.get_current_user)
 ):
-    logger.info(f"User {requesting_user.id} attempting to update details for user: {user_id}")
+    logger.info("User %s attempting to update details for user: %s", requesting_user.id, user_id)
 
-    user_to_update = db.query(models.User).filter(models.User.id == user_id).first()
+    user_to_update = await db.get(models.User, user_id)
 
     if not user_to_update:
         logger.warning(f"Update failed. User with id {user_id} not found.")
@@ -226,20 +228,21 @@ async def update_user_details(
     for key, value in update_data.items():
         setattr(user_to_update, key, value)
     
-    db.commit()
-    db.refresh(user_to_update)
-    logger.info(f"Successfully updated details for user: {user_id}")
+    await db.commit()
+    await db.refresh(user_to_update)
+    principal_cache.invalidate_user(user_id) # Drop cached principals so the next request re-reads the row
+    logger.info("Successfully updated details for user: %s", user_id)
     return user_to_update
 
 # Placeholder for deleting user (admin only)
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_account(
     user_id: int,
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_admin: models.User = Depends(auth_deps.admin_required)
 ):
-    logger.info(f"Admin {current_admin.email} attempting to delete user: {user_id}")
-    user_to_delete = db.query(models.User).filter(models.User.id == user_id).first()
+    logger.info("Admin %s attempting to delete user: %s", current_admin.email, user_id)
+    user_to_delete = await db.get(models.User, user_id)
     if not user_to_delete:
         logger.warning(f"User with id {user_id} not found for deletion.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -249,8 +252,18 @@ async def delete_user_account(
          logger.warning(f"Admin {current_admin.email} attempted to delete their own account.")
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admins cannot delete their own account.")
 
-    db.delete(user_to_delete)
-    db.commit()
-    logger.info(f"Successfully deleted user: {user_id}")
+    await db.delete(user_to_delete)
+    await db.commit()
+    principal_cache.invalidate_user(user_id) # Deleted users must stop authenticating immediately in this worker
+    logger.info("Successfully deleted user: %s", user_id)
     return None # FastAPI will return 204 No Content
 
+# Principal cache hit/miss counters for this worker (admin only)
+@router.get("/principal_cache/stats")
+async def principal_cache_stats(current_admin: models.User = Depends(auth_deps.admin_required)):
+    return principal_cache.stats()
+
+# Password hashing pool queue depth and latency for this worker (admin only)
+@router.get("/hash_pool/stats")
+async def hash_pool_stats(current_admin: models.User = Depends(auth_deps.admin_required)):
+    return hash_pool.stats()
@@ -1,7 +1,6 @@
 \
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 import models
@@ -13,31 +12,21 @@ router = APIRouter()
 
 @router.get("/metrics", response_model=schemas.DashboardMetrics)
 async def get_dashboard_metrics(
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_read_db),
     current_user: models.User = Depends(auth_deps.admin_required) # Metrics for admins
 ):
-    logger.info(f"Admin {current_user.email} (store {current_user.store_id}) requesting dashboard metrics.")
+    logger.info("Admin %s (store %s) requesting dashboard metrics.", current_user.email, current_user.store_id)
     
     store_id = current_user.store_id
 
     try:
-        # Total products in the admin's store
-        total_products = db.query(func.count(models.Product.id)).filter(models.Product.store_id == store_id).scalar() or 0
+        # O(1) primary-key lookup; the aggregates are maintained by the product and sale write paths
+        metrics = await db.get(models.StoreMetrics, store_id)
+        total_products = metrics.product_count if metrics else 0
+        total_sold_items = metrics.items_sold if metrics else 0
+        total_sales_value = metrics.sales_value if metrics else 0.0
 
-        # Total items sold in the admin's store
-        total_sold_items = db.query(func.sum(models.Sale.quantity)).filter(models.Sale.store_id == store_id).scalar() or 0
-        
-        # Total sales value in the admin's store
-        # This assumes sales occur at product.max_sell_price
-        # Sum of (sale.quantity * product.max_sell_price) for each sale
-        query_total_sales_value = (
-            db.query(func.sum(models.Sale.quantity * models.Product.max_sell_price))
-            .join(models.Product, models.Sale.product_id == models.Product.id)
-            .filter(models.Sale.store_id == store_id)
-        )
-        total_sales_value = query_total_sales_value.scalar() or 0.0
-
-        logger.info(f"Metrics for store {store_id}: Products={total_products}, SalesValue={total_sales_value}, SoldItems={total_sold_items}")
+        logger.info("Metrics for store %s: Products=%s, SalesValue=%s, SoldItems=%s", store_id, total_products, total_sales_value, total_sold_items)
 
         return schemas.DashboardMetrics(
             total_products=total_products,
@@ -0,0 +1,41 @@
+\
+from fastapi import APIRouter, Depends, status
+import logging
+
+import database
+import models
+from core import config
+from core.engine_factory import pool_status
+from core.replicas import replica_set
+from core.slow_queries import slow_query_log
+from dependencies import auth_deps
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Connection pool telemetry for this worker: checkout latency, waits/timeouts and saturation per engine.
+# Only engines that already exist are reported; reading this must not build a pool (or load a driver) of its own.
+@router.get("/pool")
+async def get_pool_diagnostics(current_user: models.User = Depends(auth_deps.admin_required)):
+    built = database.built_engines()
+    engines = {}
+    if "async_engine" in built:
+        engines["async"] = pool_status(built["async_engine"]) # Used by the routers
+    if "engine" in built:
+        engines["sync"] = pool_status(built["engine"]) # Scripts and migrations; usually absent in the API process
+    return {
+        "mode": config.DB_POOL_MODE,
+        "engines": engines,
+        "replicas": replica_set.status(), # Health, lag and pool of each read replica (DATABASE_REPLICA_URLS)
+    }
+
+# Slow statements this worker ran for the caller's store: recent entries and per-fingerprint aggregates
+@router.get("/slow_queries")
+async def get_slow_queries(current_user: models.User = Depends(auth_deps.admin_required)):
+    return slow_query_log.snapshot(store_id=current_user.store_id)
+
+@router.delete("/slow_queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: models.User = Depends(auth_deps.admin_required)):
+    # Only the caller's store; other tenants' entries stay
+    logger.info("Slow query log of store %s cleared by admin %s", current_user.store_id, current_user.id)
+    slow_query_log.clear(store_id=current_user.store_id)
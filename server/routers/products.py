@@ -1,20 +1,59 @@
 \
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, bindparam, func, tuple_, values, column, case, cast, literal
+from sqlalchemy import Integer, String, Float, Date, Boolean
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from pydantic import ValidationError
+from typing import List, Optional
+from datetime import date
 
 import schemas
 import models
 from dependencies import auth_deps # Assuming get_db, admin_required, get_current_user are here
+from core.pagination import encode_cursor, decode_cursor, escape_like, parse_cursor_value
+from core import store_metrics, sales_rollups, product_sync, push, demand
+from core.export import export_response
+from core.product_search import search_products
+from core.bulk_import import ImportFormatError, iter_lines, iter_csv_records, iter_ndjson_records
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter()
 
+# Serialization fast path: product endpoints validate ORM rows into schemas once and return the JSON bytes
+# from pydantic-core themselves. Returning a Response means FastAPI skips the second response_model
+# validation; response_model stays on the routes for the OpenAPI schema.
+def _json_response(model, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=model.model_dump_json(), media_type="application/json", status_code=status_code)
+
+def _product_response(db_product: models.Product, status_code: int = status.HTTP_200_OK) -> Response:
+    return _json_response(schemas.ProductOut.model_validate(db_product), status_code)
+
+async def _commit_product(db: AsyncSession, db_product: models.Product):
+    # Flush first so a new product has its id for the push event. ux_products_store_id_sku enforces SKU
+    # uniqueness; a duplicate surfaces here as an IntegrityError.
+    sku = db_product.sku # The rollback below expires db_product
+    try:
+        await db.flush()
+        await push.publish(
+            db, db_product.store_id, "product",
+            version=db_product.change_version, product=schemas.ProductOut.model_validate(db_product).model_dump(mode="json")
+        )
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if sku is not None and "sku" in str(e.orig).lower():
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Another product in your store already has SKU '{sku}'.")
+        raise
+
 # Add Product
 @router.post("/", response_model=schemas.ProductOut, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: schemas.ProductCreate, # Input schema
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_user: models.User = Depends(auth_deps.admin_required)
 ):
     if product.store_id != current_user.store_id:
@@ -26,97 +65,501 @@ async def create_product(
     # Calculate net_profit to be stored
     calculated_net_profit = (product.max_sell_price - product.purchase_price) * product.quantity
 
+    version = await product_sync.next_version(db, current_user.store_id)
     db_product_data = product.model_dump()
-    db_product = models.Product(**db_product_data, net_profit=calculated_net_profit)
+    db_product = models.Product(**db_product_data, net_profit=calculated_net_profit, change_version=version)
     
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-
-    # Calculate min_sell_price for the response
-    min_sell_price = db_product.purchase_price * 1.20 # Assuming 20% markup for min_sell_price
-
-    return schemas.ProductOut(
-        id=db_product.id,
-        name=db_product.name,
-        category=db_product.category,
-        purchase_price=db_product.purchase_price,
-        quantity=db_product.quantity,
-        max_sell_price=db_product.max_sell_price,
-        date=db_product.date,
-        store_id=db_product.store_id,
-        net_profit=db_product.net_profit, # This is the stored net_profit
-        min_sell_price=min_sell_price
-    )
+    await store_metrics.apply_delta(db, current_user.store_id, products=1)
+    await _commit_product(db, db_product)
+    await db.refresh(db_product)
+
+    return _product_response(db_product, status.HTTP_201_CREATED)
+
+IMPORT_MAX_ERRORS = 1000 # Cap the per-row error report so a bad file can't grow the response without bound
+
+async def _write_product_batch(db: AsyncSession, store_id: int, batch: list, upsert: bool) -> tuple[int, int]:
+    # batch is [(row_number, values)] with net_profit already computed; returns (inserted, updated)
+    version = await product_sync.next_version(db, store_id)
+    values = [dict(row_values, change_version=version) for _, row_values in batch]
+    to_update = []
+    if upsert:
+        # Last row wins for duplicate names within a batch, matching what sequential PUTs would produce
+        by_name = {row_values["name"]: row_values for row_values in values}
+        existing = set((await db.execute(
+            select(models.Product.name).where(
+                models.Product.store_id == store_id,
+                models.Product.name.in_(list(by_name))
+            )
+        )).scalars())
+        to_update = [row_values for name, row_values in by_name.items() if name in existing]
+        values = [row_values for name, row_values in by_name.items() if name not in existing]
+
+    if values:
+        await db.execute(insert(models.Product), values) # Executemany, sent as multi-row INSERTs
+    if to_update:
+        products_table = models.Product.__table__
+        await db.execute(
+            update(products_table)
+            .where(products_table.c.store_id == bindparam("b_store_id"), products_table.c.name == bindparam("b_name"))
+            .values(
+                category=bindparam("b_category"),
+                purchase_price=bindparam("b_purchase_price"),
+                quantity=bindparam("b_quantity"),
+                max_sell_price=bindparam("b_max_sell_price"),
+                date=bindparam("b_date"),
+                net_profit=bindparam("b_net_profit"),
+                sku=bindparam("b_sku"),
+                change_version=bindparam("b_change_version"),
+            ),
+            [{f"b_{key}": value for key, value in row_values.items()} for row_values in to_update],
+        )
+    # Upserted names may have had sales at the old price; rebuild (core/store_metrics.py) covers that rare case
+    await store_metrics.apply_delta(db, store_id, products=len(values))
+    await push.publish(db, store_id, "catalog", version=version) # Too many rows to push; clients pull the changes
+    await db.commit()
+    return len(values), len(batch) - len(values)
+
+# Bulk Import Products (streamed CSV or NDJSON body)
+@router.post("/import", response_model=schemas.ProductImportResult)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(default=None, pattern="^(csv|ndjson)$"), # Defaults to the request Content-Type
+    upsert: bool = False, # Update existing products matched on (store_id, name) instead of inserting duplicates
+    batch_size: int = Query(default=1000, ge=1, le=10000),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type in ("text/csv", "application/csv"):
+            format = "csv"
+        elif content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson."
+            )
+
+    logger.info("Admin %s importing products (%s, upsert=%s) into store %s", current_user.id, format, upsert, current_user.store_id)
+    store_id = current_user.store_id
+    parse_records = iter_csv_records if format == "csv" else iter_ndjson_records
+    result = schemas.ProductImportResult(processed=0, inserted=0, updated=0, failed=0, errors=[])
+
+    def record_error(row_number: int, messages: list):
+        result.failed += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append(schemas.ProductImportRowError(row=row_number, errors=messages))
+        else:
+            result.errors_truncated = True
+
+    async def flush(batch: list):
+        try:
+            inserted, updated = await _write_product_batch(db, store_id, batch, upsert)
+            result.inserted += inserted
+            result.updated += updated
+        except SQLAlchemyError as e:
+            # Only this batch is lost; earlier batches are committed and later ones still run
+            await db.rollback()
+            logger.error(f"Product import batch failed for store {store_id}: {e}")
+            for row_number, _ in batch:
+                record_error(row_number, [f"Database error: {e.__class__.__name__}"])
+
+    batch = []
+    try:
+        async for row_number, record, error in parse_records(iter_lines(request.stream())):
+            result.processed += 1
+            if error is not None:
+                record_error(row_number, [error])
+                continue
+            record.setdefault("store_id", store_id)
+            try:
+                product = schemas.ProductCreate.model_validate(record)
+            except ValidationError as e:
+                record_error(row_number, [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()])
+                continue
+            if product.store_id != store_id:
+                record_error(row_number, [f"store_id: must be your store ({store_id})"])
+                continue
+            row_values = product.model_dump()
+            row_values["net_profit"] = (product.max_sell_price - product.purchase_price) * product.quantity
+            batch.append((row_number, row_values))
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+    except ImportFormatError as e:
+        # Unreadable stream: report what was already committed along with the failure point
+        record_error(result.processed + 1, [str(e)])
+    if batch:
+        await flush(batch)
+
+    logger.info("Product import for store %s: processed=%s, inserted=%s, updated=%s, failed=%s",
+                store_id, result.processed, result.inserted, result.updated, result.failed)
+    return result
+
+# Columns a bulk item may patch, with their types for the VALUES list
+BULK_ITEM_COLUMNS = (
+    ("name", String), ("category", String), ("purchase_price", Float), ("quantity", Integer),
+    ("max_sell_price", Float), ("date", Date), ("sku", String),
+)
+
+def _bulk_conditions(store_id: int, product_filter: schemas.ProductBulkFilter) -> list:
+    conditions = []
+    if product_filter.ids is not None:
+        conditions.append(models.Product.id.in_(product_filter.ids))
+    if product_filter.category is not None:
+        conditions.append(models.Product.category == product_filter.category)
+    if product_filter.max_quantity is not None:
+        conditions.append(models.Product.quantity <= product_filter.max_quantity)
+    if not conditions: # Never a whole store by accident
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="filter needs at least one of ids, category, max_quantity")
+    return [models.Product.store_id == store_id, *conditions]
+
+def _bulk_result(requested: list, outcomes: dict) -> schemas.ProductBulkResult:
+    # outcomes is {product id: (status, net_profit)}; requested ids without an outcome were not found in the store
+    results = [
+        schemas.ProductBulkItemResult(id=product_id, status=outcomes[product_id][0], net_profit=outcomes[product_id][1])
+        if product_id in outcomes else schemas.ProductBulkItemResult(id=product_id, status="not_found")
+        for product_id in requested
+    ]
+    succeeded = sum(1 for result in results if result.status in ("updated", "deleted"))
+    return schemas.ProductBulkResult(matched=len(outcomes), succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+# Bulk Update Products: one patch per id, or one patch for every product matching a filter. Either way a
+# single UPDATE (per-id patches join a VALUES list), with net_profit recomputed in the same statement.
+@router.patch("/bulk", response_model=schemas.ProductBulkResult)
+async def bulk_update_products(
+    bulk: schemas.ProductBulkUpdate,
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    store_id = current_user.store_id
+    products = models.Product.__table__
+    if bulk.items is not None:
+        if bulk.filter is not None or bulk.patch is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Send either items or filter with patch, not both.")
+        patches = {} # Repeated ids merge, later fields winning
+        for item in bulk.items:
+            patches.setdefault(item.id, {}).update(item.model_dump(exclude_unset=True, exclude={"id"}))
+        requested = list(patches)
+        touched = set().union(*patches.values())
+        # Unset and null fields keep the current value, except sku, where an explicit null clears it (like PATCH)
+        patch = values(
+            column("id", Integer), *(column(name, type_) for name, type_ in BULK_ITEM_COLUMNS), column("sku_set", Boolean),
+            name="patch",
+        ).data([
+            (product_id, *(fields.get(name) for name, _ in BULK_ITEM_COLUMNS), "sku" in fields)
+            for product_id, fields in patches.items()
+        ]).cte("patch") # WITH patch(...) AS (VALUES ...) UPDATE ... FROM patch; SQLite has no column list on FROM aliases
+        # Postgres types a VALUES column that is NULL in every row as text, so cast to the column type there
+        # (not on SQLite, where CAST(... AS DATE) turns a date into a number)
+        cast_types = db.get_bind().dialect.name == "postgresql"
+        patched = {name: cast(patch.c[name], type_) if cast_types else patch.c[name] for name, type_ in BULK_ITEM_COLUMNS}
+        new = {name: func.coalesce(patched[name], products.c[name]) for name, _ in BULK_ITEM_COLUMNS if name != "sku"}
+        new["sku"] = case((patch.c.sku_set, patched["sku"]), else_=products.c.sku)
+        target = [products.c.id.in_(requested), products.c.store_id == store_id]
+        conditions = [products.c.id == patch.c.id, products.c.store_id == store_id]
+    else:
+        if bulk.filter is None or bulk.patch is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Send items, or filter together with patch.")
+        fields = bulk.patch.model_dump(exclude_none=True)
+        new = {}
+        for name in ("category", "purchase_price", "quantity", "max_sell_price", "date"):
+            if name in fields and f"{name}_factor" in fields:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Set {name} or {name}_factor, not both.")
+            if name in fields:
+                new[name] = literal(fields[name], products.c[name].type)
+            elif f"{name}_factor" in fields:
+                new[name] = products.c[name] * fields[f"{name}_factor"]
+        if not new:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="patch changes nothing.")
+        requested = list(dict.fromkeys(bulk.filter.ids)) if bulk.filter.ids else None
+        touched = set(new)
+        target = conditions = _bulk_conditions(store_id, bulk.filter)
+
+    logger.info("Admin %s bulk updating %s in store %s", current_user.id, f"{len(requested)} products" if requested else "products by filter", store_id)
+    # Price and category changes re-value and re-label past sales, which needs the values before the update
+    previous = {}
+    if touched & {"max_sell_price", "category"}:
+        previous = {
+            product_id: (max_sell_price, category)
+            for product_id, max_sell_price, category in await db.execute(
+                select(products.c.id, products.c.max_sell_price, products.c.category).where(*target).with_for_update()
+            )
+        }
+
+    def current(name):
+        return new.get(name, products.c[name])
+
+    version = await product_sync.next_version(db, store_id)
+    try:
+        rows = (await db.execute(
+            update(products)
+            .where(*conditions)
+            .values(
+                **new,
+                net_profit=(current("max_sell_price") - current("purchase_price")) * current("quantity"),
+                change_version=version,
+            )
+            .returning(products.c.id, products.c.net_profit, products.c.max_sell_price, products.c.category)
+        )).all()
+        if not rows:
+            await db.rollback()
+            return _bulk_result(requested or [], {})
+
+        repriced = {
+            product_id: (previous[product_id][0], max_sell_price)
+            for product_id, _, max_sell_price, _ in rows
+            if product_id in previous and previous[product_id][0] != max_sell_price
+        }
+        recategorized = [
+            product_id for product_id, _, _, category in rows
+            if product_id in previous and previous[product_id][1] != category
+        ]
+        if repriced:
+            sold = await store_metrics.units_sold_by_product(db, store_id, list(repriced))
+            await store_metrics.apply_delta(db, store_id, sales_value=sum(
+                units * (repriced[product_id][1] - repriced[product_id][0]) for product_id, units in sold.items()
+            ))
+            await sales_rollups.revalue_products(db, repriced)
+        if recategorized:
+            await sales_rollups.recategorize_products(db, recategorized)
+        await push.publish(db, store_id, "catalog", version=version) # Clients pull the changed rows
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if "sku" in str(e.orig).lower():
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The update would give two products in your store the same SKU.")
+        raise
+
+    outcomes = {product_id: ("updated", net_profit) for product_id, net_profit, _, _ in rows}
+    logger.info("Bulk update changed %s products in store %s", len(outcomes), store_id)
+    return _bulk_result(requested or sorted(outcomes), outcomes)
+
+# Bulk Delete Products matching a filter. Products with sales are reported and kept: their sales reference them.
+@router.post("/bulk_delete", response_model=schemas.ProductBulkResult)
+async def bulk_delete_products(
+    product_filter: schemas.ProductBulkFilter,
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    store_id = current_user.store_id
+    conditions = _bulk_conditions(store_id, product_filter)
+    logger.info("Admin %s bulk deleting products in store %s", current_user.id, store_id)
+    has_sales = select(models.Sale.id).where(models.Sale.product_id == models.Product.id).exists()
+    matched = (await db.execute(
+        select(models.Product.id, has_sales).where(*conditions).with_for_update(of=models.Product)
+    )).all()
+    outcomes = {product_id: ("has_sales", None) for product_id, sold in matched if sold}
+    if len(outcomes) < len(matched):
+        version = await product_sync.next_version(db, store_id)
+        deletable = select(models.Product.id).where(*conditions, ~has_sales)
+        try:
+            await sales_rollups.forget_products(db, deletable)
+            await demand.forget_products(db, deletable)
+            deleted = (await db.execute(
+                delete(models.Product).where(*conditions, ~has_sales)
+                .returning(models.Product.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            await product_sync.record_deletions(db, store_id, deleted, version)
+            await store_metrics.apply_delta(db, store_id, products=-len(deleted))
+            await push.publish(db, store_id, "catalog", version=version)
+            await db.commit()
+        except IntegrityError:
+            # A sale of one of these products committed in the meantime
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Products changed during the delete; retry.")
+        outcomes.update((product_id, ("deleted", None)) for product_id in deleted)
+    else:
+        await db.rollback() # Releases the row locks
+    logger.info("Bulk delete removed %s products in store %s", sum(1 for status_, _ in outcomes.values() if status_ == "deleted"), store_id)
+    return _bulk_result(list(dict.fromkeys(product_filter.ids)) if product_filter.ids else sorted(outcomes), outcomes)
 
-# Get All Products
-@router.get("/", response_model=List[schemas.ProductOut])
+# Sortable columns for keyset pagination: sort key -> (column, cursor value kind)
+PRODUCT_SORTS = {
+    "id": (models.Product.id, "int"),
+    "name": (models.Product.name, "str"),
+    "date": (models.Product.date, "date"),
+    "purchase_price": (models.Product.purchase_price, "float"),
+    "quantity": (models.Product.quantity, "int"),
+}
+
+# Get All Products (keyset paginated, filtered server-side)
+@router.get("/", response_model=schemas.ProductPage)
 async def read_products(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(auth_deps.get_db),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None, # Opaque cursor from a previous page's next_cursor
+    category: Optional[str] = None,
+    name_prefix: Optional[str] = Query(default=None, min_length=1, max_length=100),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: str = Query(default="id", pattern=r"^-?(id|name|date|purchase_price|quantity)$"), # Prefix with '-' for descending
+    db: AsyncSession = Depends(auth_deps.get_read_db),
     current_user: models.User = Depends(auth_deps.get_current_user) # Any authenticated user
 ):
-    products_query = db.query(models.Product).filter(models.Product.store_id == current_user.store_id)
-    products = products_query.offset(skip).limit(limit).all()
-    
-    result = []
-    for p in products:
-        min_sell_price = p.purchase_price * 1.20
-        result.append(schemas.ProductOut(
-            id=p.id,
-            name=p.name,
-            category=p.category,
-            purchase_price=p.purchase_price,
-            quantity=p.quantity,
-            max_sell_price=p.max_sell_price,
-            date=p.date,
-            store_id=p.store_id,
-            net_profit=p.net_profit, # Use stored net_profit
-            min_sell_price=min_sell_price
-        ))
-    return result
+    descending = sort.startswith("-")
+    sort_column, sort_kind = PRODUCT_SORTS[sort.lstrip("-")]
+
+    products_query = select(models.Product).where(models.Product.store_id == current_user.store_id)
+    if category:
+        products_query = products_query.where(models.Product.category == category)
+    if name_prefix:
+        products_query = products_query.where(
+            func.lower(models.Product.name).like(escape_like(name_prefix.lower()) + "%", escape="\\")
+        )
+    if date_from:
+        products_query = products_query.where(models.Product.date >= date_from)
+    if date_to:
+        products_query = products_query.where(models.Product.date <= date_to)
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort)
+        last_value = parse_cursor_value(last_value, sort_kind)
+        # Row-value comparison (sort_col, id) > (last_value, last_id) so the index seek starts after the previous page
+        if sort_column is models.Product.id:
+            keyset = models.Product.id < last_id if descending else models.Product.id > last_id
+        elif descending:
+            keyset = tuple_(sort_column, models.Product.id) < tuple_(last_value, last_id)
+        else:
+            keyset = tuple_(sort_column, models.Product.id) > tuple_(last_value, last_id)
+        products_query = products_query.where(keyset)
+
+    if sort_column is models.Product.id:
+        order_by = [models.Product.id.desc() if descending else models.Product.id.asc()]
+    elif descending:
+        order_by = [sort_column.desc(), models.Product.id.desc()]
+    else:
+        order_by = [sort_column.asc(), models.Product.id.asc()]
+
+    # Fetch one extra row to know whether another page exists without a COUNT
+    products = (await db.execute(products_query.order_by(*order_by).limit(limit + 1))).scalars().all()
+    has_more = len(products) > limit
+    products = products[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = products[-1]
+        next_cursor = encode_cursor(sort, getattr(last, sort_column.key), last.id)
+    # One pydantic-core validation pass straight from the ORM rows, then Rust JSON encoding
+    page = schemas.ProductPage.model_validate({"items": products, "next_cursor": next_cursor}, from_attributes=True)
+    return _json_response(page)
+
+# Delta sync: products created, updated or deleted since a version the client already has
+@router.get("/changes", response_model=schemas.ProductChanges)
+async def read_product_changes(
+    since: int = Query(default=0, ge=0), # 0 downloads the whole catalog
+    cursor: Optional[str] = None, # next_cursor from the previous page of this sync
+    limit: int = Query(default=500, ge=1, le=2000),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.get_current_user) # Any authenticated user
+):
+    # Read the version first: everything at or below it is already committed (see core/product_sync.py)
+    version, compacted_version = await product_sync.store_versions(db, current_user.store_id)
+    reset = False
+    if cursor:
+        position, after_id = decode_cursor(cursor, "changes")
+        if not (isinstance(position, list) and len(position) == 2 and isinstance(position[0], int) and isinstance(position[1], bool)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor: malformed position")
+        last_version, include_deleted = position # reset is only reported on the first page
+    else:
+        last_version, after_id = since, None
+        if 0 < since < compacted_version:
+            # Deletions after since may have been compacted away; start over with a full download
+            last_version, reset = 0, True
+        include_deleted = last_version > 0 # A full download has nothing locally to delete
+        if last_version == 0:
+            last_version = -1 # Rows written before the sync feed existed carry version 0
+
+    products, deleted, last_key = await product_sync.changes_since(
+        db, current_user.store_id, last_version, after_id, include_deleted, limit
+    )
+    next_cursor = encode_cursor("changes", [last_key[0], include_deleted], last_key[1]) if last_key else None
+    changes = schemas.ProductChanges.model_validate(
+        {"items": products, "deleted": deleted, "version": version, "next_cursor": next_cursor, "reset": reset},
+        from_attributes=True
+    )
+    return _json_response(changes)
+
+# Search Products by name (typo tolerant) with category facets
+@router.get("/search", response_model=schemas.ProductSearchResult)
+async def search_store_products(
+    q: str = Query(min_length=1, max_length=100),
+    category: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.get_current_user) # Any authenticated user
+):
+    if not q.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query must not be blank.")
+    products, facets = await search_products(db, current_user.store_id, q, category, limit)
+    result = schemas.ProductSearchResult.model_validate({"items": products, "facets": facets}, from_attributes=True)
+    return _json_response(result)
+
+# Look up a Product by scanned SKU/barcode (one unique-index probe)
+@router.get("/by-code/{code}", response_model=schemas.ProductOut)
+async def read_product_by_code(
+    code: str,
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.get_current_user) # Any authenticated user
+):
+    db_product = (await db.execute(select(models.Product).where(
+        models.Product.store_id == current_user.store_id,
+        models.Product.sku == code
+    ))).scalars().first()
+    if db_product is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No product with code '{code}' in your store")
+
+    return _product_response(db_product)
+
+# Export Products (streamed from a server-side cursor)
+@router.get("/export")
+async def export_products(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    logger.info("Admin %s exporting products (%s) for store %s", current_user.id, format, current_user.store_id)
+    columns = ["id", "name", "category", "purchase_price", "quantity", "max_sell_price", "date", "net_profit", "sku", "store_id"]
+    table = models.Product.__table__
+    stmt = select(*(table.c[column] for column in columns)).where(table.c.store_id == current_user.store_id)
+    if date_from:
+        stmt = stmt.where(table.c.date >= date_from)
+    if date_to:
+        stmt = stmt.where(table.c.date <= date_to)
+    # Order on the (store_id, id) index so the cursor walks the index instead of sorting
+    return export_response(stmt.order_by(table.c.id), columns, format, f"products-store-{current_user.store_id}")
 
 # Get Specific Product
 @router.get("/{product_id}", response_model=schemas.ProductOut)
 async def read_product(
     product_id: int,
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_read_db),
     current_user: models.User = Depends(auth_deps.get_current_user) # Any authenticated user
 ):
-    db_product = db.query(models.Product).filter(
+    db_product = (await db.execute(select(models.Product).where(
         models.Product.id == product_id,
         models.Product.store_id == current_user.store_id
-    ).first()
+    ))).scalars().first()
     if db_product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or not in your store")
 
-    min_sell_price = db_product.purchase_price * 1.20
-    return schemas.ProductOut(
-        id=db_product.id,
-        name=db_product.name,
-        category=db_product.category,
-        purchase_price=db_product.purchase_price,
-        quantity=db_product.quantity,
-        max_sell_price=db_product.max_sell_price,
-        date=db_product.date,
-        store_id=db_product.store_id,
-        net_profit=db_product.net_profit, # Use stored net_profit
-        min_sell_price=min_sell_price
-    )
+    return _product_response(db_product)
 
 # Update Product (PUT - Full Update)
 @router.put("/{product_id}", response_model=schemas.ProductOut)
 async def update_product_put(
     product_id: int,
     product_update: schemas.ProductCreate, # Using ProductCreate for PUT as per snippet
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_user: models.User = Depends(auth_deps.admin_required)
 ):
-    db_product = db.query(models.Product).filter(
+    db_product = (await db.execute(select(models.Product).where(
         models.Product.id == product_id,
         models.Product.store_id == current_user.store_id
-    ).first()
+    ))).scalars().first()
     if db_product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or not in your store")
 
@@ -126,42 +569,40 @@ async def update_product_put(
             detail=f"Cannot change product's store to {product_update.store_id}. It must remain in your store ({current_user.store_id})."
         )
 
+    old_max_sell_price, old_category = db_product.max_sell_price, db_product.category
+    db_product.change_version = await product_sync.next_version(db, current_user.store_id)
     update_data = product_update.model_dump()
     for key, value in update_data.items():
         setattr(db_product, key, value)
     
     # Recalculate and update net_profit
     db_product.net_profit = (db_product.max_sell_price - db_product.purchase_price) * db_product.quantity
+
+    # Dashboard sales value is priced at max_sell_price, so re-value this product's past sales
+    if db_product.max_sell_price != old_max_sell_price:
+        sold = await store_metrics.units_sold(db, db_product.store_id, db_product.id)
+        await store_metrics.apply_delta(db, db_product.store_id, sales_value=sold * (db_product.max_sell_price - old_max_sell_price))
+        await sales_rollups.revalue_product(db, db_product.id, old_max_sell_price, db_product.max_sell_price)
+    if db_product.category != old_category:
+        await sales_rollups.recategorize_product(db, db_product.id, db_product.category)
     
-    db.commit()
-    db.refresh(db_product)
-
-    min_sell_price = db_product.purchase_price * 1.20
-    return schemas.ProductOut(
-        id=db_product.id,
-        name=db_product.name,
-        category=db_product.category,
-        purchase_price=db_product.purchase_price,
-        quantity=db_product.quantity,
-        max_sell_price=db_product.max_sell_price,
-        date=db_product.date,
-        store_id=db_product.store_id,
-        net_profit=db_product.net_profit,
-        min_sell_price=min_sell_price
-    )
+    await _commit_product(db, db_product)
+    await db.refresh(db_product)
+
+    return _product_response(db_product)
 
 # Update Product (PATCH - Partial Update)
 @router.patch("/{product_id}", response_model=schemas.ProductOut)
 async def update_product_patch(
     product_id: int,
     product_update: schemas.ProductUpdate, # Using ProductUpdate for PATCH
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_user: models.User = Depends(auth_deps.admin_required)
 ):
-    db_product = db.query(models.Product).filter(
+    db_product = (await db.execute(select(models.Product).where(
         models.Product.id == product_id,
         models.Product.store_id == current_user.store_id
-    ).first()
+    ))).scalars().first()
     if db_product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or not in your store")
 
@@ -170,44 +611,47 @@ async def update_product_patch(
     if "store_id" in update_data and update_data["store_id"] != db_product.store_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot change product's store_id via PATCH.")
 
+    old_max_sell_price, old_category = db_product.max_sell_price, db_product.category
+    db_product.change_version = await product_sync.next_version(db, current_user.store_id)
     for key, value in update_data.items():
         setattr(db_product, key, value)
     
     # Recalculate net_profit if relevant fields changed
     if any(key in update_data for key in ["max_sell_price", "purchase_price", "quantity"]):
         db_product.net_profit = (db_product.max_sell_price - db_product.purchase_price) * db_product.quantity
+
+    if db_product.max_sell_price != old_max_sell_price:
+        sold = await store_metrics.units_sold(db, db_product.store_id, db_product.id)
+        await store_metrics.apply_delta(db, db_product.store_id, sales_value=sold * (db_product.max_sell_price - old_max_sell_price))
+        await sales_rollups.revalue_product(db, db_product.id, old_max_sell_price, db_product.max_sell_price)
+    if db_product.category != old_category:
+        await sales_rollups.recategorize_product(db, db_product.id, db_product.category)
         
-    db.commit()
-    db.refresh(db_product)
-
-    min_sell_price = db_product.purchase_price * 1.20
-    return schemas.ProductOut(
-        id=db_product.id,
-        name=db_product.name,
-        category=db_product.category,
-        purchase_price=db_product.purchase_price,
-        quantity=db_product.quantity,
-        max_sell_price=db_product.max_sell_price,
-        date=db_product.date,
-        store_id=db_product.store_id,
-        net_profit=db_product.net_profit,
-        min_sell_price=min_sell_price
-    )
+    await _commit_product(db, db_product)
+    await db.refresh(db_product)
+
+    return _product_response(db_product)
 
 # Delete Product
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_user: models.User = Depends(auth_deps.admin_required)
 ):
-    db_product = db.query(models.Product).filter(
+    db_product = (await db.execute(select(models.Product).where(
         models.Product.id == product_id,
         models.Product.store_id == current_user.store_id
-    ).first()
+    ))).scalars().first()
     if db_product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or not in your store")
     
-    db.delete(db_product)
-    db.commit()
+    version = await product_sync.next_version(db, current_user.store_id)
+    await sales_rollups.forget_product(db, db_product.id)
+    await demand.forget_product(db, db_product.id)
+    await product_sync.record_deletions(db, current_user.store_id, [db_product.id], version)
+    await db.delete(db_product)
+    await store_metrics.apply_delta(db, current_user.store_id, products=-1)
+    await push.publish(db, current_user.store_id, "product_deleted", version=version, product_id=product_id)
+    await db.commit()
     return None
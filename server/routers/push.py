@@ -0,0 +1,93 @@
+\
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import logging
+
+import database
+from dependencies import auth_deps
+from core import config
+from core.push import hub
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Live stock and sales events for the caller's store (see core/push.py for the event flow).
+# Events: product, product_deleted, catalog, stock, sale, sale_deleted, and resync when the client has to
+# catch up through GET /products/changes. The JWT goes in the Authorization header or, for EventSource
+# and browser WebSockets that cannot set headers, the access_token query parameter.
+
+async def _authenticate(token: Optional[str]):
+    # Own short-lived session: a request-scoped one would hold a pooled connection for the whole stream
+    async with database.AsyncSessionLocal() as db:
+        return await auth_deps.get_current_user(token=token, db=db)
+
+def _bearer(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, credentials = (authorization or "").partition(" ")
+    return credentials if scheme.lower() == "bearer" and credentials else None
+
+# Server-Sent Events stream
+@router.get("/events")
+async def stream_events(
+    access_token: Optional[str] = None,
+    header_token: Optional[str] = Depends(auth_deps.oauth2_scheme)
+):
+    current_user = await _authenticate(header_token or access_token)
+    store_id = current_user.store_id
+    queue = hub.subscribe(store_id)
+    logger.info("User %s subscribed to push events for store %s (SSE)", current_user.id, store_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event_name, data = await asyncio.wait_for(queue.get(), timeout=config.PUSH_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n" # Keeps proxies from closing an idle stream
+                    continue
+                yield f"event: {event_name}\ndata: {data}\n\n"
+        finally:
+            hub.unsubscribe(store_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # No proxy buffering of the stream
+    )
+
+# WebSocket stream: each message is {"event": ..., "data": {...}}; anything the client sends is ignored
+@router.websocket("/ws")
+async def push_socket(websocket: WebSocket):
+    token = _bearer(websocket.headers.get("authorization")) or websocket.query_params.get("access_token")
+    try:
+        current_user = await _authenticate(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    store_id = current_user.store_id
+    queue = hub.subscribe(store_id)
+    logger.info("User %s subscribed to push events for store %s (WebSocket)", current_user.id, store_id)
+
+    async def drain_client():
+        # Returns when the client goes away
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    receiver = asyncio.create_task(drain_client())
+    try:
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            event_name, data = getter.result()
+            await websocket.send_text(f'{{"event":"{event_name}","data":{data}}}')
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        hub.unsubscribe(store_id, queue)
@@ -1,87 +1,256 @@
 \
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from typing import List, Optional
 from datetime import date
 
 import schemas
 import models
 from dependencies import auth_deps
+from core import store_metrics, sales_rollups, product_sync, push, demand
+from core.export import export_response
 import logging # Added logging
 
 logger = logging.getLogger(__name__) # Added logger
 
 router = APIRouter()
 
+async def _decrement_stock(db: AsyncSession, store_id: int, product_id: int, quantity: int) -> Optional[tuple]:
+    # Conditional decrement: the stock check and the write are one statement, so two tills selling the last
+    # unit cannot both succeed. Returns (remaining quantity, max_sell_price, category), or None if missing or short.
+    # The sync version is stamped later (product_sync.stamp_products), so no store-wide lock is held while
+    # this waits on the product's row lock.
+    decremented = await _conditional_decrement(db, store_id, models.Product.id == product_id, quantity)
+    return decremented[1:] if decremented is not None else None
+
+async def _conditional_decrement(db: AsyncSession, store_id: int, match, quantity: int) -> Optional[tuple]:
+    # Returns (product id, remaining quantity, max_sell_price, category) for the product matched in the store
+    result = await db.execute(
+        update(models.Product)
+        .where(
+            match,
+            models.Product.store_id == store_id,
+            models.Product.quantity >= quantity
+        )
+        .values(quantity=models.Product.quantity - quantity)
+        .returning(models.Product.id, models.Product.quantity, models.Product.max_sell_price, models.Product.category)
+        .execution_options(synchronize_session=False)
+    )
+    return result.one_or_none()
+
+async def _publish_sales(db: AsyncSession, store_id: int, version: int, sales: list, remaining: dict):
+    # Flushes so the sales have ids, then pushes the new stock levels and the sales (see core/push.py)
+    await db.flush()
+    for product_id, quantity in remaining.items():
+        await push.publish(db, store_id, "stock", version=version, product_id=product_id, quantity=quantity)
+    for sale in sales:
+        await push.publish(db, store_id, "sale", version=version, sale=schemas.SaleOut.model_validate(sale).model_dump(mode="json"))
+
+async def _record_sale(db: AsyncSession, current_user, product_id: int, quantity: int, timestamp: date,
+                       decremented: tuple):
+    # Insert the sale and apply its aggregate deltas; the caller has already decremented stock in this transaction.
+    # decremented is the (remaining quantity, max_sell_price, category) the decrement returned.
+    remaining, max_sell_price, category = decremented
+    db_sale = models.Sale( # Changed to models.Sale
+        product_id=product_id,
+        quantity=quantity,
+        timestamp=timestamp, # Ensure SaleCreate includes timestamp
+        user_id=current_user.id,
+        store_id=current_user.store_id
+    )
+    db.add(db_sale)
+    version = await product_sync.stamp_products(db, current_user.store_id, [product_id])
+    await store_metrics.apply_delta(db, current_user.store_id, items_sold=quantity, sales_value=quantity * max_sell_price)
+    await sales_rollups.apply_sale(db, current_user.store_id, timestamp, product_id, category, quantity, quantity * max_sell_price)
+    await demand.apply_sale(db, current_user.store_id, product_id, timestamp, quantity)
+    await _publish_sales(db, current_user.store_id, version, [db_sale], {product_id: remaining})
+
+    await db.commit()
+    await db.refresh(db_sale)
+    logger.info("Sale registered successfully with ID: %s", db_sale.id)
+    return db_sale
+
 # Register a Sale
 @router.post("/", response_model=schemas.SaleOut, status_code=status.HTTP_201_CREATED) # Changed to SaleOut
 async def create_sale( # Renamed function for clarity
     sale_data: schemas.SaleCreate, # Changed to SaleCreate and sale_data
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_user: models.User = Depends(auth_deps.employee_required) # Employee or Admin can register sales
 ):
-    logger.info(f"User {current_user.id} attempting to register a sale for product {sale_data.product_id} in store {current_user.store_id}")
-    # Check if product exists and belongs to the same store
-    product = db.query(models.Product).filter(
-        models.Product.id == sale_data.product_id,
-        models.Product.store_id == current_user.store_id
-    ).first()
-
-    if not product:
-        logger.warning(f"Product with id {sale_data.product_id} not found in store {current_user.store_id}.")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product with id {sale_data.product_id} not found in your store.")
-
-    # Check if product has enough quantity
-    if product.quantity < sale_data.quantity:
-        logger.warning(f"Not enough stock for product {product.id}. Available: {product.quantity}, Requested: {sale_data.quantity}")
+    logger.info("User %s attempting to register a sale for product %s in store %s", current_user.id, sale_data.product_id, current_user.store_id)
+    if sale_data.quantity <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quantity must be positive.")
+
+    decremented = await _decrement_stock(db, current_user.store_id, sale_data.product_id, sale_data.quantity)
+    if decremented is None:
+        # Work out which check failed only on the error path
+        product_exists = await db.scalar(select(models.Product.id).where(
+            models.Product.id == sale_data.product_id,
+            models.Product.store_id == current_user.store_id
+        ))
+        await db.rollback()
+        if not product_exists:
+            logger.warning(f"Product with id {sale_data.product_id} not found in store {current_user.store_id}.")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product with id {sale_data.product_id} not found in your store.")
+        logger.warning(f"Not enough stock for product {sale_data.product_id}. Requested: {sale_data.quantity}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough stock.")
 
-    db_sale = models.Sale( # Changed to models.Sale
-        product_id=sale_data.product_id,
-        quantity=sale_data.quantity,
-        timestamp=sale_data.timestamp, # Ensure SaleCreate includes timestamp
-        user_id=current_user.id,
-        store_id=current_user.store_id
+    return await _record_sale(
+        db, current_user, sale_data.product_id, sale_data.quantity, sale_data.timestamp, decremented
     )
-    db.add(db_sale)
-    
-    # Update product quantity
-    product.quantity -= sale_data.quantity
-    
-    db.commit()
-    db.refresh(db_sale)
-    logger.info(f"Sale registered successfully with ID: {db_sale.id}")
-    return db_sale
+
+# Register a Sale by scanned SKU/barcode: one conditional UPDATE resolves the code and takes the stock
+@router.post("/by-code", response_model=schemas.SaleOut, status_code=status.HTTP_201_CREATED)
+async def create_sale_by_code(
+    sale_data: schemas.SaleByCodeCreate,
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.employee_required) # Employee or Admin can register sales
+):
+    logger.info("User %s attempting to register a sale for code %s in store %s", current_user.id, sale_data.code, current_user.store_id)
+    if sale_data.quantity <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quantity must be positive.")
+
+    decremented = await _conditional_decrement(db, current_user.store_id, models.Product.sku == sale_data.code, sale_data.quantity)
+    if decremented is None:
+        product_exists = await db.scalar(select(models.Product.id).where(
+            models.Product.sku == sale_data.code,
+            models.Product.store_id == current_user.store_id
+        ))
+        await db.rollback()
+        if not product_exists:
+            logger.warning(f"Product with code {sale_data.code} not found in store {current_user.store_id}.")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No product with code '{sale_data.code}' in your store.")
+        logger.warning(f"Not enough stock for product {product_exists} (code {sale_data.code}). Requested: {sale_data.quantity}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough stock.")
+
+    return await _record_sale(db, current_user, decremented[0], sale_data.quantity, sale_data.timestamp, decremented[1:])
+
+# Checkout a cart of several line items in one transaction
+@router.post("/checkout", response_model=schemas.CheckoutOut, status_code=status.HTTP_201_CREATED)
+async def checkout(
+    cart: schemas.CheckoutCreate,
+    db: AsyncSession = Depends(auth_deps.get_async_db),
+    current_user: models.User = Depends(auth_deps.employee_required)
+):
+    logger.info("User %s checking out %s line items in store %s", current_user.id, len(cart.items), current_user.store_id)
+    # Merge repeated lines, then decrement in product_id order so concurrent carts take row locks
+    # in the same order and cannot deadlock each other
+    quantities = {}
+    for item in cart.items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    filled, short = [], []
+    prices, remaining = {}, {}
+    for product_id in sorted(quantities):
+        decremented = await _decrement_stock(db, current_user.store_id, product_id, quantities[product_id])
+        if decremented is None:
+            short.append(product_id)
+        else:
+            filled.append(product_id)
+            remaining[product_id] = decremented[0]
+            prices[product_id] = decremented[1:] # (max_sell_price, category)
+
+    rejected = []
+    if short:
+        known = set((await db.execute(select(models.Product.id).where(
+            models.Product.id.in_(short),
+            models.Product.store_id == current_user.store_id
+        ))).scalars())
+        rejected = [
+            schemas.CheckoutRejectedItem(
+                product_id=product_id,
+                quantity=quantities[product_id],
+                reason="Not enough stock" if product_id in known else "Product not found in your store"
+            )
+            for product_id in short
+        ]
+        if not cart.allow_partial:
+            await db.rollback() # Undo the decrements already applied for this cart
+            logger.warning(f"Checkout rejected for user {current_user.id}: {len(rejected)} line items could not be filled")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Cart rejected: some items could not be filled.", "rejected": [r.model_dump() for r in rejected]}
+            )
+
+    sales = [
+        models.Sale(
+            product_id=product_id,
+            quantity=quantities[product_id],
+            timestamp=cart.timestamp,
+            user_id=current_user.id,
+            store_id=current_user.store_id
+        )
+        for product_id in filled
+    ]
+    db.add_all(sales)
+    version = await product_sync.stamp_products(db, current_user.store_id, filled)
+    await store_metrics.apply_delta(
+        db, current_user.store_id,
+        items_sold=sum(quantities[p] for p in filled),
+        sales_value=sum(quantities[p] * prices[p][0] for p in filled)
+    )
+    for product_id in filled:
+        max_sell_price, category = prices[product_id]
+        await sales_rollups.apply_sale(
+            db, current_user.store_id, cart.timestamp, product_id, category,
+            quantities[product_id], quantities[product_id] * max_sell_price
+        )
+        await demand.apply_sale(db, current_user.store_id, product_id, cart.timestamp, quantities[product_id])
+    await _publish_sales(db, current_user.store_id, version, sales, remaining)
+    await db.commit()
+    logger.info("Checkout committed %s sales (%s rejected) for store %s", len(sales), len(rejected), current_user.store_id)
+    return schemas.CheckoutOut(sales=[schemas.SaleOut.model_validate(sale) for sale in sales], rejected=rejected)
 
 # Get All Sales for the current user's store
 @router.get("/", response_model=List[schemas.SaleOut]) # Changed to SaleOut
 async def read_sales( # Renamed function for clarity
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_read_db),
     current_user: models.User = Depends(auth_deps.employee_required) # Or any authenticated user in the store
 ):
-    logger.info(f"User {current_user.id} fetching sales for store {current_user.store_id}")
-    sales = db.query(models.Sale).filter(models.Sale.store_id == current_user.store_id).offset(skip).limit(limit).all() # Changed to models.Sale and filtered by store_id
-    logger.info(f"Retrieved {len(sales)} sales records for store {current_user.store_id}")
+    logger.info("User %s fetching sales for store %s", current_user.id, current_user.store_id)
+    sales = (await db.execute(
+        select(models.Sale).where(models.Sale.store_id == current_user.store_id).offset(skip).limit(limit)
+    )).scalars().all() # Filtered by store_id
+    logger.info("Retrieved %s sales records for store %s", len(sales), current_user.store_id)
     return sales
 
+# Export Sales (streamed from a server-side cursor)
+@router.get("/export")
+async def export_sales(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: models.User = Depends(auth_deps.admin_required)
+):
+    logger.info("Admin %s exporting sales (%s) for store %s", current_user.id, format, current_user.store_id)
+    columns = ["id", "product_id", "user_id", "store_id", "quantity", "timestamp"]
+    table = models.Sale.__table__
+    stmt = select(*(table.c[column] for column in columns)).where(table.c.store_id == current_user.store_id)
+    if date_from:
+        stmt = stmt.where(table.c.timestamp >= date_from)
+    if date_to:
+        stmt = stmt.where(table.c.timestamp <= date_to)
+    return export_response(stmt.order_by(table.c.timestamp, table.c.id), columns, format, f"sales-store-{current_user.store_id}")
+
 # Get a specific sale by ID from the current user's store
 @router.get("/{sale_id}", response_model=schemas.SaleOut) # Changed to SaleOut
 async def read_sale( # Renamed function for clarity
     sale_id: int,
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_user: models.User = Depends(auth_deps.employee_required) # Or any authenticated user
 ):
-    logger.info(f"User {current_user.id} attempting to fetch sale {sale_id} from store {current_user.store_id}")
-    sale = db.query(models.Sale).filter( # Changed to models.Sale
+    logger.info("User %s attempting to fetch sale %s from store %s", current_user.id, sale_id, current_user.store_id)
+    sale = (await db.execute(select(models.Sale).where(
         models.Sale.id == sale_id,
         models.Sale.store_id == current_user.store_id # Ensure sale belongs to user's store
-    ).first()
+    ))).scalars().first()
     if sale is None:
         logger.warning(f"Sale with id {sale_id} not found in store {current_user.store_id}.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale not found in your store")
-    logger.info(f"Successfully fetched sale {sale_id}")
+    logger.info("Successfully fetched sale %s", sale_id)
     return sale
 
 # Note: Updating or Deleting sales might be complex depending on business logic (e.g., returns, stock adjustments)
@@ -91,14 +260,14 @@ async def read_sale( # Renamed function for clarity
 @router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_sale(
     sale_id: int,
-    db: Session = Depends(auth_deps.get_db),
+    db: AsyncSession = Depends(auth_deps.get_async_db),
     current_admin: models.User = Depends(auth_deps.admin_required) # Only admin can delete
 ):
-    logger.info(f"Admin {current_admin.email} (store {current_admin.store_id}) attempting to delete sale: {sale_id}")
-    sale_to_delete = db.query(models.Sale).filter( # Changed to models.Sale
+    logger.info("Admin %s (store %s) attempting to delete sale: %s", current_admin.email, current_admin.store_id, sale_id)
+    sale_to_delete = (await db.execute(select(models.Sale).where(
         models.Sale.id == sale_id,
         models.Sale.store_id == current_admin.store_id # Admin can only delete from their store
-    ).first()
+    ))).scalars().first()
 
     if not sale_to_delete:
         logger.warning(f"Sale with id {sale_id} not found in store {current_admin.store_id} for deletion.")
@@ -108,13 +277,31 @@ async def delete_sale(
     # Does this adjust product stock back? Are there audit trails?
     # For this example, we'll just delete the record.
     # And adjust product quantity back
-    product = db.query(models.Product).filter(models.Product.id == sale_to_delete.product_id).first()
-    if product:
-        product.quantity += sale_to_delete.quantity
-        logger.info(f"Adjusted stock for product {product.id} by +{sale_to_delete.quantity}")
-
+    # Restock with one atomic increment, which also takes the product's row lock before the sync version
+    # (the same order as the sale paths)
+    restocked = (await db.execute(
+        update(models.Product)
+        .where(models.Product.id == sale_to_delete.product_id)
+        .values(quantity=models.Product.quantity + sale_to_delete.quantity)
+        .returning(models.Product.id, models.Product.store_id, models.Product.quantity, models.Product.max_sell_price, models.Product.category)
+        .execution_options(synchronize_session=False)
+    )).one_or_none()
+    version = await product_sync.stamp_products(db, current_admin.store_id, [restocked.id] if restocked else [])
+    if restocked:
+        product_id, store_id, quantity, max_sell_price, category = restocked
+        logger.info("Adjusted stock for product %s by +%s", product_id, sale_to_delete.quantity)
+        await store_metrics.apply_delta(
+            db, store_id, items_sold=-sale_to_delete.quantity, sales_value=-sale_to_delete.quantity * max_sell_price
+        )
+        await sales_rollups.apply_sale(
+            db, store_id, sale_to_delete.timestamp, product_id, category,
+            -sale_to_delete.quantity, -sale_to_delete.quantity * max_sell_price
+        )
+        await demand.apply_sale(db, store_id, product_id, sale_to_delete.timestamp, -sale_to_delete.quantity)
+        await push.publish(db, store_id, "stock", version=version, product_id=product_id, quantity=quantity)
 
-    db.delete(sale_to_delete)
-    db.commit()
-    logger.info(f"Successfully deleted sale: {sale_id} from store {current_admin.store_id}")
+    await db.delete(sale_to_delete)
+    await push.publish(db, current_admin.store_id, "sale_deleted", version=version, sale_id=sale_id)
+    await db.commit()
+    logger.info("Successfully deleted sale: %s from store %s", sale_id, current_admin.store_id)
     return None
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, computed_field
 from datetime import date as datetime_date # Alias for clarity
-from typing import Optional
+from typing import Optional, List
 
 class StoreCreate(BaseModel):
     storename: str
@@ -82,6 +82,7 @@ class ProductCreate(BaseModel):
     max_sell_price: float = Field(..., gt=0)
     date: datetime_date # Using aliased date
     store_id: int # This will be set by the endpoint using current_user.store_id
+    sku: Optional[str] = Field(default=None, min_length=1, max_length=64) # SKU/barcode, unique within the store
     class Config:
         from_attributes = True
 
@@ -92,14 +93,87 @@ class ProductUpdate(BaseModel):
     quantity: Optional[int] = Field(default=None, ge=0)
     max_sell_price: Optional[float] = Field(default=None, gt=0)
     date: Optional[datetime_date] = None # Corrected: Use alias and simple Optional for Pydantic v2
+    sku: Optional[str] = Field(default=None, min_length=1, max_length=64)
 
 class ProductOut(ProductCreate):
     id: int
     net_profit: float
-    min_sell_price: float
     class Config:
         from_attributes = True
 
+    # Derived on serialization, so ProductOut can be validated straight from a models.Product row
+    @computed_field
+    @property
+    def min_sell_price(self) -> float:
+        return self.purchase_price * 1.20 # Assuming 20% markup for min_sell_price
+
+class ProductPage(BaseModel):
+    items: List[ProductOut]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= to fetch the next page; None on the last page
+
+class ProductChanges(BaseModel):
+    items: List[ProductOut] # Created or updated products, oldest change first
+    deleted: List[int] # Ids of deleted products; apply these before items
+    version: int # Store change version; send it as ?since= on the next poll once next_cursor is None
+    next_cursor: Optional[str] = None # More changes are pending: pass back as ?cursor= (with the same since)
+    reset: bool = False # since predates compacted deletions: replace the local copy, items is a full download
+
+class CategoryFacet(BaseModel):
+    category: str
+    count: int
+
+class ProductSearchResult(BaseModel):
+    items: List[ProductOut] # Best matches first: prefix, then substring, then closest fuzzy match
+    facets: List[CategoryFacet] # Matches per category, counted before the category filter
+
+class ProductImportRowError(BaseModel):
+    row: int # 1-based data row (header and blank lines are not counted)
+    errors: List[str]
+
+class ProductImportResult(BaseModel):
+    processed: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[ProductImportRowError]
+    errors_truncated: bool = False # True when more rows failed than are listed in errors
+
+class ProductBulkItem(ProductUpdate):
+    id: int
+
+class ProductBulkFilter(BaseModel):
+    # Products matching every criterion given; at least one is required
+    ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=1000)
+    category: Optional[str] = None
+    max_quantity: Optional[int] = None # Stock at or below, e.g. 0 for sold-out items
+
+class ProductBulkPatch(BaseModel):
+    # Applied to every product the filter matches; the factors scale the current price (1.05 for +5%)
+    category: Optional[str] = Field(default=None, min_length=1, max_length=50)
+    purchase_price: Optional[float] = Field(default=None, gt=0)
+    quantity: Optional[int] = Field(default=None, ge=0)
+    max_sell_price: Optional[float] = Field(default=None, gt=0)
+    date: Optional[datetime_date] = None
+    purchase_price_factor: Optional[float] = Field(default=None, gt=0)
+    max_sell_price_factor: Optional[float] = Field(default=None, gt=0)
+
+class ProductBulkUpdate(BaseModel):
+    # Either items (one patch per product id) or filter together with patch
+    items: Optional[List[ProductBulkItem]] = Field(default=None, min_length=1, max_length=1000)
+    filter: Optional[ProductBulkFilter] = None
+    patch: Optional[ProductBulkPatch] = None
+
+class ProductBulkItemResult(BaseModel):
+    id: int
+    status: str # "updated", "deleted", "not_found" or "has_sales" (products with sales are not deleted)
+    net_profit: Optional[float] = None # Recomputed value, for updated products
+
+class ProductBulkResult(BaseModel):
+    matched: int
+    succeeded: int
+    failed: int
+    results: List[ProductBulkItemResult]
+
 class SaleCreate(BaseModel):
     product_id: int
     # user_id will be current_user.id, not from body
@@ -107,6 +181,11 @@ class SaleCreate(BaseModel):
     quantity: int
     timestamp: datetime_date # Using aliased date
 
+class SaleByCodeCreate(BaseModel):
+    code: str = Field(..., min_length=1, max_length=64) # Scanned SKU/barcode instead of product_id
+    quantity: int
+    timestamp: datetime_date
+
 class SaleOut(BaseModel): # Explicitly define all fields for SaleOut
     id: int
     product_id: int
@@ -117,6 +196,25 @@ class SaleOut(BaseModel): # Explicitly define all fields for SaleOut
     class Config:
         from_attributes = True
 
+class CheckoutItem(BaseModel):
+    product_id: int
+    quantity: int = Field(..., gt=0)
+
+class CheckoutCreate(BaseModel):
+    items: List[CheckoutItem] = Field(..., min_length=1, max_length=500)
+    timestamp: datetime_date
+    # False: the whole cart is rejected if any line cannot be filled. True: fill what is in stock, report the rest.
+    allow_partial: bool = False
+
+class CheckoutRejectedItem(BaseModel):
+    product_id: int
+    quantity: int
+    reason: str
+
+class CheckoutOut(BaseModel):
+    sales: List[SaleOut]
+    rejected: List[CheckoutRejectedItem]
+
 class UserUpdate(BaseModel):
     first_name: Optional[str] = Field(default=None, min_length=1)
     last_name: Optional[str] = Field(default=None, min_length=1)
@@ -133,3 +231,67 @@ class DashboardMetrics(BaseModel):
     # sales_over_time: Dict[str, float] # e.g., sales per day/month
     class Config:
         from_attributes = True
+
+class SalesBucketOut(BaseModel):
+    period_start: datetime_date # First day of the day/week (Monday)/month bucket
+    units: int
+    revenue: float
+
+class SalesTimeSeriesOut(BaseModel):
+    bucket: str
+    start: datetime_date
+    end: datetime_date
+    points: List[SalesBucketOut]
+
+class TopProductOut(BaseModel):
+    product_id: int
+    name: str
+    category: str
+    units: int
+    revenue: float
+
+class TopCategoryOut(BaseModel):
+    category: str
+    units: int
+    revenue: float
+
+class ProfitFigures(BaseModel):
+    units: int
+    revenue: float # Units sold at max_sell_price
+    cost: float # Units sold at purchase_price
+    profit: float
+    margin: Optional[float] = None # profit / revenue; None without revenue
+
+class ProfitGroupOut(ProfitFigures):
+    # Set according to the report's group_by
+    product_id: Optional[int] = None
+    name: Optional[str] = None
+    category: Optional[str] = None
+    period_start: Optional[datetime_date] = None # First day of the day/week (Monday)/month bucket
+
+class ProfitReportOut(BaseModel):
+    group_by: str
+    bucket: Optional[str] = None # For group_by=period
+    start: datetime_date
+    end: datetime_date
+    total: ProfitFigures
+    groups: List[ProfitGroupOut]
+    cached: bool
+
+class ReorderSuggestionOut(BaseModel):
+    product_id: int
+    name: str
+    category: str
+    quantity: int # Current stock
+    velocity: float # Mean units sold per day over the demand window
+    forecast_daily: float # Forecast units per day over lead time + horizon
+    forecast_units: float # Forecast units over lead time + horizon
+    days_until_stockout: Optional[int] = None # None when the forecast never empties the stock
+    suggested_quantity: int # Forecast units not covered by the current stock
+
+class ReorderReportOut(BaseModel):
+    as_of: datetime_date
+    window_days: int
+    horizon_days: int
+    lead_time_days: int
+    items: List[ReorderSuggestionOut]
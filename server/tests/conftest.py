@@ -0,0 +1,92 @@
+"""Shared fixtures: the app on a temporary SQLite file, and a fresh store (with its admin) per test.
+
+Run from server/:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+_DB_DIR = tempfile.TemporaryDirectory()
+_DB_PATH = os.path.join(_DB_DIR.name, "tests.db")
+
+# Before anything imports core.config or database
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_DB_PATH}",
+    ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{_DB_PATH}",
+    DB_POOL_MODE="sqlite",
+    LOG_LEVEL="WARNING",
+)
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+sys.path.insert(0, SERVER_DIR)
+
+
+class Store:
+    # A store and its admin, with the admin's auth headers
+    def __init__(self, store_id: int, user_id: int, email: str, headers: dict):
+        self.id = store_id
+        self.user_id = user_id
+        self.email = email
+        self.headers = headers
+
+
+@pytest.fixture(scope="session")
+def app():
+    from sqlalchemy import create_engine
+
+    import main
+    import models
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(engine)
+    engine.dispose()
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def store(app) -> Store:
+    # Inserted directly with a minted token: registering through the API would spend a bcrypt hash per test
+    from sqlalchemy import create_engine, insert
+
+    import models
+    from auth_utils import security
+
+    tag = uuid.uuid4().hex[:8]
+    email = f"admin-{tag}@example.com"
+    engine = create_engine(os.environ["DATABASE_URL"])
+    with engine.begin() as conn:
+        store_id = conn.execute(insert(models.Store).values(name=f"store-{tag}").returning(models.Store.id)).scalar_one()
+        user_id = conn.execute(insert(models.User).values(
+            email=email, hashed_password="x", role="admin", store_id=store_id
+        ).returning(models.User.id)).scalar_one()
+    engine.dispose()
+    token = security.create_access_token({"sub": email, "role": "admin", "id": user_id})
+    return Store(store_id, user_id, email, {"Authorization": f"Bearer {token}"})
+
+
+@pytest.fixture
+def add_product(client, store):
+    # add_product(name=..., quantity=...) -> the created product as JSON; unspecified fields get defaults
+    def add(**fields) -> dict:
+        body = {
+            "name": f"product-{uuid.uuid4().hex[:8]}", "category": "Food", "purchase_price": 10.0, "quantity": 10,
+            "max_sell_price": 20.0, "date": "2025-01-01", "store_id": store.id,
+        }
+        body.update(fields)
+        response = client.post("/products/", headers=store.headers, json=body)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return add
@@ -0,0 +1,53 @@
+import json
+
+HEADER = "name,category,purchase_price,quantity,max_sell_price,date\n"
+
+
+def _products(client, store) -> list:
+    items, params = [], {"limit": 500}
+    while True:
+        page = client.get("/products/", headers=store.headers, params=params).json()
+        items += page["items"]
+        if not page["next_cursor"]:
+            return items
+        params["cursor"] = page["next_cursor"]
+
+
+def test_csv_import_across_batches_reports_bad_rows(client, store):
+    rows = "".join(f"P{i},Food,{1 + i % 5},{i % 9},{10 + i % 5},2025-01-02\n" for i in range(25))
+    body = HEADER + rows + "bad,Food,x,1,2,2025-01-01\nshort,row\n"
+    response = client.post("/products/import", headers={**store.headers, "content-type": "text/csv"},
+                           params={"batch_size": 7}, content=body.encode())
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["processed"], result["inserted"], result["updated"], result["failed"]) == (27, 25, 0, 2)
+    assert [error["row"] for error in result["errors"]] == [26, 27]
+
+    products = {p["name"]: p for p in _products(client, store)}
+    assert len(products) == 25
+    p3 = products["P3"]
+    assert p3["net_profit"] == (p3["max_sell_price"] - p3["purchase_price"]) * p3["quantity"]
+
+
+def test_ndjson_upsert_updates_by_name_and_rejects_other_stores(client, store, add_product):
+    existing = add_product(name="Widget", quantity=1)
+    lines = [
+        json.dumps({"name": "Widget", "category": "Books", "purchase_price": 2, "quantity": 3, "max_sell_price": 5, "date": "2025-02-02"}),
+        json.dumps({"name": "Gadget", "category": "Food", "purchase_price": 1, "quantity": 4, "max_sell_price": 2, "date": "2025-02-02"}),
+        "[1]",
+        json.dumps({"name": "Other", "category": "Food", "purchase_price": 1, "quantity": 1, "max_sell_price": 2,
+                    "date": "2025-02-02", "store_id": store.id + 1000}),
+    ]
+    response = client.post("/products/import", headers={**store.headers, "content-type": "application/x-ndjson"},
+                           params={"upsert": "true"}, content="\n".join(lines).encode())
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["inserted"], result["updated"], result["failed"]) == (1, 1, 2)
+
+    widget = client.get(f"/products/{existing['id']}", headers=store.headers).json()
+    assert (widget["category"], widget["quantity"], widget["net_profit"]) == ("Books", 3, 9.0)
+    assert sorted(p["name"] for p in _products(client, store)) == ["Gadget", "Widget"]
+
+
+def test_import_rejects_unknown_content_type(client, store):
+    assert client.post("/products/import", headers=store.headers, content=b"x").status_code == 415
@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+
+
+def _quantity(client, store, product_id: int) -> int:
+    return client.get(f"/products/{product_id}", headers=store.headers).json()["quantity"]
+
+
+def test_sale_beyond_stock_is_rejected(client, store, add_product):
+    product = add_product(quantity=3)
+    response = client.post("/sales/", headers=store.headers, json={"product_id": product["id"], "quantity": 4, "timestamp": "2025-01-01"})
+    assert response.status_code == 400
+    assert _quantity(client, store, product["id"]) == 3
+
+    response = client.post("/sales/", headers=store.headers, json={"product_id": product["id"], "quantity": 3, "timestamp": "2025-01-01"})
+    assert response.status_code == 201, response.text
+    assert _quantity(client, store, product["id"]) == 0
+
+
+def test_concurrent_sales_never_oversell(app, store, add_product):
+    product = add_product(quantity=5)
+
+    async def sell_all() -> list:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/sales/", headers=store.headers, json={"product_id": product["id"], "quantity": 1, "timestamp": "2025-01-01"})
+                for _ in range(12)
+            ))
+
+    statuses = sorted(response.status_code for response in asyncio.run(sell_all()))
+    assert statuses == [201] * 5 + [400] * 7
+
+
+def test_checkout_rejects_the_whole_cart(client, store, add_product):
+    a, b = add_product(quantity=2), add_product(quantity=2)
+    response = client.post("/sales/checkout", headers=store.headers, json={
+        "items": [{"product_id": a["id"], "quantity": 1}, {"product_id": b["id"], "quantity": 5}, {"product_id": 999999, "quantity": 1}],
+        "timestamp": "2025-01-01",
+    })
+    assert response.status_code == 409, response.text
+    rejected = response.json()["detail"]["rejected"]
+    assert [(r["product_id"], r["reason"]) for r in rejected] == [
+        (b["id"], "Not enough stock"), (999999, "Product not found in your store")
+    ]
+    assert (_quantity(client, store, a["id"]), _quantity(client, store, b["id"])) == (2, 2)
+
+
+def test_checkout_partial_fills_what_it_can(client, store, add_product):
+    a, b = add_product(quantity=2), add_product(quantity=2)
+    response = client.post("/sales/checkout", headers=store.headers, json={
+        "items": [{"product_id": a["id"], "quantity": 1}, {"product_id": a["id"], "quantity": 1}, {"product_id": b["id"], "quantity": 5}],
+        "timestamp": "2025-01-01", "allow_partial": True,
+    })
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert [(s["product_id"], s["quantity"]) for s in body["sales"]] == [(a["id"], 2)] # Lines of one product merge
+    assert [r["product_id"] for r in body["rejected"]] == [b["id"]]
+    assert (_quantity(client, store, a["id"]), _quantity(client, store, b["id"])) == (0, 2)
+
+    metrics = client.get("/dashboard/metrics", headers=store.headers).json()
+    assert metrics["total_sold_items"] == 2